@@ -5,13 +5,12 @@ import warnings
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from google.adk.agents.live_request_queue import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 # Load environment variables from .env file BEFORE importing agent
@@ -20,6 +19,8 @@ load_dotenv()
 # Import agent after loading environment variables
 # pylint: disable=wrong-import-position
 from biometric_agent.agent import agent  # noqa: E402
+from session_compaction import CompactingSessionService, CompactionConfig  # noqa: E402
+from token_budget import ContextBudgetConfig  # noqa: E402
 
 # Configure logging
 logging.basicConfig(
@@ -58,12 +59,42 @@ app.add_middleware(
 )
 
 
+# Live context-window limits (sliding-window compression on the Live API)
+# and the per-session soft budget
+context_budget = ContextBudgetConfig.from_env()
+
 # Define your session service
-session_service = InMemorySessionService()
+# (histories are compacted in the background so hours-long kiosk sessions
+# keep a bounded memory footprint, and early once a session's history
+# exceeds the soft budget; see session_compaction.py)
+session_service = CompactingSessionService(
+    CompactionConfig.from_env(),
+    soft_budget_tokens=context_budget.soft_budget_tokens,
+)
 
 # Define your runner
 runner = Runner(app_name=APP_NAME, agent=agent, session_service=session_service)
 
+
+@app.get("/sessions/{user_id}/{session_id}/context")
+async def session_context_usage(user_id: str, session_id: str) -> dict:
+    """Estimated history size of a live session against its soft budget."""
+    usage = session_service.context_usage(APP_NAME, user_id, session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return usage
+
+
+@app.on_event("startup")
+async def start_session_compaction() -> None:
+    session_service.start()
+
+
+@app.on_event("shutdown")
+async def stop_session_compaction() -> None:
+    await session_service.stop()
+
+
 # ========================================
 # WebSocket Endpoint
 # ========================================
@@ -118,6 +149,7 @@ async def websocket_endpoint(
                 types.ProactivityConfig(proactive_audio=True) if proactivity else None
             ),
             enable_affective_dialog=affective_dialog if affective_dialog else None,
+            context_window_compression=context_budget.context_window_compression(),
         )
         logger.info(f"Model Config: {model_name} (Modalities: {response_modalities}, Proactivity: {proactivity})")
     else:
@@ -130,6 +162,7 @@ async def websocket_endpoint(
             input_audio_transcription=None,
             output_audio_transcription=None,
             session_resumption=types.SessionResumptionConfig(),
+            context_window_compression=context_budget.context_window_compression(),
         )
         logger.info(f"Model Config: {model_name} (Modalities: {response_modalities})")
 
@@ -0,0 +1,414 @@
+"""Background compaction of long-running live session histories.
+
+Kiosks keep a single session open for hours, and every transcript, tool call
+and A2A metadata blob is appended to `session.events`, both in the session
+service's storage and in the session object held by `Runner.run_live`. This
+module keeps those histories bounded:
+
+  - `CompactingSessionService` is an `InMemorySessionService` that remembers
+    which sessions grew past the configured window.
+  - A background task (`start()` / `stop()`) periodically compacts them, off
+    the request path: the most recent events are kept verbatim; the latest
+    older tool calls/results and the last event of each author are kept
+    (with debug metadata and inline blobs stripped); everything else is
+    dropped, and its text folded into a single summary event. Session state
+    is untouched.
+
+A function call and its response (matched by function-call id) are always
+kept or dropped together, and the recent window is widened so that it never
+starts between them: a response without its call, replayed to the model, is
+an invalid history.
+
+Settings come from `CompactionConfig` (SESSION_COMPACTION_* env vars by
+default), so each app can tune its own window.
+
+The service also keeps a per-session context budget. ADK's live connection
+does not copy the Live API's usage metadata onto `run_live` events, so the
+size of a session's history is estimated from its text instead (about
+`CHARS_PER_TOKEN` characters per token), counted in `append_event`. A
+session whose estimate crosses `soft_budget_tokens` is compacted on the next
+pass even if it is within `max_events`; `context_usage` reports the figures.
+
+Identical copies of this file live in mission-alpha-drone/backend/app/ and
+mission-bravo-engineer/backend/. Each mission directory is a self-contained
+app, installed and run from its own directory (see its README), and no
+package is shared between missions, so the module is copied rather than
+imported. Change both together; tests/test_session_compaction.py in the
+bravo backend fails when the copies differ.
+"""
+
+import asyncio
+import collections
+import dataclasses
+import logging
+import os
+import weakref
+from typing import Optional
+
+from google.adk.events.event import Event
+from google.adk.sessions import InMemorySessionService
+from google.adk.sessions.session import Session
+from google.genai import types
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_AUTHOR = "session_compactor"
+SUMMARY_METADATA_KEY = "compaction:summary"
+# Debug payloads that are useful on recent events only.
+_STRIPPED_METADATA_PREFIXES = ("a2a:request", "a2a:response")
+# Rough English average, used to estimate tokens from text.
+CHARS_PER_TOKEN = 4
+
+
+@dataclasses.dataclass(frozen=True)
+class CompactionConfig:
+    """When and how aggressively to compact a session."""
+
+    # Compact once a session holds more than this many events.
+    max_events: int = 400
+    # Number of most recent events always kept verbatim.
+    keep_recent: int = 150
+    # Seconds between background compaction passes.
+    interval_seconds: float = 30.0
+    # Older tool calls/results kept verbatim (most recent first); earlier
+    # ones are folded into the summary.
+    max_tool_events: int = 40
+    # Fold the text of dropped events into one summary event.
+    summarize: bool = True
+    # Characters of dropped text kept in the summary (most recent wins).
+    summary_max_chars: int = 4000
+
+    @classmethod
+    def from_env(cls, prefix: str = "SESSION_COMPACTION_") -> "CompactionConfig":
+        defaults = cls()
+
+        def _get(name, cast, default):
+            value = os.getenv(prefix + name)
+            return cast(value) if value else default
+
+        return cls(
+            max_events=_get("MAX_EVENTS", int, defaults.max_events),
+            keep_recent=_get("KEEP_RECENT", int, defaults.keep_recent),
+            max_tool_events=_get(
+                "MAX_TOOL_EVENTS", int, defaults.max_tool_events
+            ),
+            interval_seconds=_get(
+                "INTERVAL_SECONDS", float, defaults.interval_seconds
+            ),
+            summarize=_get(
+                "SUMMARIZE", lambda v: v.lower() in ("1", "true", "yes"),
+                defaults.summarize,
+            ),
+            summary_max_chars=_get(
+                "SUMMARY_MAX_CHARS", int, defaults.summary_max_chars
+            ),
+        )
+
+
+def _has_tool_parts(event: Event) -> bool:
+    if not event.content or not event.content.parts:
+        return False
+    return any(p.function_call or p.function_response for p in event.content.parts)
+
+
+def _call_ids(event: Event) -> set[str]:
+    """Function-call ids of the calls and responses in an event."""
+    ids = set()
+    if event.content and event.content.parts:
+        for p in event.content.parts:
+            if p.function_call and p.function_call.id:
+                ids.add(p.function_call.id)
+            elif p.function_response and p.function_response.id:
+                ids.add(p.function_response.id)
+    return ids
+
+
+def _event_text(event: Event) -> str:
+    texts = []
+    if event.content and event.content.parts:
+        for p in event.content.parts:
+            if p.text and not p.thought:
+                texts.append(p.text)
+            elif p.function_call:
+                texts.append(f"called {p.function_call.name}({p.function_call.args})")
+            elif p.function_response:
+                texts.append(
+                    f"{p.function_response.name} returned {p.function_response.response}"
+                )
+    for transcription in (event.input_transcription, event.output_transcription):
+        if transcription and transcription.text:
+            texts.append(transcription.text)
+    return " ".join(texts).strip()
+
+
+def estimate_tokens(event: Event) -> int:
+    """Estimated tokens the event adds to the session history."""
+    return -(-len(_event_text(event)) // CHARS_PER_TOKEN)
+
+
+def _slim(event: Event) -> Event:
+    """Drops debug metadata and inline blobs from an event kept for history."""
+    updates = {}
+    if event.custom_metadata:
+        updates["custom_metadata"] = {
+            key: value
+            for key, value in event.custom_metadata.items()
+            if not key.startswith(_STRIPPED_METADATA_PREFIXES)
+        }
+    if event.content and event.content.parts and any(
+        p.inline_data for p in event.content.parts
+    ):
+        parts = [p for p in event.content.parts if not p.inline_data]
+        updates["content"] = event.content.model_copy(update={"parts": parts})
+    return event.model_copy(update=updates) if updates else event
+
+
+def compact_events(
+    events: list[Event], config: CompactionConfig, force: bool = False
+) -> list[Event]:
+    """Returns a compacted copy of `events`; see the module docstring.
+
+    Sessions with at most `max_events` events are left alone unless `force`
+    is set; either way the `keep_recent` latest events are kept.
+    """
+    if len(events) <= config.keep_recent or (
+        not force and len(events) <= config.max_events
+    ):
+        return events
+
+    ids_of = [_call_ids(event) for event in events]
+    first_seen = {}
+    for index, ids in enumerate(ids_of):
+        for call_id in ids:
+            first_seen.setdefault(call_id, index)
+
+    # Widen the recent window until no call in it started before it.
+    cutoff = len(events) - config.keep_recent
+    index = len(events) - 1
+    while index >= cutoff:
+        for call_id in ids_of[index]:
+            cutoff = min(cutoff, first_seen[call_id])
+        index -= 1
+    if cutoff == 0:
+        return events
+    older, recent = events[:cutoff], events[cutoff:]
+
+    last_by_author = {}
+    tool_indices = []
+    for index, event in enumerate(older):
+        last_by_author[event.author] = index
+        if _has_tool_parts(event):
+            tool_indices.append(index)
+    keep_indices = set(last_by_author.values())
+    if config.max_tool_events > 0:
+        keep_indices.update(tool_indices[-config.max_tool_events:])
+
+    # Keep the other half of every call/response pair that is kept.
+    members = collections.defaultdict(list)
+    for index in range(cutoff):
+        for call_id in ids_of[index]:
+            members[call_id].append(index)
+    stack = list(keep_indices)
+    while stack:
+        for call_id in ids_of[stack.pop()]:
+            for other in members[call_id]:
+                if other not in keep_indices:
+                    keep_indices.add(other)
+                    stack.append(other)
+
+    kept = []
+    dropped_text = []
+    previous_summary = None
+    for index, event in enumerate(older):
+        if event.custom_metadata and event.custom_metadata.get(SUMMARY_METADATA_KEY):
+            previous_summary = _event_text(event)
+            continue
+        if index in keep_indices:
+            kept.append(_slim(event))
+            continue
+        text = _event_text(event)
+        if text:
+            dropped_text.append(f"{event.author}: {text}")
+
+    compacted = []
+    if config.summarize and (previous_summary or dropped_text):
+        summary = "\n".join(
+            part for part in [previous_summary, *dropped_text] if part
+        )[-config.summary_max_chars:]
+        compacted.append(
+            Event(
+                author=SUMMARY_AUTHOR,
+                invocation_id=older[-1].invocation_id,
+                timestamp=older[-1].timestamp,
+                content=types.Content(
+                    role="user",
+                    parts=[types.Part(text=f"Earlier in this session:\n{summary}")],
+                ),
+                custom_metadata={SUMMARY_METADATA_KEY: True},
+            )
+        )
+    compacted.extend(kept)
+    compacted.extend(recent)
+    return compacted
+
+
+@dataclasses.dataclass
+class SessionContextUsage:
+    """Estimated size of one session's history."""
+
+    events: int = 0
+    estimated_tokens: int = 0
+    peak_estimated_tokens: int = 0
+    soft_budget_hits: int = 0
+
+
+class CompactingSessionService(InMemorySessionService):
+    """In-memory session service whose histories are compacted in the background.
+
+    Args:
+        config: Compaction settings; defaults to `CompactionConfig.from_env()`.
+        soft_budget_tokens: Estimated history size above which a session is
+            compacted early; None disables the budget.
+    """
+
+    def __init__(
+        self,
+        config: Optional[CompactionConfig] = None,
+        soft_budget_tokens: Optional[int] = None,
+    ):
+        super().__init__()
+        self.compaction_config = config or CompactionConfig.from_env()
+        self.soft_budget_tokens = soft_budget_tokens
+        # The Runner appends to its own copy of the session; track the latest
+        # live copy so it is compacted together with the stored one.
+        self._live_sessions: weakref.WeakValueDictionary = (
+            weakref.WeakValueDictionary()
+        )
+        self._pending: set[tuple[str, str, str]] = set()
+        # Sessions to compact even though they are within `max_events`.
+        self._forced: set[tuple[str, str, str]] = set()
+        self._usage: dict[tuple[str, str, str], SessionContextUsage] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.compactions = 0
+        self.events_dropped = 0
+
+    async def append_event(self, session: Session, event: Event) -> Event:
+        event = await super().append_event(session=session, event=event)
+        if event.partial:
+            # Not stored in the session.
+            return event
+        key = (session.app_name, session.user_id, session.id)
+        self._live_sessions[key] = session
+        if len(session.events) > self.compaction_config.max_events:
+            self._pending.add(key)
+
+        usage = self._usage.setdefault(key, SessionContextUsage())
+        usage.events = len(session.events)
+        usage.estimated_tokens += estimate_tokens(event)
+        usage.peak_estimated_tokens = max(
+            usage.peak_estimated_tokens, usage.estimated_tokens
+        )
+        if (
+            self.soft_budget_tokens is not None
+            and usage.estimated_tokens > self.soft_budget_tokens
+            and key not in self._forced
+        ):
+            usage.soft_budget_hits += 1
+            logger.info(
+                f"Session {session.id} history at ~{usage.estimated_tokens} "
+                f"tokens exceeds the soft budget of {self.soft_budget_tokens}"
+            )
+            self.request_compaction(*key)
+        return event
+
+    async def delete_session(
+        self, *, app_name: str, user_id: str, session_id: str
+    ) -> None:
+        await super().delete_session(
+            app_name=app_name, user_id=user_id, session_id=session_id
+        )
+        key = (app_name, user_id, session_id)
+        self._usage.pop(key, None)
+        self._pending.discard(key)
+        self._forced.discard(key)
+
+    def context_usage(
+        self, app_name: str, user_id: str, session_id: str
+    ) -> Optional[dict]:
+        """Estimated history size of a session, or None if it has no events."""
+        usage = self._usage.get((app_name, user_id, session_id))
+        if usage is None:
+            return None
+        return {
+            **dataclasses.asdict(usage),
+            "soft_budget_tokens": self.soft_budget_tokens,
+        }
+
+    def request_compaction(self, app_name: str, user_id: str, session_id: str) -> None:
+        """Compacts a session on the next background pass, whatever its size."""
+        key = (app_name, user_id, session_id)
+        self._pending.add(key)
+        self._forced.add(key)
+
+    def _compact_session(self, session: Session, force: bool = False) -> int:
+        before = len(session.events)
+        compacted = compact_events(session.events, self.compaction_config, force)
+        if compacted is not session.events:
+            # In place, so every holder of the session sees the shorter list.
+            session.events[:] = compacted
+        return before - len(session.events)
+
+    def compact_pending(self) -> int:
+        """Compacts every session marked since the last pass.
+
+        Returns:
+            The number of events dropped.
+        """
+        pending, self._pending = self._pending, set()
+        forced, self._forced = self._forced, set()
+        dropped = 0
+        for app_name, user_id, session_id in pending:
+            stored = (
+                self.sessions.get(app_name, {}).get(user_id, {}).get(session_id)
+            )
+            live = self._live_sessions.get((app_name, user_id, session_id))
+            for session in {id(s): s for s in (stored, live) if s}.values():
+                dropped += self._compact_session(
+                    session, force=(app_name, user_id, session_id) in forced
+                )
+            usage = self._usage.get((app_name, user_id, session_id))
+            session = live or stored
+            if usage is not None and session is not None:
+                usage.events = len(session.events)
+                usage.estimated_tokens = sum(
+                    estimate_tokens(event) for event in session.events
+                )
+        if dropped:
+            self.compactions += 1
+            self.events_dropped += dropped
+            logger.info(
+                f"Compacted {len(pending)} session(s), dropped {dropped} events"
+            )
+        return dropped
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.compaction_config.interval_seconds)
+            try:
+                self.compact_pending()
+            except Exception as e:
+                logger.error(f"Session compaction failed: {e}")
+
+    def start(self) -> None:
+        """Starts the background compaction task (call from app startup)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
@@ -1,4 +1,16 @@
-from google.adk.a2a.utils.agent_to_a2a import to_a2a
+from a2a.server.apps import A2AStarletteApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from a2a.types import AgentCapabilities
+from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor
+from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
+from google.adk.auth.credential_service.in_memory_credential_service import InMemoryCredentialService
+from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
+from google.adk.runners import Runner
+from google.adk.sessions.in_memory_session_service import InMemorySessionService
+from starlette.applications import Starlette
 from agent import root_agent
 import logging
 import json
@@ -7,11 +19,62 @@ import json
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("architect_server")
 
+PORT = 8081
+
+
+class StreamingRunner(Runner):
+    """Runner that always runs in SSE mode so partial model output is emitted.
+
+    The A2A executor turns every ADK event into a TaskStatusUpdateEvent, so
+    with SSE enabled the client sees incremental updates instead of a single
+    reply once the whole task has finished.
+    """
+
+    def run_async(self, *, run_config=None, **kwargs):
+        run_config = (run_config or RunConfig()).model_copy(
+            update={"streaming_mode": StreamingMode.SSE}
+        )
+        return super().run_async(run_config=run_config, **kwargs)
+
+
+def create_runner() -> Runner:
+    return StreamingRunner(
+        app_name=root_agent.name or "adk_agent",
+        agent=root_agent,
+        artifact_service=InMemoryArtifactService(),
+        session_service=InMemorySessionService(),
+        memory_service=InMemoryMemoryService(),
+        credential_service=InMemoryCredentialService(),
+    )
+
+
 # 1. Create the A2A App (Handles Agent Card & HTTP)
-# This middleware automatically sets up the /a2a/v1/... endpoints
-app = to_a2a(root_agent, port=8081)
+# Same wiring as google.adk's to_a2a(), but the card advertises streaming so
+# clients negotiate message/stream (SSE) instead of a blocking message/send.
+request_handler = DefaultRequestHandler(
+    agent_executor=A2aAgentExecutor(runner=create_runner),
+    task_store=InMemoryTaskStore(),
+)
+card_builder = AgentCardBuilder(
+    agent=root_agent,
+    rpc_url=f"http://localhost:{PORT}/",
+    capabilities=AgentCapabilities(streaming=True),
+)
+
+app = Starlette()
+
+
+async def setup_a2a():
+    agent_card = await card_builder.build()
+    A2AStarletteApplication(
+        agent_card=agent_card,
+        http_handler=request_handler,
+    ).add_routes_to_app(app)
+
+
+app.add_event_handler("startup", setup_a2a)
 
 if __name__ == "__main__":
     import uvicorn
     # Use 0.0.0.0 to allow external access if needed, port 8080 as standard
-    uvicorn.run(app, host='0.0.0.0', port=8081)
\ No newline at end of file
+    uvicorn.run(app, host='0.0.0.0', port=PORT)
@@ -0,0 +1,4 @@
+"""Benchmarks for the dispatch backend. Run from mission-bravo-engineer/backend."""
+
+# The same dispatch_agent package setup as the tests; see tests/conftest.py.
+import tests.conftest  # noqa: F401
@@ -0,0 +1,77 @@
+"""Benchmark: building A2A request parts from long session histories.
+
+Compares a full rescan (a fresh cursor per call, which is what the agent did
+before the cursor existed) with the incremental cursor, for sessions of 1k
+and 10k text events with one new event per turn.
+
+Run from mission-bravo-engineer/backend:
+
+  python -m benchmarks.bench_session_cursor
+"""
+
+import time
+
+from a2a.types import Part as A2APart
+from a2a.types import TextPart
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+from google.genai import types as genai_types
+
+from dispatch_agent.session_cursor import SessionCursorIndex
+
+AGENT_NAME = "execute_architect"
+CONTEXT_ID_KEY = "a2a:context_id"
+TURNS = 50
+
+
+def _convert(event: Event) -> list[A2APart]:
+  return [
+      A2APart(root=TextPart(text=part.text))
+      for part in event.content.parts
+      if part.text
+  ]
+
+
+def _event(i: int) -> Event:
+  return Event(
+      author="user",
+      invocation_id=f"inv-{i}",
+      content=genai_types.Content(
+          role="user", parts=[genai_types.Part.from_text(text=f"event {i}")]
+      ),
+  )
+
+
+def _index() -> SessionCursorIndex:
+  return SessionCursorIndex(AGENT_NAME, _convert, CONTEXT_ID_KEY)
+
+
+def _per_call_us(session: Session, events: int, incremental: bool) -> float:
+  session.events = [_event(i) for i in range(events)]
+  index = _index()
+  index.collect(session)
+  elapsed = 0.0
+  for turn in range(TURNS):
+    session.events.append(_event(events + turn))
+    if not incremental:
+      index = _index()
+    start = time.perf_counter()
+    parts, _ = index.collect(session)
+    elapsed += time.perf_counter() - start
+    assert len(parts) == events + turn + 1
+  return elapsed / TURNS * 1e6
+
+
+def main() -> None:
+  session = Session(id="bench", app_name="bench", user_id="bench")
+  for events in (1_000, 10_000):
+    full = _per_call_us(session, events, incremental=False)
+    incremental = _per_call_us(session, events, incremental=True)
+    print(
+        f"{events:>6} events: full rescan {full / 1e3:8.2f} ms/call,"
+        f" incremental {incremental:8.1f} us/call"
+    )
+
+
+if __name__ == "__main__":
+  main()
@@ -23,13 +23,42 @@ load_dotenv()
 
 from .custom_remote_a2a_agent import CustomRemoteA2aAgent
 from .hazard_db import PART_HAZARDS
+from .http_pool import create_shared_client_factory
+from .replica_pool import ReplicaPool
+from .response_cache import A2aResponseCache
 
 
+# Optional comma-separated list of extra Architect agent card URLs.
+ARCHITECT_REPLICA_CARDS = [
+    url.strip()
+    for url in os.getenv("ARCHITECT_REPLICA_CARDS", "").split(",")
+    if url.strip()
+]
+
 architect_agent = CustomRemoteA2aAgent(
     name="execute_architect",
     # Description tells the model this is a FILTER, not just a lookup.
     description="[SILENT ACTION]: Retrieves the REQUIRED SUBSET of parts. The screen shows a full inventory; this tool filters out the wrong parts. Must be called INSTANTLY when a Target Name is found. Input: Target Name.",
     agent_card=(f"http://localhost:8081{AGENT_CARD_WELL_KNOWN_PATH}"),
+    # Share one tuned connection pool across remote agents (see http_pool.py).
+    # Responses are streamed, but AgentTool only hands the final content back
+    # to the live model, so streaming does not shorten its time to first token.
+    a2a_client_factory=create_shared_client_factory(),
+    # Schematic lookups are idempotent: share answers across stations.
+    response_cache=A2aResponseCache(ttl_seconds=60.0),
+    # With replicas configured: balance over them, hedge slow ones and bound
+    # each attempt (default: the same 600 s as a single replica).
+    replica_agent_cards=ARCHITECT_REPLICA_CARDS,
+    replica_pool=(
+        ReplicaPool(
+            hedge=True,
+            attempt_timeout=float(
+                os.getenv("ARCHITECT_ATTEMPT_TIMEOUT", "600")
+            ),
+        )
+        if ARCHITECT_REPLICA_CARDS
+        else None
+    ),
 )
 
 def lookup_part_safety(part_name: str) -> str:
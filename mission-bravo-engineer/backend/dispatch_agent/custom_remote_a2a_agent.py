@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
 import dataclasses
 import json
 import logging
@@ -53,6 +55,12 @@ from google.adk.flows.llm_flows.contents import _present_other_agent_message
 from google.adk.flows.llm_flows.functions import find_matching_function_call
 from google.adk.agents.base_agent import BaseAgent
 
+from .metadata_capture import A2aMetadataCapture
+from .metadata_capture import MetadataCaptureMode
+from .replica_pool import ReplicaPool
+from .response_cache import A2aResponseCache
+from .session_cursor import SessionCursorIndex
+
 __all__ = [
     "A2AClientError",
     "AGENT_CARD_WELL_KNOWN_PATH",
@@ -64,6 +72,7 @@ __all__ = [
 # Constants
 A2A_METADATA_PREFIX = "a2a:"
 DEFAULT_TIMEOUT = 600.0
+DEFAULT_MAX_CONCURRENT_LIVE_TURNS = 4
 
 logger = logging.getLogger("google_adk." + __name__)
 
@@ -82,6 +91,37 @@ class A2AClientError(Exception):
   pass
 
 
+@dataclasses.dataclass(eq=False)
+class _LiveTurn:
+  """Bookkeeping for one in-flight live turn."""
+
+  # The session's turn before this one, until that turn is released.
+  previous: Optional["_LiveTurn"] = None
+  task: Optional[asyncio.Task] = None
+  # Resolved once this turn and every earlier turn of the session finished
+  # (completed, failed or cancelled); later turns emit only after that.
+  released: Optional[asyncio.Future] = None
+  # Set once the turn has emitted, or its remote call returned; from then
+  # on a newer turn no longer cancels it.
+  emitting: bool = False
+  answered: bool = False
+  # Session parts this turn sends, including those of a turn it superseded.
+  parts: list[A2APart] = dataclasses.field(default_factory=list)
+
+  def may_emit(self) -> bool:
+    return self.previous is None or self.previous.released.done()
+
+  def release(self) -> None:
+    """Releases the turn once every earlier turn has been released."""
+    if self.released.done():
+      return
+    if self.may_emit():
+      self.previous = None
+      self.released.set_result(None)
+    else:
+      self.previous.released.add_done_callback(lambda _: self.release())
+
+
 @a2a_experimental
 class CustomRemoteA2aAgent(BaseAgent):
   """Agent that communicates with a remote A2A agent via A2A client.
@@ -112,6 +152,12 @@ class CustomRemoteA2aAgent(BaseAgent):
       a2a_request_meta_provider: Optional[
           Callable[[InvocationContext, A2AMessage], dict[str, Any]]
       ] = None,
+      metadata_capture: Union[MetadataCaptureMode, str, None] = None,
+      response_cache: Optional[A2aResponseCache] = None,
+      replica_agent_cards: Optional[list[Union[AgentCard, str]]] = None,
+      replica_pool: Optional[ReplicaPool] = None,
+      max_concurrent_live_turns: int = DEFAULT_MAX_CONCURRENT_LIVE_TURNS,
+      cancel_superseded_live_turns: bool = True,
       **kwargs: Any,
   ) -> None:
     """Initialize RemoteA2aAgent.
@@ -128,6 +174,22 @@ class CustomRemoteA2aAgent(BaseAgent):
       a2a_request_meta_provider: Optional callable that takes InvocationContext
         and A2AMessage and returns a metadata object to attach to the A2A
         request.
+      metadata_capture: How much of each A2A request/response to record on
+        yielded events: "off", "summary" or "full" (full payloads go to a
+        side-channel logger, not the session). Defaults to the
+        A2A_METADATA_CAPTURE env var, then "summary".
+      response_cache: Optional A2aResponseCache. Opt in only for idempotent
+        remote agents; identical requests are then served from the cache and
+        concurrent ones share a single remote call.
+      replica_agent_cards: Optional equivalent replicas of the remote agent
+        (AgentCard objects, URLs or file paths) to balance requests over.
+      replica_pool: Optional ReplicaPool holding the balancing, hedging and
+        circuit breaker policy. Created with defaults when replica cards are
+        given without one.
+      max_concurrent_live_turns: Live turns sent to the remote agent at once;
+        reading further input waits while the limit is reached.
+      cancel_superseded_live_turns: Cancel a live turn that has not yielded
+        anything yet when a newer turn arrives for the same session.
       **kwargs: Additional arguments passed to BaseAgent
 
     Raises:
@@ -155,6 +217,21 @@ class CustomRemoteA2aAgent(BaseAgent):
     self._a2a_part_converter = a2a_part_converter
     self._a2a_client_factory: Optional[A2AClientFactory] = a2a_client_factory
     self._a2a_request_meta_provider = a2a_request_meta_provider
+    self._metadata_capture = A2aMetadataCapture(
+        metadata_capture, prefix=A2A_METADATA_PREFIX
+    )
+    self._response_cache = response_cache
+    self._replica_agent_cards = list(replica_agent_cards or [])
+    if self._replica_agent_cards and replica_pool is None:
+      replica_pool = ReplicaPool()
+    self._replica_pool: Optional[ReplicaPool] = replica_pool
+    self._max_concurrent_live_turns = max(1, max_concurrent_live_turns)
+    self._cancel_superseded_live_turns = cancel_superseded_live_turns
+    self._session_cursors = SessionCursorIndex(
+        agent_name=self.name,
+        convert_event=self._convert_event_to_parts,
+        context_id_key=A2A_METADATA_PREFIX + "context_id",
+    )
 
     # Validate and store agent card reference
     if isinstance(agent_card, AgentCard):
@@ -189,9 +266,11 @@ class CustomRemoteA2aAgent(BaseAgent):
         for label, generator in registry.items():
           self._a2a_client_factory.register(label, generator)
     if not self._a2a_client_factory:
+      # Streaming is only used when the agent card advertises it; otherwise
+      # the client falls back to a single blocking message/send.
       client_config = A2AClientConfig(
           httpx_client=self._httpx_client,
-          streaming=False,
+          streaming=True,
           polling=False,
           supported_transports=[A2ATransport.jsonrpc],
       )
@@ -244,15 +323,18 @@ class CustomRemoteA2aAgent(BaseAgent):
           f"Failed to resolve AgentCard from file {file_path}: {e}"
       ) from e
 
-  async def _resolve_agent_card(self) -> AgentCard:
-    """Resolve agent card from source."""
+  async def _resolve_agent_card(
+      self, source: Optional[str] = None
+  ) -> AgentCard:
+    """Resolve agent card from source (defaults to the primary card source)."""
     # print(f"[{self.name}] _resolve_agent_card CALLED")
+    source = source or self._agent_card_source
 
     # Determine if source is URL or file path
-    if self._agent_card_source.startswith(("http://", "https://")):
-      return await self._resolve_agent_card_from_url(self._agent_card_source)
+    if source.startswith(("http://", "https://")):
+      return await self._resolve_agent_card_from_url(source)
     else:
-      return await self._resolve_agent_card_from_file(self._agent_card_source)
+      return await self._resolve_agent_card_from_file(source)
 
   async def _validate_agent_card(self, agent_card: AgentCard) -> None:
     """Validate resolved agent card."""
@@ -299,6 +381,9 @@ class CustomRemoteA2aAgent(BaseAgent):
         if self._a2a_client_factory:
           self._a2a_client = self._a2a_client_factory.create(self._agent_card)
 
+      if self._replica_pool is not None and not len(self._replica_pool):
+        await self._populate_replica_pool()
+
       self._is_resolved = True
       logger.info("Successfully resolved remote A2A agent: %s", self.name)
 
@@ -308,6 +393,17 @@ class CustomRemoteA2aAgent(BaseAgent):
           f"Failed to initialize remote A2A agent {self.name}: {e}"
       ) from e
 
+  async def _populate_replica_pool(self) -> None:
+    """Add the primary client and one client per replica card to the pool."""
+    self._replica_pool.add(str(self._agent_card.url), self._a2a_client)
+    for replica_card in self._replica_agent_cards:
+      if isinstance(replica_card, str):
+        replica_card = await self._resolve_agent_card(replica_card.strip())
+      await self._validate_agent_card(replica_card)
+      self._replica_pool.add(
+          str(replica_card.url), self._a2a_client_factory.create(replica_card)
+      )
+
   def _create_a2a_request_for_user_function_response(
       self, ctx: InvocationContext
   ) -> Optional[A2AMessage]:
@@ -341,6 +437,11 @@ class CustomRemoteA2aAgent(BaseAgent):
   ) -> tuple[list[A2APart], Optional[str]]:
     """Construct A2A message parts from session events.
 
+    Only events appended since the previous call are converted; the
+    per-session cursor keeps the parts gathered since the last reply from
+    this agent. Under `AgentTool` each call has a new session, so this
+    only saves work when the agent is reused within one session.
+
     Args:
       ctx: The invocation context
 
@@ -349,38 +450,28 @@ class CustomRemoteA2aAgent(BaseAgent):
       request metadata
     """
     # print(f"[{self.name}] _construct_message_parts_from_session CALLED")
-    message_parts: list[A2APart] = []
-    context_id = None
-
-    events_to_process = []
-    for event in reversed(ctx.session.events):
-      if event.author == self.name:
-        # stop on content generated by current a2a agent given it should already
-        # be in remote session
-        if event.custom_metadata:
-          metadata = event.custom_metadata
-          context_id = metadata.get(A2A_METADATA_PREFIX + "context_id")
-        break
-      events_to_process.append(event)
-
-    for event in reversed(events_to_process):
-      if _is_other_agent_reply(self.name, event):
-        event = _present_other_agent_message(event)
-
-      if not event or not event.content or not event.content.parts:
-        continue
+    return self._session_cursors.collect(ctx.session)
 
-      for part in event.content.parts:
-        converted_parts = self._genai_part_converter(part)
-        if not isinstance(converted_parts, list):
-          converted_parts = [converted_parts] if converted_parts else []
+  def _convert_event_to_parts(self, event: Event) -> list[A2APart]:
+    """Convert a single session event to the A2A parts sent to the remote."""
+    if _is_other_agent_reply(self.name, event):
+      event = _present_other_agent_message(event)
 
-        if converted_parts:
-          message_parts.extend(converted_parts)
-        else:
-          logger.warning("Failed to convert part to A2A format: %s", part)
+    if not event or not event.content or not event.content.parts:
+      return []
+
+    message_parts: list[A2APart] = []
+    for part in event.content.parts:
+      converted_parts = self._genai_part_converter(part)
+      if not isinstance(converted_parts, list):
+        converted_parts = [converted_parts] if converted_parts else []
+
+      if converted_parts:
+        message_parts.extend(converted_parts)
+      else:
+        logger.warning("Failed to convert part to A2A format: %s", part)
 
-    return message_parts, context_id
+    return message_parts
 
   async def _handle_a2a_response(
       self, a2a_response: A2AClientEvent | A2AMessage, ctx: InvocationContext
@@ -437,7 +528,7 @@ class CustomRemoteA2aAgent(BaseAgent):
             not update.append or update.last_chunk
         ):
           # This is a streaming task artifact update.
-          # We only handle full artifact updates and ignore partial updates.
+          # Full artifact updates are converted from the aggregated task.
           # Note: Depends on the server implementation, there is no clear
           # definition of what a partial update is currently. We use the two
           # signals:
@@ -487,6 +578,72 @@ class CustomRemoteA2aAgent(BaseAgent):
           branch=ctx.branch,
       )
 
+  async def _send_a2a_request(
+      self,
+      a2a_request: A2AMessage,
+      request_metadata: Optional[dict[str, Any]],
+      ctx: InvocationContext,
+  ) -> AsyncGenerator[tuple[A2AClientEvent | A2AMessage, bool], None]:
+    """Send a request to the remote agent, through the cache if enabled.
+
+    Yields:
+      (response, replayed) pairs; replayed is True when the response was
+      served from the cache or shared from a concurrent identical request.
+    """
+
+    def send_to(client: A2AClient):
+      return client.send_message(
+          request=a2a_request,
+          request_metadata=request_metadata,
+          context=ClientCallContext(state=ctx.session.state),
+      )
+
+    def fetch():
+      if self._replica_pool is not None:
+        return self._replica_pool.send(send_to)
+      return send_to(self._a2a_client)
+
+    cache_key = None
+    if self._response_cache:
+      cache_key = self._response_cache.make_key(
+          self._agent_card, a2a_request, request_metadata
+      )
+    if cache_key is None:
+      async with contextlib.aclosing(fetch()) as responses:
+        async for a2a_response in responses:
+          yield a2a_response, False
+      return
+
+    # Close the cache stream even if we stop early, so coalesced waiters
+    # are released at once.
+    async with contextlib.aclosing(
+        self._response_cache.stream(cache_key, fetch)
+    ) as responses:
+      async for a2a_response, replayed in responses:
+        yield a2a_response, replayed
+
+  def _drop_remote_ids(self, event: Event) -> None:
+    """Remove task/context ids that belong to another caller's remote task.
+
+    Replayed responses must not tie this session to that remote context, so
+    the next request starts a fresh one.
+    """
+    if event.custom_metadata:
+      event.custom_metadata.pop(A2A_METADATA_PREFIX + "task_id", None)
+      event.custom_metadata.pop(A2A_METADATA_PREFIX + "context_id", None)
+
+  def replica_metrics(self) -> Optional[dict[str, Any]]:
+    """Per-replica load, health and latency, or None without a pool."""
+    if self._replica_pool is None:
+      return None
+    return self._replica_pool.metrics()
+
+  def response_cache_metrics(self) -> Optional[dict[str, Any]]:
+    """Hit-rate and coalescing metrics, or None if caching is disabled."""
+    if not self._response_cache:
+      return None
+    return self._response_cache.metrics()
+
   async def _run_async_impl(
       self, ctx: InvocationContext
   ) -> AsyncGenerator[Event, None]:
@@ -544,38 +701,33 @@ class CustomRemoteA2aAgent(BaseAgent):
         pass
 
     logger.debug(build_a2a_request_log(a2a_request))
+    self._metadata_capture.log_request(a2a_request)
 
     try:
       request_metadata = None
       if self._a2a_request_meta_provider:
         request_metadata = self._a2a_request_meta_provider(ctx, a2a_request)
 
-      async for a2a_response in self._a2a_client.send_message(
-          request=a2a_request,
-          request_metadata=request_metadata,
-          context=ClientCallContext(state=ctx.session.state),
+      async for a2a_response, replayed in self._send_a2a_request(
+          a2a_request, request_metadata, ctx
       ):
         logger.debug(build_a2a_response_log(a2a_response))
 
         event = await self._handle_a2a_response(a2a_response, ctx)
         if not event:
           continue
-
-        # Add metadata about the request and response
-        event.custom_metadata = event.custom_metadata or {}
-        event.custom_metadata[A2A_METADATA_PREFIX + "request"] = (
-            a2a_request.model_dump(exclude_none=True, by_alias=True)
+        if replayed:
+          self._drop_remote_ids(event)
+
+        # Add metadata about the request and response. If the response is a
+        # ClientEvent, describe the task state; otherwise, the message.
+        self._metadata_capture.annotate(
+            event,
+            a2a_request,
+            a2a_response[0]
+            if isinstance(a2a_response, tuple)
+            else a2a_response,
         )
-        # If the response is a ClientEvent, record the task state; otherwise,
-        # record the message object.
-        if isinstance(a2a_response, tuple):
-          event.custom_metadata[A2A_METADATA_PREFIX + "response"] = (
-              a2a_response[0].model_dump(exclude_none=True, by_alias=True)
-          )
-        else:
-          event.custom_metadata[A2A_METADATA_PREFIX + "response"] = (
-              a2a_response.model_dump(exclude_none=True, by_alias=True)
-          )
 
         yield event
 
@@ -588,10 +740,7 @@ class CustomRemoteA2aAgent(BaseAgent):
           invocation_id=ctx.invocation_id,
           branch=ctx.branch,
           custom_metadata={
-              A2A_METADATA_PREFIX
-              + "request": a2a_request.model_dump(
-                  exclude_none=True, by_alias=True
-              ),
+              **self._metadata_capture.request_metadata(a2a_request),
               A2A_METADATA_PREFIX + "error": error_message,
               A2A_METADATA_PREFIX + "status_code": str(e.status_code),
           },
@@ -607,93 +756,169 @@ class CustomRemoteA2aAgent(BaseAgent):
           invocation_id=ctx.invocation_id,
           branch=ctx.branch,
           custom_metadata={
-              A2A_METADATA_PREFIX
-              + "request": a2a_request.model_dump(
-                  exclude_none=True, by_alias=True
-              ),
+              **self._metadata_capture.request_metadata(a2a_request),
               A2A_METADATA_PREFIX + "error": error_message,
           },
       )
 
+  async def _run_live_turn(
+      self,
+      ctx: InvocationContext,
+      message_parts: list[A2APart],
+      context_id: Optional[str],
+  ) -> AsyncGenerator[Event, None]:
+    """Send one live turn to the remote agent and yield its events.
+
+    `message_parts` and `context_id` are taken from the session when the
+    turn arrives (see `_run_live_impl`).
+    """
+    a2a_request = self._create_a2a_request_for_user_function_response(ctx)
+
+    if not a2a_request:
+      if not message_parts:
+        logger.warning(
+            f"[{self.name}] NO PARTS extracted. Attempting fallback text"
+            " injection."
+        )
+        query_text = "Standard Query"
+        if hasattr(ctx, "arguments") and ctx.arguments:
+          query_text = str(ctx.arguments)
+        message_parts = [A2APart(text=query_text)]
+        context_id = None
+
+      a2a_request = A2AMessage(
+          message_id=str(uuid.uuid4()),
+          parts=message_parts,
+          role="user",
+          context_id=context_id,
+      )
+
+    async for a2a_response, replayed in self._send_a2a_request(
+        a2a_request, None, ctx
+    ):
+      event = await self._handle_a2a_response(a2a_response, ctx)
+      if not event:
+        continue
+      if replayed:
+        self._drop_remote_ids(event)
+      yield event
+
   async def _run_live_impl(self, input_stream, debug=False):
-        """
-        Custom implementation to handle live streaming and inspection of video parts.
-        """
-        try:
-            # print(f"[{self.name}] _run_live_impl CALLED")
-            logger.info(f"[{self.name}] _run_live_impl STARTED")
-            
-            # Ensure client is initialized
-            await self._ensure_resolved()
-
-            # Normalize input to async iterator
-            stream = input_stream
-            if not hasattr(input_stream, '__aiter__'):
-                async def _gen():
-                    yield input_stream
-                stream = _gen()
-
-            async for item in stream:
-                try:
-                    ctx = item
-                    # logger.info(f"[{self.name}] Processing Turn. Context ID: {ctx.invocation_id}")
-                    # Debug logging removed (Video/Image Parts)
-
-                    # 1. Create A2A Request
-                    a2a_request = self._create_a2a_request_for_user_function_response(ctx)
-                    
-                    if not a2a_request:
-                        message_parts, context_id = self._construct_message_parts_from_session(ctx)
-                        
-                        # logger.info(f"[{self.name}] Constructed A2A Parts: {len(message_parts)}")
-                        # Debug logging removed
-
-                        if not message_parts:
-                            logger.warning(f"[{self.name}] NO PARTS extracted. Attempting fallback text injection.")
-                            query_text = "Standard Query"
-                            if hasattr(ctx, "arguments") and ctx.arguments:
-                                query_text = str(ctx.arguments)
-                            from a2a.types import Part as A2APart
-                            message_parts = [A2APart(text=query_text)]
-                            context_id = None
-
-                        import uuid
-                        from a2a.types import Message as A2AMessage
-                        
-                        a2a_request = A2AMessage(
-                            message_id=str(uuid.uuid4()),
-                            parts=message_parts,
-                            role="user",
-                            context_id=context_id,
-                        )
-
-                    # 3. Send Request
-                    from a2a.client.middleware import ClientCallContext
-                    
-                    # 3. Send Request
-                    from a2a.client.middleware import ClientCallContext
-                    
-                    # logger.info(f"[{self.name}] SENDING REQUEST TO SUB-AGENT...")
-                    async for a2a_response in self._a2a_client.send_message(
-                        request=a2a_request,
-                        request_metadata=None,
-                        context=ClientCallContext(state=ctx.session.state),
-                    ):
-                        event = await self._handle_a2a_response(a2a_response, ctx)
-                        if event:
-                             # logger.info(f"[{self.name}] RECEIVED RESPONSE Event")
-                             yield event
-
-                except Exception as e:
-                    logger.error(f"[{self.name}] Turn Error: {e}")
-                    import traceback
-                    traceback.print_exc()
-
-        except Exception as e:
-            logger.critical(f"[{self.name}] CRITICAL ERROR in _run_live_impl: {e}")
-            import traceback
-            traceback.print_exc()
-            raise
+    """Handle live turns with bounded concurrency.
+
+    Each item of `input_stream` is the InvocationContext of one turn. Up to
+    `max_concurrent_live_turns` turns are in flight at once; the input stream
+    is not read further while the limit is reached. Events are yielded in
+    turn order per session: a turn's events are buffered until every earlier
+    turn of its session has finished. A newer turn for a session cancels the
+    previous one if that one has neither yielded anything nor received its
+    remote answer yet; the newer request then carries its parts.
+
+    A turn's parts are taken from the session cursor as it arrives, not when
+    its request is sent: by then a reply to an earlier turn may have been
+    appended after it, and only the arrival order says what is new.
+    """
+    logger.info(f"[{self.name}] _run_live_impl STARTED")
+    await self._ensure_resolved()
+
+    # Normalize input to async iterator
+    stream = input_stream
+    if not hasattr(input_stream, "__aiter__"):
+
+      async def _gen():
+        yield input_stream
+
+      stream = _gen()
+
+    output: asyncio.Queue = asyncio.Queue()
+    end_of_stream = object()
+    slots = asyncio.Semaphore(self._max_concurrent_live_turns)
+    latest_turns: dict[str, _LiveTurn] = {}
+    running: set[asyncio.Task] = set()
+
+    async def run_turn(
+        ctx: InvocationContext, turn: _LiveTurn, context_id: Optional[str]
+    ) -> None:
+      buffered: list[Event] = []
+
+      async def flush() -> None:
+        turn.emitting = True
+        while buffered:
+          await output.put(buffered.pop(0))
+
+      try:
+        async for event in self._run_live_turn(ctx, turn.parts, context_id):
+          buffered.append(event)
+          if turn.may_emit():
+            await flush()
+        turn.answered = True
+        if not turn.may_emit():
+          await asyncio.wait([turn.previous.released])
+        await flush()
+      except asyncio.CancelledError:
+        logger.info(f"[{self.name}] Superseded live turn cancelled.")
+        raise
+      except Exception as e:
+        logger.exception(f"[{self.name}] Turn Error: {e}")
+
+    def turn_finished(key: str, turn: _LiveTurn) -> None:
+      running.discard(turn.task)
+      slots.release()
+      turn.release()
+      turn.released.add_done_callback(lambda _: forget(key, turn))
+
+    def forget(key: str, turn: _LiveTurn) -> None:
+      if latest_turns.get(key) is turn:
+        del latest_turns[key]
+
+    async def produce() -> None:
+      try:
+        async for ctx in stream:
+          parts, context_id = self._session_cursors.take(ctx.session)
+          await slots.acquire()
+          key = ctx.session.id
+          previous = latest_turns.get(key)
+          if previous is not None and previous.released.done():
+            previous = None
+          if (
+              previous is not None
+              and self._cancel_superseded_live_turns
+              and not previous.emitting
+              and not previous.answered
+          ):
+            previous.task.cancel()
+            parts = previous.parts + parts
+          turn = _LiveTurn(
+              previous=previous,
+              released=asyncio.get_running_loop().create_future(),
+              parts=parts,
+          )
+          turn.task = asyncio.create_task(run_turn(ctx, turn, context_id))
+          turn.task.add_done_callback(
+              lambda _, key=key, turn=turn: turn_finished(key, turn)
+          )
+          running.add(turn.task)
+          latest_turns[key] = turn
+      finally:
+        if running:
+          await asyncio.wait(list(running))
+        await output.put(end_of_stream)
+
+    producer = asyncio.create_task(produce())
+    try:
+      while True:
+        event = await output.get()
+        if event is end_of_stream:
+          break
+        yield event
+      await producer
+    except Exception as e:
+      logger.critical(f"[{self.name}] CRITICAL ERROR in _run_live_impl: {e}")
+      raise
+    finally:
+      producer.cancel()
+      for task in list(running):
+        task.cancel()
 
   async def cleanup(self) -> None:
     """Clean up resources, especially the HTTP client if owned by this agent."""
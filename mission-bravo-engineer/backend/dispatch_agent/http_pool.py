@@ -0,0 +1,254 @@
+"""Process-wide HTTP connection pool shared by remote A2A agents.
+
+Every `CustomRemoteA2aAgent` used to open its own `httpx.AsyncClient` with
+default limits. This module keeps one configurable client per process (per
+`HttpPoolConfig`) and hands it to agents through the `a2a_client_factory`
+hook, so concurrent Bravo sessions reuse the same keep-alive connections.
+
+Configuration is read from the environment by default:
+
+  A2A_HTTP_MAX_CONNECTIONS            (default 100)
+  A2A_HTTP_MAX_KEEPALIVE_CONNECTIONS  (default 20)
+  A2A_HTTP_KEEPALIVE_EXPIRY           (seconds, default 30)
+  A2A_HTTP2                           ("true" to enable, needs `h2`)
+  A2A_HTTP_CONNECT_TIMEOUT            (seconds, default 5)
+  A2A_HTTP_READ_TIMEOUT               (seconds, default 600)
+  A2A_HTTP_WRITE_TIMEOUT              (seconds, default 30)
+  A2A_HTTP_POOL_TIMEOUT               (seconds, default 10)
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import logging
+import os
+import threading
+from typing import Any
+from typing import Optional
+
+from a2a.client.client import ClientConfig as A2AClientConfig
+from a2a.client.client_factory import ClientFactory as A2AClientFactory
+from a2a.types import TransportProtocol as A2ATransport
+import httpx
+
+try:
+  import h2  # noqa: F401
+
+  _HTTP2_AVAILABLE = True
+except ImportError:
+  _HTTP2_AVAILABLE = False
+
+__all__ = [
+    "HttpPoolConfig",
+    "aclose_shared_httpx_clients",
+    "create_shared_client_factory",
+    "get_pool_metrics",
+    "get_shared_httpx_client",
+]
+
+logger = logging.getLogger("google_adk." + __name__)
+
+
+def _env_float(name: str, default: float) -> float:
+  value = os.getenv(name)
+  return float(value) if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+  value = os.getenv(name)
+  return int(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+  value = os.getenv(name)
+  if not value:
+    return default
+  return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+@dataclasses.dataclass(frozen=True)
+class HttpPoolConfig:
+  """Limits and timeouts for a shared A2A HTTP client."""
+
+  max_connections: int = 100
+  max_keepalive_connections: int = 20
+  keepalive_expiry: float = 30.0
+  http2: bool = False
+  connect_timeout: float = 5.0
+  read_timeout: float = 600.0
+  write_timeout: float = 30.0
+  pool_timeout: float = 10.0
+
+  @classmethod
+  def from_env(cls) -> HttpPoolConfig:
+    """Builds a config from the A2A_HTTP_* environment variables."""
+    defaults = cls()
+    return cls(
+        max_connections=_env_int(
+            "A2A_HTTP_MAX_CONNECTIONS", defaults.max_connections
+        ),
+        max_keepalive_connections=_env_int(
+            "A2A_HTTP_MAX_KEEPALIVE_CONNECTIONS",
+            defaults.max_keepalive_connections,
+        ),
+        keepalive_expiry=_env_float(
+            "A2A_HTTP_KEEPALIVE_EXPIRY", defaults.keepalive_expiry
+        ),
+        http2=_env_bool("A2A_HTTP2", defaults.http2),
+        connect_timeout=_env_float(
+            "A2A_HTTP_CONNECT_TIMEOUT", defaults.connect_timeout
+        ),
+        read_timeout=_env_float("A2A_HTTP_READ_TIMEOUT", defaults.read_timeout),
+        write_timeout=_env_float(
+            "A2A_HTTP_WRITE_TIMEOUT", defaults.write_timeout
+        ),
+        pool_timeout=_env_float("A2A_HTTP_POOL_TIMEOUT", defaults.pool_timeout),
+    )
+
+  def to_limits(self) -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=self.max_connections,
+        max_keepalive_connections=self.max_keepalive_connections,
+        keepalive_expiry=self.keepalive_expiry,
+    )
+
+  def to_timeout(self) -> httpx.Timeout:
+    return httpx.Timeout(
+        connect=self.connect_timeout,
+        read=self.read_timeout,
+        write=self.write_timeout,
+        pool=self.pool_timeout,
+    )
+
+
+class _MeteredTransport(httpx.AsyncHTTPTransport):
+  """HTTP transport that counts requests which had to wait for the pool."""
+
+  def __init__(self, config: HttpPoolConfig, http2: bool) -> None:
+    super().__init__(http2=http2, limits=config.to_limits())
+    self._max_connections = config.max_connections
+    self.requests_total = 0
+    self.pool_waits = 0
+    self.pool_timeouts = 0
+    self.peak_in_use = 0
+
+  def _connection_counts(self) -> tuple[int, int]:
+    connections = getattr(self._pool, "connections", [])
+    idle = sum(1 for connection in connections if connection.is_idle())
+    return len(connections) - idle, idle
+
+  async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+    self.requests_total += 1
+    in_use, _ = self._connection_counts()
+    if in_use >= self._max_connections:
+      self.pool_waits += 1
+    try:
+      response = await super().handle_async_request(request)
+    except httpx.PoolTimeout:
+      self.pool_timeouts += 1
+      raise
+    in_use, _ = self._connection_counts()
+    self.peak_in_use = max(self.peak_in_use, in_use)
+    return response
+
+  def snapshot(self) -> dict[str, Any]:
+    in_use, idle = self._connection_counts()
+    queued = sum(
+        1
+        for pool_request in getattr(self._pool, "_requests", [])
+        if pool_request.is_queued()
+    )
+    return {
+        "max_connections": self._max_connections,
+        "in_use": in_use,
+        "idle": idle,
+        "queued": queued,
+        "peak_in_use": self.peak_in_use,
+        "requests_total": self.requests_total,
+        "pool_waits": self.pool_waits,
+        "pool_timeouts": self.pool_timeouts,
+    }
+
+
+_lock = threading.Lock()
+_clients: dict[HttpPoolConfig, tuple[httpx.AsyncClient, _MeteredTransport]] = {}
+
+
+def get_shared_httpx_client(
+    config: Optional[HttpPoolConfig] = None,
+) -> httpx.AsyncClient:
+  """Returns the process-wide client for `config`, creating it on first use.
+
+  Args:
+    config: Pool settings. Defaults to `HttpPoolConfig.from_env()`.
+
+  Returns:
+    An `httpx.AsyncClient` shared by every caller passing an equal config.
+    Callers must not close it; use `aclose_shared_httpx_clients` on shutdown.
+  """
+  config = config or HttpPoolConfig.from_env()
+  with _lock:
+    entry = _clients.get(config)
+    if entry is None or entry[0].is_closed:
+      http2 = config.http2
+      if http2 and not _HTTP2_AVAILABLE:
+        logger.warning(
+            "HTTP/2 requested but the 'h2' package is not installed; "
+            "falling back to HTTP/1.1."
+        )
+        http2 = False
+      transport = _MeteredTransport(config, http2=http2)
+      client = httpx.AsyncClient(
+          transport=transport, timeout=config.to_timeout()
+      )
+      entry = (client, transport)
+      _clients[config] = entry
+      logger.info("Created shared A2A HTTP client: %s", config)
+    return entry[0]
+
+
+def create_shared_client_factory(
+    config: Optional[HttpPoolConfig] = None,
+    *,
+    streaming: bool = True,
+) -> A2AClientFactory:
+  """Builds an A2A client factory backed by the shared HTTP client.
+
+  Pass the result as `a2a_client_factory` to `CustomRemoteA2aAgent`; agents
+  built this way share connections and never close the client themselves.
+  With `streaming`, SSE is used for agents whose card advertises it and
+  plain message/send for the rest.
+  """
+  client_config = A2AClientConfig(
+      httpx_client=get_shared_httpx_client(config),
+      streaming=streaming,
+      polling=False,
+      supported_transports=[A2ATransport.jsonrpc],
+  )
+  return A2AClientFactory(config=client_config)
+
+
+def get_pool_metrics() -> list[dict[str, Any]]:
+  """Returns a saturation snapshot for each shared client."""
+  with _lock:
+    entries = list(_clients.items())
+  metrics = []
+  for config, (client, transport) in entries:
+    if client.is_closed:
+      continue
+    snapshot = transport.snapshot()
+    snapshot["http2"] = config.http2 and _HTTP2_AVAILABLE
+    metrics.append(snapshot)
+  return metrics
+
+
+async def aclose_shared_httpx_clients() -> None:
+  """Closes every shared client. Call once at application shutdown."""
+  with _lock:
+    entries = list(_clients.values())
+    _clients.clear()
+  for client, _ in entries:
+    try:
+      await client.aclose()
+    except Exception as e:
+      logger.warning("Failed to close shared HTTP client: %s", e)
@@ -0,0 +1,146 @@
+"""Configurable capture of A2A request/response payloads for debugging.
+
+Events yielded by `CustomRemoteA2aAgent` used to carry full `model_dump()`
+copies of the A2A request and response in `custom_metadata`, which then
+lived in session history forever. The capture mode decides what is kept:
+
+  off      nothing beyond the task/context ids the agent needs.
+  summary  ids, part counts, sizes and task status (default).
+  full     the summary in the session, plus the full payloads written lazily
+           to the `google_adk.a2a_payloads` logger at DEBUG level. Attach a
+           handler to that logger to persist them; nothing is serialized
+           while it is disabled.
+
+The mode can be set per agent or process-wide via A2A_METADATA_CAPTURE.
+"""
+
+from __future__ import annotations
+
+import enum
+import logging
+import os
+from typing import Any
+from typing import Optional
+from typing import Union
+
+from a2a.types import Message as A2AMessage
+from a2a.types import Task as A2ATask
+from google.adk.events.event import Event
+
+__all__ = [
+    "A2aMetadataCapture",
+    "MetadataCaptureMode",
+    "PAYLOAD_LOGGER_NAME",
+]
+
+PAYLOAD_LOGGER_NAME = "google_adk.a2a_payloads"
+
+_payload_logger = logging.getLogger(PAYLOAD_LOGGER_NAME)
+
+
+class MetadataCaptureMode(str, enum.Enum):
+  OFF = "off"
+  SUMMARY = "summary"
+  FULL = "full"
+
+
+def _summarize_parts(parts: Optional[list[Any]]) -> dict[str, int]:
+  """Counts parts and the characters they carry without serializing them."""
+  parts = parts or []
+  size = 0
+  for part in parts:
+    root = getattr(part, "root", part)
+    text = getattr(root, "text", None)
+    if text:
+      size += len(text)
+      continue
+    file = getattr(root, "file", None)
+    file_bytes = getattr(file, "bytes", None)
+    if file_bytes:
+      size += len(file_bytes)
+  return {"part_count": len(parts), "size_chars": size}
+
+
+def summarize_request(request: A2AMessage) -> dict[str, Any]:
+  summary: dict[str, Any] = {"message_id": request.message_id}
+  if request.context_id:
+    summary["context_id"] = request.context_id
+  if request.task_id:
+    summary["task_id"] = request.task_id
+  summary.update(_summarize_parts(request.parts))
+  return summary
+
+
+def summarize_response(response: Union[A2ATask, A2AMessage]) -> dict[str, Any]:
+  if isinstance(response, A2AMessage):
+    summary = summarize_request(response)
+    summary["kind"] = "message"
+    return summary
+
+  summary = {"kind": "task", "task_id": response.id}
+  if response.context_id:
+    summary["context_id"] = response.context_id
+  if response.status and response.status.state:
+    summary["state"] = response.status.state.value
+  summary["artifact_count"] = len(response.artifacts or [])
+  summary["history_length"] = len(response.history or [])
+  parts = [
+      part for artifact in response.artifacts or [] for part in artifact.parts
+  ]
+  summary["size_chars"] = _summarize_parts(parts)["size_chars"]
+  return summary
+
+
+class A2aMetadataCapture:
+  """Attaches request/response debug metadata to events per capture mode."""
+
+  def __init__(
+      self,
+      mode: Union[MetadataCaptureMode, str, None] = None,
+      prefix: str = "a2a:",
+  ) -> None:
+    if mode is None:
+      mode = os.getenv("A2A_METADATA_CAPTURE", MetadataCaptureMode.SUMMARY)
+    self.mode = MetadataCaptureMode(mode)
+    self._prefix = prefix
+
+  def log_request(self, request: A2AMessage) -> None:
+    """Writes the full request to the side-channel log in full mode."""
+    if self.mode == MetadataCaptureMode.FULL:
+      self._log_payload("request", request.message_id, request)
+
+  def request_metadata(self, request: A2AMessage) -> dict[str, Any]:
+    """Returns the metadata describing `request` (used on error events)."""
+    if self.mode == MetadataCaptureMode.OFF:
+      return {}
+    return {self._prefix + "request": summarize_request(request)}
+
+  def annotate(
+      self,
+      event: Event,
+      request: A2AMessage,
+      response: Union[A2ATask, A2AMessage],
+  ) -> None:
+    """Adds request and response metadata to `event.custom_metadata`."""
+    if self.mode == MetadataCaptureMode.OFF:
+      return
+    event.custom_metadata = event.custom_metadata or {}
+    event.custom_metadata[self._prefix + "request"] = summarize_request(request)
+    event.custom_metadata[self._prefix + "response"] = summarize_response(
+        response
+    )
+    if self.mode == MetadataCaptureMode.FULL:
+      self._log_payload("response", request.message_id, response)
+      event.custom_metadata[self._prefix + "payload_ref"] = request.message_id
+
+  def _log_payload(
+      self, kind: str, message_id: str, payload: Union[A2ATask, A2AMessage]
+  ) -> None:
+    if not _payload_logger.isEnabledFor(logging.DEBUG):
+      return
+    _payload_logger.debug(
+        "%s %s %s",
+        kind,
+        message_id,
+        payload.model_dump_json(exclude_none=True, by_alias=True),
+    )
@@ -0,0 +1,379 @@
+"""Load balancing, hedging and circuit breaking across remote A2A replicas.
+
+`CustomRemoteA2aAgent` normally talks to a single agent card URL, so one slow
+replica stalls the user's live turn for up to the HTTP read timeout. A
+`ReplicaPool` holds one A2A client per equivalent agent card and:
+
+  - picks the healthy replica with the fewest outstanding requests;
+  - optionally hedges: if no response has arrived the pool's recent p95
+    time-to-first-response after the latest attempt started, another
+    replica is tried and whichever answers first wins (the loser is
+    cancelled);
+  - fails over to another replica when an attempt errors before producing
+    any response;
+  - ejects replicas after consecutive failures (circuit breaker), with an
+    exponentially growing ejection time;
+  - bounds each attempt with `attempt_timeout`, counted from that attempt's
+    start; an attempt that runs out before answering fails over like an
+    error.
+
+A "response" here is the first event that carries output or ends the task.
+Streaming servers acknowledge a request at once with submitted/working
+events, before any generation; those are held back with their attempt and
+neither pick the winner nor count towards the latency samples.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import dataclasses
+import logging
+import math
+import random
+import time
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Optional
+
+from a2a.client import Client as A2AClient
+from a2a.types import Role
+from a2a.types import TaskArtifactUpdateEvent
+from a2a.types import TaskState
+from a2a.types import TaskStatusUpdateEvent
+
+__all__ = ["ReplicaPool", "has_content"]
+
+logger = logging.getLogger("google_adk." + __name__)
+
+_LATENCY_WINDOW = 256
+
+_PENDING_STATES = (TaskState.submitted, TaskState.working)
+
+
+def _quantile(values: list[float], q: float) -> Optional[float]:
+  if not values:
+    return None
+  ordered = sorted(values)
+  index = min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))
+  return ordered[index]
+
+
+def has_content(response: Any) -> bool:
+  """Whether an A2A client response carries output or ends the task.
+
+  Acknowledgments (a submitted task, a working status without an agent
+  message) return False.
+  """
+  if not isinstance(response, tuple):
+    # A Message is a complete answer.
+    return True
+  task, update = response
+  if isinstance(update, TaskArtifactUpdateEvent):
+    return True
+  if isinstance(update, TaskStatusUpdateEvent):
+    status = update.status
+  else:
+    if task.artifacts:
+      return True
+    status = task.status
+  if status is None:
+    return False
+  if status.state not in _PENDING_STATES:
+    return True
+  message = status.message
+  return bool(message and message.role == Role.agent and message.parts)
+
+
+@dataclasses.dataclass(eq=False)
+class _Replica:
+  label: str
+  client: A2AClient
+  outstanding: int = 0
+  requests: int = 0
+  failures: int = 0
+  hedges_won: int = 0
+  consecutive_failures: int = 0
+  ejections: int = 0
+  ejected_until: float = 0.0
+  first_response_latencies: collections.deque = dataclasses.field(
+      default_factory=lambda: collections.deque(maxlen=_LATENCY_WINDOW)
+  )
+  total_latencies: collections.deque = dataclasses.field(
+      default_factory=lambda: collections.deque(maxlen=_LATENCY_WINDOW)
+  )
+
+
+class ReplicaPool:
+  """Spreads A2A requests over equivalent remote agent replicas."""
+
+  def __init__(
+      self,
+      *,
+      hedge: bool = False,
+      hedge_quantile: float = 0.95,
+      hedge_min_delay: float = 0.05,
+      hedge_initial_delay: float = 2.0,
+      max_attempts: int = 2,
+      attempt_timeout: Optional[float] = None,
+      failure_threshold: int = 3,
+      base_ejection_seconds: float = 10.0,
+      max_ejection_seconds: float = 120.0,
+      is_response: Callable[[Any], bool] = has_content,
+      clock: Callable[[], float] = time.monotonic,
+  ) -> None:
+    """Initialize the pool.
+
+    Args:
+      hedge: Whether to send a hedged request to a second replica.
+      hedge_quantile: Quantile of recent time-to-first-response used as the
+        hedge delay.
+      hedge_min_delay: Lower bound for the hedge delay, in seconds.
+      hedge_initial_delay: Hedge delay used until latencies are recorded.
+      max_attempts: Maximum replicas tried per request (hedges and
+        failovers included).
+      attempt_timeout: Upper bound in seconds for a single attempt; None
+        leaves it to the HTTP client timeouts.
+      failure_threshold: Consecutive failures before a replica is ejected.
+      base_ejection_seconds: First ejection time; doubles on each ejection.
+      max_ejection_seconds: Cap for the ejection time.
+      is_response: Whether a streamed item counts as the replica's answer
+        (picks the winner, sampled for the hedge delay). Earlier items are
+        buffered and yielded once their attempt wins.
+      clock: Monotonic clock, replaceable for tests.
+    """
+    self._replicas: list[_Replica] = []
+    self._hedge = hedge
+    self._hedge_quantile = hedge_quantile
+    self._hedge_min_delay = hedge_min_delay
+    self._hedge_initial_delay = hedge_initial_delay
+    self._max_attempts = max(1, max_attempts)
+    self._attempt_timeout = attempt_timeout
+    self._failure_threshold = failure_threshold
+    self._base_ejection_seconds = base_ejection_seconds
+    self._max_ejection_seconds = max_ejection_seconds
+    self._is_response = is_response
+    self._clock = clock
+    self.hedges_sent = 0
+    self.failovers = 0
+    self.timeouts = 0
+
+  def __len__(self) -> int:
+    return len(self._replicas)
+
+  def add(self, label: str, client: A2AClient) -> None:
+    self._replicas.append(_Replica(label=label, client=client))
+
+  def _pick(self, exclude: set[_Replica]) -> Optional[_Replica]:
+    candidates = [r for r in self._replicas if r not in exclude]
+    if not candidates:
+      return None
+    now = self._clock()
+    healthy = [r for r in candidates if r.ejected_until <= now]
+    if not healthy:
+      # Every candidate is ejected: try the one that recovers first rather
+      # than failing outright.
+      return min(candidates, key=lambda r: r.ejected_until)
+    fewest = min(r.outstanding for r in healthy)
+    return random.choice([r for r in healthy if r.outstanding == fewest])
+
+  def _hedge_delay(self) -> float:
+    latencies = [
+        latency
+        for replica in self._replicas
+        for latency in replica.first_response_latencies
+    ]
+    delay = _quantile(latencies, self._hedge_quantile)
+    if delay is None:
+      delay = self._hedge_initial_delay
+    return max(self._hedge_min_delay, delay)
+
+  def _record_failure(self, replica: _Replica) -> None:
+    replica.failures += 1
+    replica.consecutive_failures += 1
+    if replica.consecutive_failures >= self._failure_threshold:
+      ejection = min(
+          self._base_ejection_seconds * (2**replica.ejections),
+          self._max_ejection_seconds,
+      )
+      replica.ejected_until = self._clock() + ejection
+      replica.ejections += 1
+      replica.consecutive_failures = 0
+      logger.warning(
+          "Ejecting A2A replica %s for %.1fs", replica.label, ejection
+      )
+
+  def _record_success(self, replica: _Replica, started: float) -> None:
+    replica.consecutive_failures = 0
+    replica.total_latencies.append(self._clock() - started)
+
+  async def send(
+      self, fetch: Callable[[A2AClient], AsyncIterator[Any]]
+  ) -> AsyncIterator[Any]:
+    """Yields the responses of `fetch` from the winning replica.
+
+    Args:
+      fetch: Called with a replica's client; returns the response stream,
+        e.g. `lambda client: client.send_message(...)`.
+    """
+    if not self._replicas:
+      raise RuntimeError("ReplicaPool has no replicas")
+
+    queue: asyncio.Queue = asyncio.Queue()
+    attempts: dict[int, tuple[_Replica, asyncio.Task, float]] = {}
+    tried: set[_Replica] = set()
+    # Acknowledgments of attempts that have not answered yet.
+    held: dict[int, list[Any]] = collections.defaultdict(list)
+
+    async def pump(attempt_id: int, replica: _Replica) -> None:
+      try:
+        async for item in fetch(replica.client):
+          await queue.put((attempt_id, "item", item))
+        await queue.put((attempt_id, "done", None))
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        await queue.put((attempt_id, "error", e))
+
+    def launch() -> bool:
+      nonlocal hedge_at
+      if len(attempts) >= self._max_attempts:
+        return False
+      replica = self._pick(tried)
+      if replica is None:
+        return False
+      tried.add(replica)
+      replica.outstanding += 1
+      replica.requests += 1
+      attempt_id = len(attempts)
+      task = asyncio.create_task(pump(attempt_id, replica))
+      # A done callback also runs for tasks cancelled before they start.
+      task.add_done_callback(lambda _: _release(replica))
+      started = self._clock()
+      attempts[attempt_id] = (replica, task, started)
+      live.add(attempt_id)
+      if self._attempt_timeout is not None:
+        deadlines[attempt_id] = started + self._attempt_timeout
+      if self._hedge:
+        hedge_at = started + self._hedge_delay()
+      return True
+
+    def _release(replica: _Replica) -> None:
+      replica.outstanding -= 1
+
+    def cancel_others(keep: Optional[int]) -> None:
+      for attempt_id, (_, task, _) in attempts.items():
+        if attempt_id != keep and not task.done():
+          task.cancel()
+
+    def fail_over() -> None:
+      if launch():
+        self.failovers += 1
+      elif not live:
+        raise last_error
+
+    # Attempts that have neither failed nor timed out, their deadlines, and
+    # when the next hedge is due; all measured from each attempt's start.
+    live: set[int] = set()
+    deadlines: dict[int, float] = {}
+    hedge_at: Optional[float] = None
+    winner: Optional[int] = None
+    last_error: Optional[BaseException] = None
+    launch()
+    try:
+      while True:
+        now = self._clock()
+        waiting = [deadlines[a] for a in live if a in deadlines]
+        if winner is None and hedge_at is not None:
+          waiting.append(hedge_at)
+        timeout = max(0.0, min(waiting) - now) if waiting else None
+
+        try:
+          attempt_id, kind, payload = await asyncio.wait_for(
+              queue.get(), timeout
+          )
+        except asyncio.TimeoutError:
+          now = self._clock()
+          for attempt_id in sorted(live):
+            if deadlines.get(attempt_id, math.inf) > now:
+              continue
+            replica, task, _ = attempts[attempt_id]
+            task.cancel()
+            live.discard(attempt_id)
+            held.pop(attempt_id, None)
+            self.timeouts += 1
+            self._record_failure(replica)
+            last_error = TimeoutError(
+                f"A2A request to {replica.label} timed out after"
+                f" {self._attempt_timeout}s"
+            )
+            if attempt_id == winner:
+              raise last_error
+            fail_over()
+          if winner is None and hedge_at is not None and hedge_at <= now:
+            hedge_at = None
+            if launch():
+              self.hedges_sent += 1
+          continue
+
+        if attempt_id not in live:
+          # A timed-out or losing attempt.
+          continue
+        replica, _, started = attempts[attempt_id]
+
+        if kind == "error":
+          self._record_failure(replica)
+          live.discard(attempt_id)
+          held.pop(attempt_id, None)
+          last_error = payload
+          if winner is not None:
+            raise payload
+          fail_over()
+          continue
+
+        if winner is None:
+          if kind == "item" and not self._is_response(payload):
+            held[attempt_id].append(payload)
+            continue
+          winner = attempt_id
+          replica.first_response_latencies.append(self._clock() - started)
+          if attempt_id != 0:
+            replica.hedges_won += 1
+          cancel_others(winner)
+          live.intersection_update({winner})
+          for item in held.pop(attempt_id, []):
+            yield item
+          held.clear()
+
+        if kind == "done":
+          self._record_success(replica, started)
+          return
+        yield payload
+    finally:
+      cancel_others(None)
+
+  def metrics(self) -> dict[str, Any]:
+    now = self._clock()
+    replicas = []
+    for replica in self._replicas:
+      totals = list(replica.total_latencies)
+      replicas.append({
+          "replica": replica.label,
+          "outstanding": replica.outstanding,
+          "requests": replica.requests,
+          "failures": replica.failures,
+          "hedges_won": replica.hedges_won,
+          "ejected": replica.ejected_until > now,
+          "ejections": replica.ejections,
+          "latency_p50": _quantile(totals, 0.5),
+          "latency_p95": _quantile(totals, 0.95),
+          "latency_p99": _quantile(totals, 0.99),
+      })
+    return {
+        "hedge_delay": self._hedge_delay() if self._hedge else None,
+        "hedges_sent": self.hedges_sent,
+        "failovers": self.failovers,
+        "timeouts": self.timeouts,
+        "replicas": replicas,
+    }
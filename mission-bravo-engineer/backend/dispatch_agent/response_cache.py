@@ -0,0 +1,201 @@
+"""Response cache and request coalescing for idempotent remote A2A agents.
+
+Many stations ask the Architect the same question within seconds. For agents
+that opt in, identical requests are answered from an LRU/TTL cache, and
+concurrent identical requests share a single in-flight call (single-flight):
+the first caller streams the remote responses as usual while the others wait
+for it to finish and replay the recorded responses. Waiters give up after
+`coalesce_timeout` and fetch on their own, so a leader that stalls or is
+abandoned without being closed cannot hang them.
+
+Only use this for remote agents whose answers depend solely on the request
+parts (e.g. lookups); the cache key ignores the A2A context id.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+import time
+from typing import Any
+from typing import AsyncIterator
+from typing import Callable
+from typing import Optional
+
+from a2a.client import ClientEvent as A2AClientEvent
+from a2a.types import AgentCard
+from a2a.types import Message as A2AMessage
+from a2a.types import TaskState
+
+__all__ = ["A2aResponseCache"]
+
+logger = logging.getLogger("google_adk." + __name__)
+
+A2AResponse = A2AClientEvent | A2AMessage
+
+
+def _normalize_part(part: Any) -> Any:
+  data = getattr(part, "root", part).model_dump(mode="json", exclude_none=True)
+  data.pop("metadata", None)
+  if isinstance(data.get("text"), str):
+    data["text"] = " ".join(data["text"].split())
+  return data
+
+
+def _snapshot(response: A2AResponse) -> A2AResponse:
+  """Copies the task of a ClientEvent; the client mutates it as updates land."""
+  if isinstance(response, tuple):
+    task, update = response
+    return task.model_copy(deep=True), update
+  return response
+
+
+def _is_successful(responses: list[A2AResponse]) -> bool:
+  if not responses:
+    return False
+  last = responses[-1]
+  if isinstance(last, tuple):
+    task = last[0]
+    return bool(
+        task.status and task.status.state == TaskState.completed
+    )
+  return True
+
+
+class A2aResponseCache:
+  """LRU/TTL cache of remote responses with single-flight coalescing."""
+
+  def __init__(
+      self,
+      *,
+      max_entries: int = 256,
+      ttl_seconds: float = 60.0,
+      coalesce_timeout: float = 30.0,
+      clock: Callable[[], float] = time.monotonic,
+  ) -> None:
+    self._max_entries = max_entries
+    self._ttl_seconds = ttl_seconds
+    self._coalesce_timeout = coalesce_timeout
+    self._clock = clock
+    self._entries: collections.OrderedDict[
+        str, tuple[float, list[A2AResponse]]
+    ] = collections.OrderedDict()
+    self._inflight: dict[str, asyncio.Future] = {}
+    self.hits = 0
+    self.misses = 0
+    self.coalesced = 0
+    self.evictions = 0
+    self.coalesce_timeouts = 0
+
+  @staticmethod
+  def make_key(
+      agent_card: AgentCard,
+      request: A2AMessage,
+      request_metadata: Optional[dict[str, Any]] = None,
+  ) -> Optional[str]:
+    """Returns the cache key for `request`, or None if it is not cacheable.
+
+    Requests continuing an existing task (e.g. function responses) are never
+    cached.
+    """
+    if request.task_id:
+      return None
+    payload = {
+        "card": [agent_card.name, str(agent_card.url), agent_card.version],
+        "parts": [_normalize_part(part) for part in request.parts],
+        "metadata": request_metadata or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+  def _lookup(self, key: str) -> Optional[list[A2AResponse]]:
+    entry = self._entries.get(key)
+    if entry is None:
+      return None
+    stored_at, responses = entry
+    if self._clock() - stored_at > self._ttl_seconds:
+      del self._entries[key]
+      return None
+    self._entries.move_to_end(key)
+    return responses
+
+  def _store(self, key: str, responses: list[A2AResponse]) -> None:
+    self._entries[key] = (self._clock(), responses)
+    self._entries.move_to_end(key)
+    while len(self._entries) > self._max_entries:
+      self._entries.popitem(last=False)
+      self.evictions += 1
+
+  async def stream(
+      self,
+      key: str,
+      fetch: Callable[[], AsyncIterator[A2AResponse]],
+  ) -> AsyncIterator[tuple[A2AResponse, bool]]:
+    """Yields `(response, replayed)` for `key`, calling `fetch` at most once.
+
+    `replayed` is True when the response came from the cache or from another
+    caller's in-flight request rather than from this caller's own fetch.
+    """
+    responses = self._lookup(key)
+    if responses is not None:
+      self.hits += 1
+      for response in responses:
+        yield response, True
+      return
+
+    inflight = self._inflight.get(key)
+    if inflight is not None:
+      try:
+        responses = await asyncio.wait_for(
+            asyncio.shield(inflight), self._coalesce_timeout
+        )
+      except asyncio.TimeoutError:
+        self.coalesce_timeouts += 1
+        logger.warning(
+            "Gave up waiting %.1fs for an in-flight request; fetching.",
+            self._coalesce_timeout,
+        )
+        responses = None
+      if responses is not None:
+        self.coalesced += 1
+        for response in responses:
+          yield response, True
+        return
+      # The leader failed; fall through and fetch on our own.
+
+    self.misses += 1
+    future = asyncio.get_running_loop().create_future()
+    self._inflight[key] = future
+    recorded: list[A2AResponse] = []
+    complete = False
+    try:
+      async for response in fetch():
+        recorded.append(_snapshot(response))
+        yield response, False
+      complete = _is_successful(recorded)
+    finally:
+      # Also runs on GeneratorExit, when the caller stops early and closes
+      # us. Only complete, successful calls are shared or cached; otherwise
+      # waiting callers retry on their own.
+      if self._inflight.get(key) is future:
+        del self._inflight[key]
+      if not future.done():
+        future.set_result(recorded if complete else None)
+      if complete:
+        self._store(key, recorded)
+
+  def metrics(self) -> dict[str, Any]:
+    lookups = self.hits + self.misses + self.coalesced
+    return {
+        "entries": len(self._entries),
+        "inflight": len(self._inflight),
+        "hits": self.hits,
+        "misses": self.misses,
+        "coalesced": self.coalesced,
+        "evictions": self.evictions,
+        "coalesce_timeouts": self.coalesce_timeouts,
+        "hit_rate": (self.hits + self.coalesced) / lookups if lookups else 0.0,
+    }
@@ -0,0 +1,127 @@
+"""Incremental per-session index of events pending for a remote A2A agent.
+
+`CustomRemoteA2aAgent` sends the remote agent every session event recorded
+since its own last reply. Re-walking `session.events` on every call makes
+each turn cost O(history); the cursor here remembers how far it has scanned
+and which parts are still pending, so each call only converts new events.
+
+Cursors are keyed by session id, so they only pay off when the agent runs
+repeatedly inside one session: as a sub-agent (`collect`) or for live turns
+(`take`); tests/test_session_cursor.py covers both.
+The dispatch agent calls the Architect through `AgentTool`, which creates a
+fresh single-event session per call; there every call starts a new cursor
+and the cost is the same as a full scan of that one event.
+"""
+
+from __future__ import annotations
+
+import collections
+import dataclasses
+from typing import Any
+from typing import Callable
+from typing import Optional
+
+from a2a.types import Part as A2APart
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+
+__all__ = ["SessionCursorIndex"]
+
+DEFAULT_MAX_SESSIONS = 1024
+
+
+@dataclasses.dataclass
+class _SessionCursor:
+  """Scan position and pending parts for a single session."""
+
+  scanned: int = 0
+  last_event_id: Optional[str] = None
+  context_id: Optional[str] = None
+  pending_parts: list[A2APart] = dataclasses.field(default_factory=list)
+
+
+class SessionCursorIndex:
+  """Tracks, per session, the parts accumulated since the last handoff.
+
+  A handoff boundary is any event authored by the owning agent. The cursor
+  is keyed by session id and validated against the id of the last scanned
+  event; if history was rewritten (e.g. compacted or rewound), the session is
+  rescanned from the start.
+  """
+
+  def __init__(
+      self,
+      agent_name: str,
+      convert_event: Callable[[Event], list[A2APart]],
+      context_id_key: str,
+      max_sessions: int = DEFAULT_MAX_SESSIONS,
+  ) -> None:
+    self._agent_name = agent_name
+    self._convert_event = convert_event
+    self._context_id_key = context_id_key
+    self._max_sessions = max_sessions
+    self._cursors: collections.OrderedDict[str, _SessionCursor] = (
+        collections.OrderedDict()
+    )
+
+  def _get_cursor(self, session: Session) -> _SessionCursor:
+    cursor = self._cursors.get(session.id)
+    if cursor is None:
+      cursor = _SessionCursor()
+      self._cursors[session.id] = cursor
+      if len(self._cursors) > self._max_sessions:
+        self._cursors.popitem(last=False)
+    else:
+      self._cursors.move_to_end(session.id)
+
+    events = session.events
+    if cursor.scanned and (
+        cursor.scanned > len(events)
+        or events[cursor.scanned - 1].id != cursor.last_event_id
+    ):
+      # History no longer matches what we scanned; start over.
+      cursor = _SessionCursor()
+      self._cursors[session.id] = cursor
+    return cursor
+
+  def collect(self, session: Session) -> tuple[list[A2APart], Optional[str]]:
+    """Returns parts pending since the last handoff and its context id.
+
+    Only events appended since the previous call are converted.
+    """
+    return self._scan(session, take=False)
+
+  def take(self, session: Session) -> tuple[list[A2APart], Optional[str]]:
+    """Returns the parts of events new since the last call, and hands them off.
+
+    For callers that send a request per turn without waiting for the
+    previous reply (live turns). A reply can then land after a newer event,
+    so replies only update the context id; the handoff is the call itself.
+    """
+    return self._scan(session, take=True)
+
+  def _scan(
+      self, session: Session, take: bool
+  ) -> tuple[list[A2APart], Optional[str]]:
+    cursor = self._get_cursor(session)
+    events = session.events
+    for event in events[cursor.scanned :]:
+      if event.author == self._agent_name:
+        # Content generated by this agent is already in the remote session.
+        metadata: dict[str, Any] = event.custom_metadata or {}
+        cursor.context_id = metadata.get(self._context_id_key)
+        if not take:
+          cursor.pending_parts.clear()
+        continue
+      cursor.pending_parts.extend(self._convert_event(event))
+
+    cursor.scanned = len(events)
+    cursor.last_event_id = events[-1].id if events else None
+    parts = list(cursor.pending_parts)
+    if take:
+      cursor.pending_parts.clear()
+    return parts, cursor.context_id
+
+  def discard(self, session_id: str) -> None:
+    """Forgets the cursor for `session_id`."""
+    self._cursors.pop(session_id, None)
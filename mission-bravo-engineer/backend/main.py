@@ -5,13 +5,12 @@ import warnings
 from pathlib import Path
 
 from dotenv import load_dotenv
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from google.adk.agents.live_request_queue import LiveRequestQueue
 from google.adk.agents.run_config import RunConfig, StreamingMode
 from google.adk.runners import Runner
-from google.adk.sessions import InMemorySessionService
 from google.genai import types
 
 # Load environment variables from .env file BEFORE importing agent
@@ -26,7 +25,10 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
-from dispatch_agent.agent import agent
+from dispatch_agent.agent import agent, architect_agent
+from dispatch_agent.http_pool import aclose_shared_httpx_clients, get_pool_metrics
+from session_compaction import CompactingSessionService, CompactionConfig
+from token_budget import ContextBudgetConfig
 
 # Suppress noisy loggers
 logging.getLogger("websockets").setLevel(logging.WARNING)
@@ -57,13 +59,61 @@ app.add_middleware(
 )
 
 
+# Live context-window limits (sliding-window compression on the Live API)
+# and the per-session soft budget
+context_budget = ContextBudgetConfig.from_env()
+
 # Define your session service
-session_service = InMemorySessionService()
+# (histories are compacted in the background so hours-long kiosk sessions
+# keep a bounded memory footprint, and early once a session's history
+# exceeds the soft budget; see session_compaction.py)
+session_service = CompactingSessionService(
+    CompactionConfig.from_env(),
+    soft_budget_tokens=context_budget.soft_budget_tokens,
+)
 
 # Initialize Runner
 # (Session service handles history/state per user/session)
 runner = Runner(app_name=APP_NAME, agent=agent, session_service=session_service)
 
+
+@app.get("/metrics/http_pool")
+async def http_pool_metrics() -> dict:
+    """Connection pool saturation for the shared A2A HTTP client(s)."""
+    return {"pools": get_pool_metrics()}
+
+
+@app.get("/metrics/a2a_cache")
+async def a2a_cache_metrics() -> dict:
+    """Hit-rate and coalescing metrics for remote agents that cache."""
+    return {architect_agent.name: architect_agent.response_cache_metrics()}
+
+
+@app.get("/metrics/a2a_replicas")
+async def a2a_replica_metrics() -> dict:
+    """Load, health and tail latency of each Architect replica."""
+    return {architect_agent.name: architect_agent.replica_metrics()}
+
+
+@app.get("/sessions/{user_id}/{session_id}/context")
+async def session_context_usage(user_id: str, session_id: str) -> dict:
+    """Estimated history size of a live session against its soft budget."""
+    usage = session_service.context_usage(APP_NAME, user_id, session_id)
+    if usage is None:
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return usage
+
+
+@app.on_event("startup")
+async def start_session_compaction() -> None:
+    session_service.start()
+
+
+@app.on_event("shutdown")
+async def release_resources() -> None:
+    await session_service.stop()
+    await aclose_shared_httpx_clients()
+
 # ========================================
 # WebSocket Endpoint
 # ========================================
@@ -118,6 +168,7 @@ async def websocket_endpoint(
                 types.ProactivityConfig(proactive_audio=True) if proactivity else None
             ),
             enable_affective_dialog=affective_dialog if affective_dialog else None,
+            context_window_compression=context_budget.context_window_compression(),
         )
 
     else:
@@ -130,6 +181,7 @@ async def websocket_endpoint(
             input_audio_transcription=None,
             output_audio_transcription=None,
             session_resumption=types.SessionResumptionConfig(),
+            context_window_compression=context_budget.context_window_compression(),
         )
 
     # Get or create session (handles both new sessions and reconnections)
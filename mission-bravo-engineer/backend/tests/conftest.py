@@ -0,0 +1,15 @@
+"""Test setup for the dispatch backend. Run pytest from mission-bravo-engineer/backend."""
+
+import os
+import sys
+import types
+
+# Load dispatch_agent submodules without running the package __init__, which
+# builds the live dispatch agent and everything it imports. The benchmarks
+# import this module for the same setup.
+if "dispatch_agent" not in sys.modules:
+  _package = types.ModuleType("dispatch_agent")
+  _package.__path__ = [
+      os.path.join(os.path.dirname(os.path.dirname(__file__)), "dispatch_agent")
+  ]
+  sys.modules["dispatch_agent"] = _package
@@ -0,0 +1,185 @@
+"""Tests for pipelined live turns in CustomRemoteA2aAgent.
+
+Turns go through the agent's real request path to a fake A2A client. Each
+turn is a user event naming it; the fake answers a request after the
+latency scripted for the last name in it, then streams that turn's events
+`spacing` seconds apart. Yielded events are appended to their session, as
+the runner does.
+"""
+
+import asyncio
+import types
+
+from a2a.types import AgentCapabilities
+from a2a.types import AgentCard
+from a2a.types import Message
+from a2a.types import Part
+from a2a.types import Role
+from a2a.types import TextPart
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+from google.genai import types as genai_types
+
+from dispatch_agent.custom_remote_a2a_agent import CustomRemoteA2aAgent
+
+CARD = AgentCard(
+    name="architect",
+    description="stub",
+    url="http://localhost:8081",
+    version="1.0.0",
+    capabilities=AgentCapabilities(),
+    default_input_modes=["text/plain"],
+    default_output_modes=["text/plain"],
+    skills=[],
+)
+
+
+class _FakeClient:
+  """Stands in for the A2A client, counting the requests in flight."""
+
+  def __init__(self, script):
+    # name -> (latency, events, spacing)
+    self.script = script
+    self.requests = []
+    self.in_flight = 0
+    self.peak_in_flight = 0
+    self.cancelled = []
+
+  async def send_message(self, request, *, request_metadata=None, context=None):
+    texts = [part.root.text for part in request.parts]
+    self.requests.append(texts)
+    name = texts[-1]
+    latency, events, spacing = self.script[name]
+    self.in_flight += 1
+    self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+    try:
+      await asyncio.sleep(latency)
+      for i in range(events):
+        if i:
+          await asyncio.sleep(spacing)
+        yield Message(
+            message_id=f"{name}-{i}",
+            role=Role.agent,
+            parts=[Part(root=TextPart(text=f"{name}:{i}"))],
+        )
+    except (asyncio.CancelledError, GeneratorExit):
+      self.cancelled.append(name)
+      raise
+    finally:
+      self.in_flight -= 1
+
+
+def _user_event(name):
+  return Event(
+      author="user",
+      invocation_id=name,
+      content=genai_types.Content(
+          role="user", parts=[genai_types.Part.from_text(text=name)]
+      ),
+  )
+
+
+def _run(turns, **kwargs):
+  """Runs `(delay, session, name, latency, events, spacing)` turns.
+
+  Returns the fake client and the yielded `(session, name)` pairs.
+  """
+  client = _FakeClient({t[2]: t[3:] for t in turns})
+  agent = CustomRemoteA2aAgent(name="architect", agent_card=CARD, **kwargs)
+  agent._a2a_client = client
+  agent._is_resolved = True
+  sessions = {}
+
+  async def feed():
+    for delay, session_id, name, *_ in turns:
+      await asyncio.sleep(delay)
+      session = sessions.setdefault(
+          session_id, Session(id=session_id, app_name="app", user_id="u")
+      )
+      session.events.append(_user_event(name))
+      yield types.SimpleNamespace(
+          session=session, invocation_id=name, branch=None
+      )
+
+  async def collect():
+    out = []
+    async for event in agent._run_live_impl(feed()):
+      name = event.content.parts[0].text.split(":")[0]
+      session = next(s for s in sessions.values() if any(
+          e.invocation_id == name and e.author == "user" for e in s.events
+      ))
+      session.events.append(event)
+      out.append((session.id, name))
+    return out
+
+  return client, asyncio.run(collect())
+
+
+def _turn(name, session="s", delay=0.0, latency=0.1, events=3, spacing=0.0):
+  return (delay, session, name, latency, events, spacing)
+
+
+def _names(events):
+  return [name for _, name in events]
+
+
+def test_superseded_turn_does_not_let_newer_turn_overtake_older_one():
+  # A streams its answer slowly. B is still waiting for its remote answer
+  # when C arrives, so C cancels B and must wait for all of A.
+  client, events = _run([
+      _turn("A", latency=0.05, events=4, spacing=0.1),
+      _turn("B", delay=0.1, latency=1.0),
+      _turn("C", delay=0.05, latency=0.01),
+  ])
+  assert _names(events) == ["A"] * 4 + ["C"] * 3
+  assert client.cancelled == ["B"]
+  # C's request carries the text of the turn it cancelled.
+  assert client.requests == [["A"], ["B"], ["B", "C"]]
+
+
+def test_answered_turn_is_not_cancelled_by_newer_turn():
+  # B's remote call has returned (its events are buffered behind A) when C
+  # arrives, so B is kept and everything comes out as A, B, C.
+  client, events = _run([
+      _turn("A", latency=0.05, events=4, spacing=0.1),
+      _turn("B", delay=0.1, latency=0.01),
+      _turn("C", delay=0.05, latency=0.01),
+  ])
+  assert _names(events) == ["A"] * 4 + ["B"] * 3 + ["C"] * 3
+  assert not client.cancelled
+  # A's replies land in the session after B and C arrived; each request
+  # still carries exactly its own turn.
+  assert client.requests == [["A"], ["B"], ["C"]]
+
+
+def test_turn_order_is_kept_per_session_when_cancelling_is_off():
+  client, events = _run(
+      [
+          _turn("A", latency=0.3),
+          _turn("B", latency=0.1),
+          _turn("C", latency=0.0),
+      ],
+      cancel_superseded_live_turns=False,
+  )
+  assert _names(events) == ["A"] * 3 + ["B"] * 3 + ["C"] * 3
+  assert client.peak_in_flight == 3
+
+
+def test_turns_in_flight_are_bounded_by_the_concurrency_limit():
+  # 16 turns over 8 sessions, all arriving before any is answered.
+  turns = [
+      _turn(f"t{i}", session=f"s{i % 8}", latency=0.05, events=1)
+      for i in range(16)
+  ]
+  for concurrency in (1, 4, 16):
+    client, events = _run(
+        turns,
+        max_concurrent_live_turns=concurrency,
+        cancel_superseded_live_turns=False,
+    )
+    assert client.peak_in_flight == concurrency
+    assert client.in_flight == 0
+    assert len(client.requests) == len(events) == 16
+    for session in {s for s, _ in events}:
+      names = [name for s, name in events if s == session]
+      assert names == sorted(names, key=lambda n: int(n[1:]))
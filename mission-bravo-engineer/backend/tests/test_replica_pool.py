@@ -0,0 +1,181 @@
+"""Tests for ReplicaPool winner selection with streaming replicas."""
+
+import asyncio
+
+from a2a.types import Artifact
+from a2a.types import Message
+from a2a.types import Part
+from a2a.types import Role
+from a2a.types import Task
+from a2a.types import TaskArtifactUpdateEvent
+from a2a.types import TaskState
+from a2a.types import TaskStatus
+from a2a.types import TaskStatusUpdateEvent
+from a2a.types import TextPart
+
+from dispatch_agent.replica_pool import ReplicaPool
+from dispatch_agent.replica_pool import has_content
+
+
+def _task(state=TaskState.submitted):
+  return Task(id="t", context_id="c", status=TaskStatus(state=state))
+
+
+def _working(text=None):
+  message = None
+  if text is not None:
+    message = Message(
+        message_id="m",
+        role=Role.agent,
+        parts=[Part(root=TextPart(text=text))],
+    )
+  return TaskStatusUpdateEvent(
+      task_id="t",
+      context_id="c",
+      final=False,
+      status=TaskStatus(state=TaskState.working, message=message),
+  )
+
+
+def _artifact(text):
+  return TaskArtifactUpdateEvent(
+      task_id="t",
+      context_id="c",
+      last_chunk=True,
+      artifact=Artifact(artifact_id="a", parts=[Part(root=TextPart(text=text))]),
+  )
+
+
+class _Replica:
+  """Stub client: acknowledges after `ack_delay`, answers after `delay`.
+
+  With `keepalive`, it repeats the working acknowledgment that often until
+  it answers.
+  """
+
+  def __init__(self, name, ack_delay, delay, keepalive=None):
+    self.name = name
+    self.ack_delay = ack_delay
+    self.delay = delay
+    self.keepalive = keepalive
+    self.cancelled = False
+
+  async def stream(self):
+    try:
+      await asyncio.sleep(self.ack_delay)
+      yield _task(), None
+      yield _task(TaskState.working), _working()
+      remaining = self.delay - self.ack_delay
+      while self.keepalive and remaining > self.keepalive:
+        await asyncio.sleep(self.keepalive)
+        remaining -= self.keepalive
+        yield _task(TaskState.working), _working()
+      await asyncio.sleep(remaining)
+      yield _task(TaskState.working), _working(self.name)
+      yield _task(TaskState.working), _artifact(self.name)
+    except asyncio.CancelledError:
+      self.cancelled = True
+      raise
+
+
+def _fetch(client):
+  return client.stream()
+
+
+async def _collect(pool):
+  return [item async for item in pool.send(_fetch)]
+
+
+def test_acknowledgments_are_not_content():
+  assert not has_content((_task(), None))
+  assert not has_content((_task(TaskState.working), _working()))
+  assert has_content((_task(TaskState.working), _working("x")))
+  assert has_content((_task(TaskState.working), _artifact("x")))
+  assert has_content((_task(TaskState.completed), None))
+
+
+def test_hedge_fires_for_replica_that_acks_fast_and_generates_slowly():
+  async def run():
+    pool = ReplicaPool(hedge=True, hedge_initial_delay=0.05, max_attempts=2)
+    slow = _Replica("slow", ack_delay=0.0, delay=1.0)
+    fast = _Replica("fast", ack_delay=0.0, delay=0.1)
+    pool.add("slow", slow)
+    pool.add("fast", fast)
+    # Make the slow replica the first pick.
+    pool._replicas[1].outstanding = 1
+    started = asyncio.get_running_loop().time()
+    items = await _collect(pool)
+    elapsed = asyncio.get_running_loop().time() - started
+    pool._replicas[1].outstanding = 0
+    return pool, slow, fast, items, elapsed
+
+  pool, slow, fast, items, elapsed = asyncio.run(run())
+  assert pool.hedges_sent == 1
+  assert elapsed < 0.5
+  assert slow.cancelled and not fast.cancelled
+  # The winner's acknowledgments are replayed before its content.
+  assert len(items) == 4
+  assert items[2][1].status.message.parts[0].root.text == "fast"
+  assert pool.metrics()["replicas"][1]["hedges_won"] == 1
+
+
+def test_latency_samples_measure_content_not_acknowledgment():
+  async def run():
+    pool = ReplicaPool()
+    pool.add("only", _Replica("only", ack_delay=0.0, delay=0.2))
+    await _collect(pool)
+    return pool
+
+  pool = asyncio.run(run())
+  (latency,) = pool._replicas[0].first_response_latencies
+  assert latency >= 0.2
+
+
+def _texts(items):
+  return [
+      update.status.message.parts[0].root.text
+      for _, update in items
+      if isinstance(update, TaskStatusUpdateEvent) and update.status.message
+  ]
+
+
+def test_hedge_delay_counts_from_attempt_start_not_last_ack():
+  async def run():
+    pool = ReplicaPool(hedge=True, hedge_initial_delay=0.1, max_attempts=2)
+    # Acknowledges every 30 ms, well inside the 100 ms hedge delay.
+    slow = _Replica("slow", ack_delay=0.0, delay=1.0, keepalive=0.03)
+    fast = _Replica("fast", ack_delay=0.0, delay=0.05)
+    pool.add("slow", slow)
+    pool.add("fast", fast)
+    pool._replicas[1].outstanding = 1
+    started = asyncio.get_running_loop().time()
+    items = await _collect(pool)
+    pool._replicas[1].outstanding = 0
+    return pool, items, asyncio.get_running_loop().time() - started
+
+  pool, items, elapsed = asyncio.run(run())
+  assert pool.hedges_sent == 1
+  assert _texts(items) == ["fast"]
+  assert elapsed < 0.5
+
+
+def test_attempt_timeout_bounds_each_attempt():
+  async def run():
+    pool = ReplicaPool(attempt_timeout=0.2, max_attempts=2)
+    stuck = _Replica("stuck", ack_delay=0.0, delay=10.0)
+    # Needs 150 ms of its own 200 ms, but would miss a deadline counted
+    # from the first attempt's start.
+    backup = _Replica("backup", ack_delay=0.0, delay=0.15)
+    pool.add("stuck", stuck)
+    pool.add("backup", backup)
+    pool._replicas[1].outstanding = 1
+    items = await _collect(pool)
+    pool._replicas[1].outstanding = 0
+    return pool, stuck, items
+
+  pool, stuck, items = asyncio.run(run())
+  assert _texts(items) == ["backup"]
+  assert stuck.cancelled
+  assert pool.timeouts == 1
+  assert pool.failovers == 1
+  assert pool.metrics()["replicas"][0]["failures"] == 1
@@ -0,0 +1,116 @@
+"""Tests for session history compaction."""
+
+import asyncio
+import pathlib
+
+from google.adk.events.event import Event
+from google.genai import types
+
+from session_compaction import CompactingSessionService
+from session_compaction import CompactionConfig
+from session_compaction import compact_events
+
+ALPHA_COPY = (
+    pathlib.Path(__file__).parents[3]
+    / "mission-alpha-drone" / "backend" / "app" / "session_compaction.py"
+)
+
+
+def _text(i, author="user"):
+  return Event(
+      author=author,
+      invocation_id=f"inv-{i}",
+      content=types.Content(role="user", parts=[types.Part(text=f"turn {i}")]),
+  )
+
+
+def _call(call_id):
+  return Event(
+      author="dispatch",
+      invocation_id=call_id,
+      content=types.Content(
+          role="model",
+          parts=[types.Part(function_call=types.FunctionCall(
+              id=call_id, name="lookup", args={"q": call_id}
+          ))],
+      ),
+  )
+
+
+def _response(call_id):
+  return Event(
+      author="dispatch",
+      invocation_id=call_id,
+      content=types.Content(
+          role="user",
+          parts=[types.Part(function_response=types.FunctionResponse(
+              id=call_id, name="lookup", response={"ok": call_id}
+          ))],
+      ),
+  )
+
+
+def _orphans(events):
+  calls, responses = set(), set()
+  for event in events:
+    for part in event.content.parts:
+      if part.function_call:
+        calls.add(part.function_call.id)
+      if part.function_response:
+        responses.add(part.function_response.id)
+  return (calls - responses) | (responses - calls)
+
+
+def test_tool_pairs_are_kept_or_dropped_together():
+  events = []
+  for i in range(20):
+    events += [_call(f"c{i}"), _text(i), _response(f"c{i}")]
+  config = CompactionConfig(max_events=10, keep_recent=4, max_tool_events=2)
+  compacted = compact_events(events, config)
+  assert len(compacted) < len(events)
+  assert not _orphans(compacted)
+
+
+def test_recent_window_does_not_start_inside_a_pair():
+  events = [_text(i) for i in range(10)]
+  events += [_call("slow"), _text(10, "dispatch"), _text(11), _response("slow")]
+  # keep_recent=2 would start the window at _text(11).
+  config = CompactionConfig(max_events=5, keep_recent=2, max_tool_events=0)
+  compacted = compact_events(events, config)
+  assert compacted[-4:] == events[-4:]
+  assert not _orphans(compacted)
+
+
+def test_alpha_copy_is_identical():
+  here = pathlib.Path(__file__).parents[1] / "session_compaction.py"
+  assert ALPHA_COPY.read_text() == here.read_text()
+
+
+def test_soft_budget_requests_compaction_and_reports_usage():
+  async def run():
+    service = CompactingSessionService(
+        CompactionConfig(
+            max_events=1000, keep_recent=5, max_tool_events=0,
+            summary_max_chars=200,
+        ),
+        soft_budget_tokens=100,
+    )
+    session = await service.create_session(app_name="app", user_id="u")
+    for i in range(30):
+      # ~13 tokens each: the budget is crossed well within max_events.
+      event = _text(i)
+      event.content.parts[0].text = f"turn {i} " + "x" * 40
+      await service.append_event(session, event)
+    before = service.context_usage("app", "u", session.id)
+    dropped = service.compact_pending()
+    after = service.context_usage("app", "u", session.id)
+    return before, dropped, after
+
+  before, dropped, after = asyncio.run(run())
+  assert before["events"] == 30
+  assert before["estimated_tokens"] > 100
+  assert before["soft_budget_hits"] >= 1
+  assert dropped > 0
+  assert after["events"] < 30
+  assert after["estimated_tokens"] < before["estimated_tokens"]
+  assert after["peak_estimated_tokens"] == before["estimated_tokens"]
@@ -0,0 +1,134 @@
+"""Tests for the session cursor on the paths where it is reused.
+
+Under `AgentTool` every call has a fresh session, so the cursor only matters
+when the agent runs more than once in one session: as a sub-agent
+(`_run_async_impl`) and for live turns (`_run_live_impl`).
+"""
+
+import asyncio
+import types
+
+from a2a.types import AgentCapabilities
+from a2a.types import AgentCard
+from a2a.types import Message
+from a2a.types import Part
+from a2a.types import Role
+from a2a.types import TextPart
+from google.adk.events.event import Event
+from google.adk.sessions.session import Session
+from google.genai import types as genai_types
+
+from dispatch_agent.custom_remote_a2a_agent import CustomRemoteA2aAgent
+
+CARD = AgentCard(
+    name="architect",
+    description="stub",
+    url="http://localhost:8081",
+    version="1.0.0",
+    capabilities=AgentCapabilities(),
+    default_input_modes=["text/plain"],
+    default_output_modes=["text/plain"],
+    skills=[],
+)
+
+
+class _EchoClient:
+  """Answers each request at once with one message in remote context "ctx"."""
+
+  def __init__(self):
+    self.requests = []
+
+  async def send_message(self, request, *, request_metadata=None, context=None):
+    self.requests.append(request)
+    yield Message(
+        message_id=f"r{len(self.requests)}",
+        role=Role.agent,
+        context_id="ctx",
+        parts=[Part(root=TextPart(text=f"reply {len(self.requests)}"))],
+    )
+
+
+def _user_event(text):
+  return Event(
+      author="user",
+      invocation_id=text,
+      content=genai_types.Content(
+          role="user", parts=[genai_types.Part.from_text(text=text)]
+      ),
+  )
+
+
+def _agent():
+  """The agent, and the list of user texts its cursor has converted."""
+  agent = CustomRemoteA2aAgent(name="architect", agent_card=CARD)
+  agent._a2a_client = _EchoClient()
+  agent._is_resolved = True
+  converted = []
+  convert = agent._session_cursors._convert_event
+
+  def counting_convert(event):
+    converted.append(event.content.parts[0].text)
+    return convert(event)
+
+  agent._session_cursors._convert_event = counting_convert
+  return agent, converted
+
+
+def _ctx(session):
+  return types.SimpleNamespace(
+      session=session, invocation_id="inv", branch=None
+  )
+
+
+def _texts(request):
+  return [part.root.text for part in request.parts]
+
+
+def test_sub_agent_sends_only_events_since_its_last_reply():
+  agent, converted = _agent()
+  session = Session(id="s", app_name="app", user_id="u")
+
+  async def call(*texts):
+    session.events.extend(_user_event(t) for t in texts)
+    async for event in agent._run_async_impl(_ctx(session)):
+      session.events.append(event)
+
+  async def run():
+    await call("one", "two")
+    await call("three")
+    # History rewritten (e.g. compacted): the cursor starts over.
+    session.events[:] = [_user_event("summary")]
+    await call("four")
+
+  asyncio.run(run())
+  first, second, third = agent._a2a_client.requests
+  assert _texts(first) == ["one", "two"]
+  assert first.context_id is None
+  assert _texts(second) == ["three"]
+  assert second.context_id == "ctx"
+  assert _texts(third) == ["summary", "four"]
+  # Every event is converted once, however often the agent runs.
+  assert converted == ["one", "two", "three", "summary", "four"]
+
+
+def test_live_turns_send_only_events_since_the_previous_turn():
+  agent, converted = _agent()
+  session = Session(id="s", app_name="app", user_id="u")
+
+  async def feed():
+    for texts in (["one", "two"], ["three"], ["four"]):
+      session.events.extend(_user_event(t) for t in texts)
+      yield _ctx(session)
+      # The next turn arrives once this one's reply is in the session.
+      while session.events[-1].author != agent.name:
+        await asyncio.sleep(0.01)
+
+  async def run():
+    async for event in agent._run_live_impl(feed()):
+      session.events.append(event)
+
+  asyncio.run(run())
+  requests = agent._a2a_client.requests
+  assert [_texts(r) for r in requests] == [["one", "two"], ["three"], ["four"]]
+  assert [r.context_id for r in requests] == [None, "ctx", "ctx"]
+  assert converted == ["one", "two", "three", "four"]
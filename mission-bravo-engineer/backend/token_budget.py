@@ -0,0 +1,62 @@
+"""Context-window limits for live sessions.
+
+Without limits, a multi-hour session keeps sending an ever-growing context to
+the native-audio model, so latency and cost per turn grow with it.
+`ContextBudgetConfig` configures sliding-window context compression for the
+Live API (`RunConfig.context_window_compression`) and a per-session soft
+budget, read from CONTEXT_* env vars by default.
+
+ADK's live connection does not copy the Live API's usage metadata onto
+`run_live` events, so the soft budget is checked against an estimate of
+each session's history size, kept by `CompactingSessionService`
+(session_compaction.py), which compacts sessions that exceed it.
+
+Identical copies of this file live in mission-alpha-drone/backend/app/ and
+mission-bravo-engineer/backend/: the two apps are deployed separately and
+share no package. Change both together and keep them identical.
+"""
+
+import dataclasses
+import os
+
+from google.genai import types
+
+
+@dataclasses.dataclass(frozen=True)
+class ContextBudgetConfig:
+    """Context-window compression and soft budget settings."""
+
+    # Compress the live context once it reaches this many tokens...
+    compression_trigger_tokens: int = 32000
+    # ...by sliding the window down to this many tokens.
+    compression_target_tokens: int = 16000
+    # Estimated session history size above which compaction is requested.
+    soft_budget_tokens: int = 24000
+
+    @classmethod
+    def from_env(cls, prefix: str = "CONTEXT_") -> "ContextBudgetConfig":
+        defaults = cls()
+
+        def _get(name, default):
+            value = os.getenv(prefix + name)
+            return int(value) if value else default
+
+        return cls(
+            compression_trigger_tokens=_get(
+                "COMPRESSION_TRIGGER_TOKENS", defaults.compression_trigger_tokens
+            ),
+            compression_target_tokens=_get(
+                "COMPRESSION_TARGET_TOKENS", defaults.compression_target_tokens
+            ),
+            soft_budget_tokens=_get(
+                "SOFT_BUDGET_TOKENS", defaults.soft_budget_tokens
+            ),
+        )
+
+    def context_window_compression(self) -> types.ContextWindowCompressionConfig:
+        return types.ContextWindowCompressionConfig(
+            trigger_tokens=self.compression_trigger_tokens,
+            sliding_window=types.SlidingWindow(
+                target_tokens=self.compression_target_tokens
+            ),
+        )
@@ -14,15 +14,21 @@
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import Optional, Union, Any, List
+from typing import Optional, Union, Any, Awaitable, Callable, List
+
+from aiokafka import AIOKafkaConsumer, ConsumerRebalanceListener, TopicPartition
 
 from a2a.server.apps.kafka import KafkaServerApp
+from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
 from a2a.server.request_handlers.kafka_handler import KafkaHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard
 
 from google.adk.agents.base_agent import BaseAgent
+from google.adk.agents.run_config import RunConfig
+from google.adk.agents.run_config import StreamingMode
 from google.adk.artifacts.in_memory_artifact_service import InMemoryArtifactService
 from google.adk.auth.credential_service.in_memory_credential_service import InMemoryCredentialService
 from google.adk.memory.in_memory_memory_service import InMemoryMemoryService
@@ -31,8 +37,157 @@ from google.adk.sessions.in_memory_session_service import InMemorySessionService
 from google.adk.a2a.executor.a2a_agent_executor import A2aAgentExecutor
 from google.adk.a2a.utils.agent_card_builder import AgentCardBuilder
 
+try:
+  from agent.kafka_workers import PartitionWorkers
+except ImportError:
+  from kafka_workers import PartitionWorkers
+
 logger = logging.getLogger(__name__)
 
+
+class _StreamingRunner(Runner):
+  """Runner that always streams model output (SSE mode).
+
+  The A2A executor runs agents with a default RunConfig, which returns the
+  whole answer at once. In SSE mode each partial chunk becomes a "working"
+  status update on the A2A stream, so clients can act on the output while
+  it is still being generated.
+  """
+
+  async def run_async(self, *, run_config: Optional[RunConfig] = None, **kwargs):
+    run_config = (run_config or RunConfig()).model_copy(
+        update={"streaming_mode": StreamingMode.SSE}
+    )
+    async for event in super().run_async(run_config=run_config, **kwargs):
+      yield event
+
+
+class _ConcurrentKafkaServerApp(KafkaServerApp):
+  """KafkaServerApp that answers requests concurrently, per partition.
+
+  The base app reads a request, waits for the agent's reply, then reads the
+  next one, so one slow model call holds up its whole partition, and its
+  consumer auto-commits whatever was read. This app keeps the base handler
+  and reply producer, but reads requests with its own consumer: auto-commit
+  off, records handed to `PartitionWorkers`, and offsets committed only
+  once their replies were produced.
+  """
+
+  def __init__(
+      self,
+      *,
+      request_handler: DefaultRequestHandler,
+      bootstrap_servers: str | List[str],
+      request_topic: str,
+      consumer_group_id: str,
+      workers_per_partition: int,
+      commit_interval: float,
+      **kafka_config: Any,
+  ):
+    super().__init__(
+        request_handler=request_handler,
+        bootstrap_servers=bootstrap_servers,
+        request_topic=request_topic,
+        consumer_group_id=consumer_group_id,
+        **kafka_config,
+    )
+    self._consumer_args = dict(
+        bootstrap_servers=bootstrap_servers,
+        group_id=consumer_group_id,
+        **kafka_config,
+    )
+    self._request_topic = request_topic
+    self.workers_per_partition = workers_per_partition
+    self.commit_interval = commit_interval
+    self.workers: Optional[PartitionWorkers] = None
+
+  async def _commit(self, consumer: AIOKafkaConsumer) -> None:
+    offsets = self.workers.committable()
+    if not offsets:
+      return
+    try:
+      await consumer.commit(
+          {TopicPartition(*partition): offset
+           for partition, offset in offsets.items()}
+      )
+    except Exception as e:
+      # Not fatal: the same offsets (or later ones) are retried next time.
+      logger.warning(f"Offset commit failed: {e}")
+      return
+    self.workers.committed(offsets)
+
+  async def _commit_periodically(self, consumer: AIOKafkaConsumer) -> None:
+    while True:
+      await asyncio.sleep(self.commit_interval)
+      await self._commit(consumer)
+
+  async def _start_request_handler(self) -> Callable[[Any], Awaitable[Any]]:
+    """Starts the base app's reply side; returns its per-record handler.
+
+    This is the only code that depends on KafkaServerApp internals, which
+    the fork does not document or offer a hook for. `start()` builds
+    `handler` (which answers a consumed record and produces its reply) and
+    also starts the base `consumer`. That consumer would auto-commit
+    unanswered requests, so it is stopped again before it is ever polled.
+
+    Raises:
+      TypeError: The installed fork does not have these members; run with
+        workers_per_partition=None instead.
+    """
+    await self.start()
+    base_consumer = getattr(self, "consumer", None)
+    if base_consumer is not None:
+      await base_consumer.stop()
+    handle = getattr(getattr(self, "handler", None), "handle_request", None)
+    if not callable(handle):
+      await self.stop()
+      raise TypeError(
+          "KafkaServerApp has no handler.handle_request; concurrent workers"
+          " need it (use workers_per_partition=None)"
+      )
+    return handle
+
+  async def run(self) -> None:
+    handle = await self._start_request_handler()
+    self.consumer = consumer = AIOKafkaConsumer(
+        enable_auto_commit=False, **self._consumer_args
+    )
+    self.workers = workers = PartitionWorkers(
+        handle, self.workers_per_partition
+    )
+    app = self
+
+    class _CommitOnRevoke(ConsumerRebalanceListener):
+
+      async def on_partitions_revoked(self, revoked):
+        partitions = [(tp.topic, tp.partition) for tp in revoked]
+        # Finish and commit what we started before another process takes
+        # over, so no request is answered twice.
+        await workers.drain(partitions)
+        await app._commit(consumer)
+        await workers.release(partitions)
+
+      async def on_partitions_assigned(self, assigned):
+        pass
+
+    consumer.subscribe([self._request_topic], listener=_CommitOnRevoke())
+    await consumer.start()
+    committer = asyncio.create_task(self._commit_periodically(consumer))
+    logger.info(
+        f"Consuming {self._request_topic} with"
+        f" {self.workers_per_partition} workers per partition"
+    )
+    try:
+      async for record in consumer:
+        await workers.submit(record)
+    finally:
+      committer.cancel()
+      await self._commit(consumer)
+      await workers.close()
+      await consumer.stop()
+      await self.stop()
+
+
 def _load_agent_card(
     agent_card: Optional[Union[AgentCard, str]],
 ) -> Optional[AgentCard]:
@@ -76,6 +231,9 @@ async def create_kafka_server(
     consumer_group_id: str = "a2a-agent-group",
     agent_card: Optional[Union[AgentCard, str]] = None,
     runner: Optional[Runner] = None,
+    stream_output: bool = True,
+    workers_per_partition: Optional[int] = 4,
+    commit_interval: float = 1.0,
     **kafka_config: Any,
 ) -> KafkaServerApp:
   """Convert an ADK agent to a A2A Kafka Server application.
@@ -90,6 +248,13 @@ async def create_kafka_server(
                   agent.
       runner: Optional pre-built Runner object. If not provided, a default
               runner will be created using in-memory services.
+      stream_output: Whether the default runner streams model output as
+                     partial status updates. Ignored if `runner` is given.
+      workers_per_partition: Requests answered concurrently per partition.
+                             Requests with the same Kafka key are answered
+                             in order. None uses the base app's serial loop.
+      commit_interval: Seconds between offset commits. Offsets are only
+                       committed once the request's reply was produced.
       **kafka_config: Additional Kafka configuration.
 
   Returns:
@@ -101,7 +266,8 @@ async def create_kafka_server(
 
   async def create_runner() -> Runner:
     """Create a runner for the agent."""
-    return Runner(
+    runner_cls = _StreamingRunner if stream_output else Runner
+    return runner_cls(
         app_name=agent.name or "adk_agent",
         agent=agent,
         # Use minimal services - in a real implementation these could be configured
@@ -119,8 +285,6 @@ async def create_kafka_server(
   )
   
   # Initialize logic handler
-  from a2a.server.request_handlers.default_request_handler import DefaultRequestHandler
-  
   logic_handler = DefaultRequestHandler(
       agent_executor=agent_executor, task_store=task_store
   )
@@ -140,12 +304,23 @@ async def create_kafka_server(
       await card_builder.build()
       
   # Create Kafka Server App
-  server_app = KafkaServerApp(
-      request_handler=logic_handler,
-      bootstrap_servers=bootstrap_servers,
-      request_topic=request_topic,
-      consumer_group_id=consumer_group_id,
-      **kafka_config
-  )
+  if workers_per_partition is None:
+    server_app = KafkaServerApp(
+        request_handler=logic_handler,
+        bootstrap_servers=bootstrap_servers,
+        request_topic=request_topic,
+        consumer_group_id=consumer_group_id,
+        **kafka_config
+    )
+  else:
+    server_app = _ConcurrentKafkaServerApp(
+        request_handler=logic_handler,
+        bootstrap_servers=bootstrap_servers,
+        request_topic=request_topic,
+        consumer_group_id=consumer_group_id,
+        workers_per_partition=workers_per_partition,
+        commit_interval=commit_interval,
+        **kafka_config
+    )
   
   return server_app
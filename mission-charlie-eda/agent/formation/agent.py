@@ -1,5 +1,10 @@
+import json
+import logging
 import os
 from google.adk.agents import Agent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models import LlmResponse
+from google.genai import types
 from typing import List, Optional, Callable, Dict, Any
 from dotenv import load_dotenv
 
@@ -8,12 +13,73 @@ load_dotenv()
 # Ensure MODEL_ID is set (fallback to a known model if env var is missing)
 MODEL_ID = os.getenv("MODEL_ID", "gemini-2.5-flash")
 
+logger = logging.getLogger("formation_controller")
+
+POD_COUNT = int(os.getenv("POD_COUNT", "15"))
+# Safe area of the 800x600 canvas (margins plus the top menu strip)
+X_MIN, X_MAX = 50, 750
+Y_MIN, Y_MAX = 100, 550
+
+# Compact output: [[x, y], ...] with integer coordinates, one pair per pod.
+# Enforced by constrained decoding, so no keys, whitespace or fences.
+FORMATION_SCHEMA = {
+    "type": "array",
+    "minItems": POD_COUNT,
+    "maxItems": POD_COUNT,
+    "items": {
+        "type": "array",
+        "minItems": 2,
+        "maxItems": 2,
+        "items": {"type": "integer"},
+    },
+}
+
+
+def validate_formation(
+    callback_context: CallbackContext, llm_response: LlmResponse
+) -> Optional[LlmResponse]:
+    """Validates the final answer and clamps it to the safe area.
+
+    Streamed partial chunks pass through untouched (clients clamp them too);
+    the final response is replaced by the clamped, compact JSON, or by an
+    error if it is not a list of exactly POD_COUNT [x, y] number pairs.
+    """
+    if llm_response.partial or not llm_response.content or not llm_response.content.parts:
+        return None
+    text = "".join(part.text or "" for part in llm_response.content.parts)
+    if not text.strip():
+        return None
+    try:
+        coords = json.loads(text)
+        if not isinstance(coords, list):
+            raise ValueError("not a list")
+        pods = []
+        for pair in coords:
+            x, y = pair
+            pods.append([
+                min(max(round(float(x)), X_MIN), X_MAX),
+                min(max(round(float(y)), Y_MIN), Y_MAX),
+            ])
+        if len(pods) != POD_COUNT:
+            raise ValueError(f"{len(pods)} pairs, expected {POD_COUNT}")
+    # round() raises OverflowError on infinities (json.loads accepts Infinity).
+    except (ValueError, TypeError, OverflowError) as e:
+        logger.error(f"Invalid formation output: {e}: {text[:100]}")
+        return LlmResponse(
+            error_code="INVALID_FORMATION",
+            error_message=f"Formation output is not a list of {POD_COUNT} [x, y] pairs: {e}",
+        )
+    compact = json.dumps(pods, separators=(",", ":"))
+    return llm_response.model_copy(
+        update={"content": types.Content(role="model", parts=[types.Part(text=compact)])}
+    )
+
 root_agent = Agent(
     name="formation_agent",
     model=MODEL_ID,
-    instruction="""
+    instruction=f"""
     You are the **Formation Controller AI** . 
-    Your strict objective is to calculate X,Y coordinates for a fleet of **15 Drones** based on a requested geometric shape.
+    Your strict objective is to calculate X,Y coordinates for a fleet of **{POD_COUNT} Drones** based on a requested geometric shape.
 
     ### FIELD SPECIFICATIONS
     - **Canvas Size**: 800px (width) x 600px (height).
@@ -22,7 +88,7 @@ root_agent = Agent(
     - **Top Menu Avoidance**: Do NOT place pods in the top 100px (y < 100) to avoid UI overlap.
 
     ### FORMATION RULES
-    When given a formation name, output coordinates for exactly 15 pods (IDs 0-14).
+    When given a formation name, output coordinates for exactly {POD_COUNT} pods (IDs 0-{POD_COUNT - 1}).
     1.  **CIRCLE**: Evenly spaced around a center point (R=200).
     2.  **STAR**: 5 points or a star-like distribution.
     3.  **X**: A large X crossing the screen.
@@ -35,16 +101,14 @@ root_agent = Agent(
     7.  **CUSTOM**: If the user inputs something else (e.g., "SMILEY", "TRIANGLE"), do your best to approximate it geometrically.
 
     ### OUTPUT FORMAT
-    You MUST output **ONLY VALID JSON**. No markdown fencing, no preamble, no commentary.
+    Output ONLY a JSON array of [x, y] integer pairs, one per pod, in pod ID order.
     Refuse to answer non-formation questions.
 
-    **JSON Structure**:
-    ```json
-    [
-        {"x": 400, "y": 300}, 
-        {"x": 420, "y": 300},
-        ... (15 total items)
-    ]
-    ```
-    """
+    Example: [[400,300],[420,300],...] ({POD_COUNT} pairs total)
+    """,
+    generate_content_config=types.GenerateContentConfig(
+        response_mime_type="application/json",
+        response_json_schema=FORMATION_SCHEMA,
+    ),
+    after_model_callback=validate_formation,
 )
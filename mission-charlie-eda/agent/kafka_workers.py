@@ -0,0 +1,241 @@
+# Copyright 2025 Google LLC
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""Concurrent, partition-aware processing of Kafka request records.
+
+`PartitionWorkers` runs up to `workers_per_partition` records of each
+partition at once. Records with the same key (the A2A context, say) go to
+the same worker lane, so they are still handled in order. Records without
+a key are spread over the lanes round-robin.
+
+Offsets are tracked per partition. The committable offset is the oldest
+record still being handled, or one past the last record read once none
+is. Offsets need not be contiguous (compacted topics, transaction markers
+leave gaps), and only records in flight are remembered. A crash therefore
+redelivers every record that was not fully answered, never skips one.
+
+`run_processes` starts several server processes in one consumer group, so
+Kafka spreads the partitions over them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import itertools
+import logging
+import multiprocessing
+import zlib
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# (topic, partition), like aiokafka's TopicPartition.
+Partition = Tuple[str, int]
+
+
+class _PartitionState:
+  """Worker lanes and offset bookkeeping of one partition."""
+
+  def __init__(self, lanes: int):
+    self.queues: List[asyncio.Queue] = [asyncio.Queue() for _ in range(lanes)]
+    self.tasks: List[asyncio.Task] = []
+    self.round_robin = itertools.cycle(range(lanes))
+    # Offsets submitted but not handled yet, and the last offset submitted.
+    self.in_flight: set[int] = set()
+    self.last_offset: int | None = None
+    self.idle = asyncio.Event()
+    self.idle.set()
+
+  @property
+  def pending(self) -> int:
+    return len(self.in_flight)
+
+  @property
+  def next_offset(self) -> int | None:
+    """Offset to commit: where a restarted consumer must resume."""
+    if self.in_flight:
+      return min(self.in_flight)
+    if self.last_offset is None:
+      return None
+    return self.last_offset + 1
+
+  def submit(self, offset: int) -> None:
+    self.in_flight.add(offset)
+    self.last_offset = offset
+    self.idle.clear()
+
+  def complete(self, offset: int) -> None:
+    self.in_flight.discard(offset)
+    if not self.in_flight:
+      self.idle.set()
+
+
+class PartitionWorkers:
+  """Runs a record handler concurrently per partition, ordered per key.
+
+  Args:
+      handle: Coroutine function called with each record. It should return
+              once the reply has been produced.
+      workers_per_partition: Concurrent handler tasks per partition.
+      max_pending: Records accepted but not yet handled, over all
+                   partitions; `submit` waits while this many are pending.
+  """
+
+  def __init__(
+      self,
+      handle: Callable[[Any], Awaitable[Any]],
+      workers_per_partition: int = 4,
+      max_pending: int = 256,
+  ):
+    if workers_per_partition < 1:
+      raise ValueError("workers_per_partition must be at least 1")
+    self._handle = handle
+    self.workers_per_partition = workers_per_partition
+    self._capacity = asyncio.Semaphore(max_pending)
+    self._partitions: Dict[Partition, _PartitionState] = {}
+    self._committed: Dict[Partition, int] = {}
+    self._counts = collections.Counter()
+
+  def _lane(self, state: _PartitionState, key: bytes | None) -> int:
+    if key is None:
+      return next(state.round_robin)
+    return zlib.crc32(key) % self.workers_per_partition
+
+  def _state(self, partition: Partition) -> _PartitionState:
+    state = self._partitions.get(partition)
+    if state is None:
+      state = _PartitionState(self.workers_per_partition)
+      state.tasks = [
+          asyncio.create_task(self._work(partition, state, queue))
+          for queue in state.queues
+      ]
+      self._partitions[partition] = state
+    return state
+
+  async def submit(self, record: Any) -> None:
+    """Queues a consumed record (with topic, partition, offset and key)."""
+    await self._capacity.acquire()
+    partition = (record.topic, record.partition)
+    state = self._state(partition)
+    state.submit(record.offset)
+    self._counts["submitted"] += 1
+    state.queues[self._lane(state, record.key)].put_nowait(record)
+
+  async def _work(
+      self, partition: Partition, state: _PartitionState, queue: asyncio.Queue
+  ) -> None:
+    while True:
+      record = await queue.get()
+      try:
+        await self._handle(record)
+        self._counts["handled"] += 1
+      except asyncio.CancelledError:
+        raise
+      except Exception as e:
+        # Same as a serial consumer loop: log it and move on, rather than
+        # blocking the partition on a record that keeps failing.
+        self._counts["failed"] += 1
+        logger.error(
+            f"Request at {partition[0]}[{partition[1]}]@{record.offset}"
+            f" failed: {e}"
+        )
+      state.complete(record.offset)
+      self._capacity.release()
+
+  def committable(self) -> Dict[Partition, int]:
+    """Offsets to commit (next offset to read) that advanced since last time.
+
+    Call `committed` with the result once the commit succeeded.
+    """
+    offsets = {}
+    for partition, state in self._partitions.items():
+      offset = state.next_offset
+      if offset is not None and offset != self._committed.get(partition):
+        offsets[partition] = offset
+    return offsets
+
+  def committed(self, offsets: Dict[Partition, int]) -> None:
+    self._committed.update(offsets)
+    self._counts["commits"] += 1
+
+  async def drain(self, partitions: Iterable[Partition] | None = None) -> None:
+    """Waits until the given (default: all) partitions have nothing pending."""
+    if partitions is None:
+      partitions = list(self._partitions)
+    for partition in partitions:
+      state = self._partitions.get(partition)
+      if state is not None:
+        await state.idle.wait()
+
+  async def release(self, partitions: Iterable[Partition]) -> None:
+    """Forgets partitions (e.g. revoked ones); drain and commit them first."""
+    for partition in partitions:
+      state = self._partitions.pop(partition, None)
+      self._committed.pop(partition, None)
+      if state is None:
+        continue
+      for task in state.tasks:
+        task.cancel()
+      await asyncio.gather(*state.tasks, return_exceptions=True)
+      # Records dropped unhandled still hold capacity.
+      for _ in range(state.pending):
+        self._capacity.release()
+
+  async def close(self) -> None:
+    await self.release(list(self._partitions))
+
+  def metrics(self) -> dict:
+    return {
+        "workers_per_partition": self.workers_per_partition,
+        "partitions": len(self._partitions),
+        "pending": sum(s.pending for s in self._partitions.values()),
+        **{
+            name: self._counts[name]
+            for name in ("submitted", "handled", "failed", "commits")
+        },
+    }
+
+
+def _run_process(serve: Callable[[], Awaitable[None]]) -> None:
+  try:
+    asyncio.run(serve())
+  except KeyboardInterrupt:
+    pass
+
+
+def run_processes(serve: Callable[[], Awaitable[None]], processes: int) -> None:
+  """Runs `serve()` in `processes` worker processes and waits for them.
+
+  Each process should consume with the same consumer group, so that every
+  partition is handled by exactly one of them. More processes than
+  partitions leaves the extra ones idle. `serve` must be a module-level
+  coroutine function, as it is pickled into each process.
+  """
+  if processes <= 1:
+    _run_process(serve)
+    return
+  ctx = multiprocessing.get_context("spawn")
+  workers = [
+      ctx.Process(target=_run_process, args=(serve,), name=f"kafka-worker-{i}")
+      for i in range(processes)
+  ]
+  for worker in workers:
+    worker.start()
+  try:
+    for worker in workers:
+      worker.join()
+  except KeyboardInterrupt:
+    for worker in workers:
+      worker.join()
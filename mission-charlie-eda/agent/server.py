@@ -1,4 +1,3 @@
-import asyncio
 import logging
 import sys
 import os
@@ -21,11 +20,13 @@ if parent_dir not in sys.path:
 try:
     from agent.agent_to_kafka_a2a import create_kafka_server
     from agent.formation.agent import root_agent
+    from agent.kafka_workers import run_processes
 except ImportError:
     # Fallback if running from within agent/ directory
     try:
         from agent_to_kafka_a2a import create_kafka_server
         from formation.agent import root_agent
+        from kafka_workers import run_processes
     except ImportError as e:
         print(f"Error importing modules: {e}")
         print("Please run this script from the project root using: python -m agent.server")
@@ -36,6 +37,11 @@ logging.basicConfig(level=logging.INFO)
 # logging.getLogger("aiokafka").setLevel(logging.DEBUG) # Uncomment for debugging
 logger = logging.getLogger("formation_controller")
 
+# Requests answered concurrently per partition, and server processes sharing
+# the consumer group (each takes a share of the request topic's partitions).
+WORKERS_PER_PARTITION = int(os.getenv("AGENT_WORKERS_PER_PARTITION", "4"))
+WORKER_PROCESSES = int(os.getenv("AGENT_WORKER_PROCESSES", "1"))
+
 async def main():
     logger.info("Initializing Kafka Server...")
     
@@ -50,6 +56,7 @@ async def main():
             agent=root_agent,
             bootstrap_servers=bootstrap_server,
             request_topic="a2a-formation-request",
+            workers_per_partition=WORKERS_PER_PARTITION,
             
             # Security Protocol
             security_protocol="SASL_SSL",
@@ -72,6 +79,6 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_processes(main, WORKER_PROCESSES)
     except KeyboardInterrupt:
         logger.info("Server stopped by user.")
\ No newline at end of file
@@ -0,0 +1,37 @@
+"""Tests for the formation answer check. Run pytest from mission-charlie-eda/agent."""
+
+import json
+
+import pytest
+from google.adk.models import LlmResponse
+from google.genai import types
+
+from formation.agent import POD_COUNT, X_MAX, X_MIN, validate_formation
+
+
+def _response(text):
+  return LlmResponse(
+      content=types.Content(role="model", parts=[types.Part(text=text)])
+  )
+
+
+def test_answer_is_clamped_and_compacted():
+  pairs = [[400, 300]] * (POD_COUNT - 1) + [[-10.4, 9000]]
+  result = validate_formation(None, _response(json.dumps(pairs)))
+  pods = json.loads(result.content.parts[0].text)
+  assert len(pods) == POD_COUNT
+  assert pods[-1] == [X_MIN, 550]
+  assert not result.error_code
+
+
+@pytest.mark.parametrize("text", [
+    json.dumps([[400, 300]] * (POD_COUNT - 1)),
+    json.dumps([[400, 300]] * (POD_COUNT + 1)),
+    # Full length, so only the infinity is wrong.
+    json.dumps([[X_MAX, 300]] * (POD_COUNT - 1))[:-1] + ",[-Infinity,300]]",
+    json.dumps([[400, "y"]] * POD_COUNT),
+    '{"x": 1}',
+])
+def test_malformed_answer_is_rejected(text):
+  result = validate_formation(None, _response(text))
+  assert result.error_code == "INVALID_FORMATION"
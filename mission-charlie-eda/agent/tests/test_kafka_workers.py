@@ -0,0 +1,70 @@
+"""Tests for PartitionWorkers. Run pytest from mission-charlie-eda/agent."""
+
+import asyncio
+import collections
+
+from kafka_workers import PartitionWorkers
+
+Record = collections.namedtuple("Record", "topic partition offset key")
+
+
+def _record(offset, partition=0, key=None):
+  return Record("requests", partition, offset, key)
+
+
+def test_commit_skips_offset_gaps():
+  async def run():
+    workers = PartitionWorkers(lambda record: asyncio.sleep(0))
+    # 2 and 5-9 are compacted away or transaction markers.
+    for offset in (0, 1, 3, 4, 10):
+      await workers.submit(_record(offset))
+    await workers.drain()
+    return workers.committable()
+
+  assert asyncio.run(run()) == {("requests", 0): 11}
+
+
+def test_commit_stops_at_oldest_record_in_flight():
+  async def run():
+    slow = asyncio.Event()
+
+    async def handle(record):
+      if record.offset == 3:
+        await slow.wait()
+
+    workers = PartitionWorkers(handle, workers_per_partition=4)
+    for offset in (0, 1, 3, 4, 7, 8):
+      await workers.submit(_record(offset))
+    await asyncio.sleep(0.01)
+    stalled = workers.committable()
+    workers.committed(stalled)
+    slow.set()
+    await workers.drain()
+    done = workers.committable()
+    await workers.close()
+    return stalled, done
+
+  stalled, done = asyncio.run(run())
+  assert stalled == {("requests", 0): 3}
+  assert done == {("requests", 0): 9}
+
+
+def test_same_key_is_handled_in_order():
+  async def run():
+    seen = []
+
+    async def handle(record):
+      await asyncio.sleep(0.001 * (10 - record.offset % 10))
+      seen.append(record)
+
+    workers = PartitionWorkers(handle, workers_per_partition=4)
+    for offset in range(40):
+      await workers.submit(_record(offset, key=b"ctx-%d" % (offset % 3)))
+    await workers.drain()
+    await workers.close()
+    return seen
+
+  seen = asyncio.run(run())
+  for key in (b"ctx-0", b"ctx-1", b"ctx-2"):
+    offsets = [r.offset for r in seen if r.key == key]
+    assert offsets == sorted(offsets)
@@ -0,0 +1,170 @@
+"""Matching pods to formation slots to minimize total travel.
+
+A new formation used to give `slot[i]` to pod `i`, so pods crossed paths and
+travelled far. `assign_slots` instead returns the matching that (nearly)
+minimizes the summed Euclidean travel distance. Minimizing that sum also
+rules out crossing paths.
+
+  - Up to `BLOCK_SIZE` pods the matching is exact: an auction algorithm with
+    epsilon scaling, within `n * EPSILON` pixels of the optimum.
+  - Larger fleets are split by median bisection. Pods and slots are cut
+    together along the wider axis into equal-sized halves until a block
+    holds at most `BLOCK_SIZE` of each. This is near-optimal for spatially
+    coherent moves and needs no O(n^2) cost matrix.
+  - Above `LARGE_FLEET` pods, blocks are cut down to `LARGE_BLOCK_SIZE` and
+    the auction stops at `LARGE_EPSILON`. That costs well under 1% more total
+    travel than `BLOCK_SIZE` blocks, but keeps 1k pods in the low
+    milliseconds.
+
+Bisection runs one level at a time over all blocks, and all blocks are
+solved by one auction, vectorized over every unassigned pod of every block,
+so the Python overhead does not grow with the fleet.
+"""
+
+import numpy as np
+
+BLOCK_SIZE = 32
+LARGE_FLEET = 256
+LARGE_BLOCK_SIZE = 4
+# Pixels; the auction stops once every pod is within EPSILON of its best slot.
+EPSILON = 0.1
+LARGE_EPSILON = 2.0
+
+
+def _auction(cost: np.ndarray, scale: float, epsilon: float) -> np.ndarray:
+    """Solves independent square assignment problems.
+
+    Args:
+        cost: (blocks, n, n) array, cost[b, pod, slot].
+        scale: Largest meaningful cost, used to start epsilon scaling.
+        epsilon: Final epsilon, in pixels.
+
+    Returns:
+        (blocks, n) array with the slot of each pod.
+    """
+    blocks, n, _ = cost.shape
+    benefit = -cost
+    prices = np.zeros((blocks, n))
+    eps = max(scale / 20.0, epsilon)
+    while True:
+        slot_of = np.full((blocks, n), -1)
+        pod_of = np.full((blocks, n), -1)
+        while True:
+            block, pod = np.nonzero(slot_of < 0)
+            if not block.size:
+                break
+            values = benefit[block, pod] - prices[block]
+            best = np.argmax(values, axis=1)
+            local = np.arange(block.size)
+            best_value = values[local, best]
+            values[local, best] = -np.inf
+            second_value = values.max(axis=1) if n > 1 else best_value
+            bids = prices[block, best] + (best_value - second_value) + eps
+
+            # Highest bid per (block, slot) wins.
+            key = block * n + best
+            order = np.lexsort((bids, key))
+            last = np.r_[key[order][1:] != key[order][:-1], True]
+            winners = order[last]
+            won_block, won_slot, won_pod = block[winners], best[winners], pod[winners]
+            previous = pod_of[won_block, won_slot]
+            outbid = previous >= 0
+            slot_of[won_block[outbid], previous[outbid]] = -1
+            pod_of[won_block, won_slot] = won_pod
+            slot_of[won_block, won_pod] = won_slot
+            prices[won_block, won_slot] = bids[winners]
+        if eps <= epsilon:
+            return slot_of
+        eps = max(eps / 4.0, epsilon)
+
+
+def _span(a: np.ndarray, b: np.ndarray, starts: np.ndarray) -> np.ndarray:
+    """Extent of each block's values in `a` and `b` together."""
+    high = np.maximum(np.maximum.reduceat(a, starts), np.maximum.reduceat(b, starts))
+    low = np.minimum(np.minimum.reduceat(a, starts), np.minimum.reduceat(b, starts))
+    return high - low
+
+
+def _bisect(px, py, sx, sy, block_size: int):
+    """Splits pods and slots into matching blocks of at most `block_size`.
+
+    Returns:
+        (pods, slots, starts, sizes): pod and slot indices, ordered so that
+        block b is `pods[starts[b]:starts[b] + sizes[b]]` (same for slots).
+    """
+    n = len(px)
+    pods = np.arange(n)
+    slots = np.arange(n)
+    sizes = np.array([n])
+    while sizes.max() > block_size:
+        starts = np.r_[0, np.cumsum(sizes)[:-1]]
+        block = np.repeat(np.arange(len(sizes)), sizes)
+        pod_x, slot_x, pod_y, slot_y = px[pods], sx[slots], py[pods], sy[slots]
+        use_x = (_span(pod_x, slot_x, starts) >= _span(pod_y, slot_y, starts))[block]
+        pod_key = np.where(use_x, pod_x, pod_y)
+        slot_key = np.where(use_x, slot_x, slot_y)
+        pods = pods[np.lexsort((pod_key, block))]
+        slots = slots[np.lexsort((slot_key, block))]
+        split = sizes > block_size
+        halves = np.stack((np.where(split, sizes // 2, sizes), sizes - sizes // 2), axis=1)
+        halves[~split, 1] = 0
+        sizes = halves.ravel()
+        sizes = sizes[sizes > 0]
+    starts = np.r_[0, np.cumsum(sizes)[:-1]]
+    return pods, slots, starts, sizes
+
+
+def assign_slots(px, py, sx, sy) -> np.ndarray:
+    """Matches pods at (px, py) to slots at (sx, sy).
+
+    Both sides must have the same length.
+
+    Returns:
+        `slot` such that pod i should travel to (sx[slot[i]], sy[slot[i]]).
+    """
+    px, py, sx, sy = (np.asarray(a, dtype=np.float64) for a in (px, py, sx, sy))
+    n = len(px)
+    if n != len(sx):
+        raise ValueError(f"{n} pods cannot be matched to {len(sx)} slots")
+    if n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if n > LARGE_FLEET:
+        block_size, epsilon = LARGE_BLOCK_SIZE, LARGE_EPSILON
+    else:
+        block_size, epsilon = BLOCK_SIZE, EPSILON
+    pods, slots, starts, sizes = _bisect(px, py, sx, sy, block_size)
+    size = int(sizes.max())
+    # Pad every block to `size`. Padding pods match anything for free, while
+    # padding slots are too expensive for real pods to ever take.
+    block = np.repeat(np.arange(len(sizes)), sizes)
+    offset = np.arange(n) - starts[block]
+    pod_index = np.full((len(sizes), size), -1)
+    slot_index = np.full((len(sizes), size), -1)
+    pod_index[block, offset] = pods
+    slot_index[block, offset] = slots
+    real_pod = pod_index >= 0
+    real_slot = slot_index >= 0
+    cost = np.hypot(
+        px[pod_index][:, :, None] - sx[slot_index][:, None, :],
+        py[pod_index][:, :, None] - sy[slot_index][:, None, :],
+    )
+    scale = float(cost.max(where=real_pod[:, :, None] & real_slot[:, None, :], initial=0.0))
+    cost[~real_pod] = 0.0
+    cost[real_pod[:, :, None] & ~real_slot[:, None, :]] = size * scale + 1.0
+
+    slot_of = _auction(cost, scale, epsilon)
+    out = np.empty(n, dtype=np.int64)
+    chosen = np.take_along_axis(slot_index, slot_of, axis=1)
+    out[pod_index[real_pod]] = chosen[real_pod]
+    return out
+
+
+def travel(px, py, sx, sy, slot=None) -> tuple[float, float]:
+    """Total and maximum travel distance for a matching (identity if None)."""
+    sx = np.asarray(sx, dtype=np.float64)
+    sy = np.asarray(sy, dtype=np.float64)
+    if slot is not None:
+        sx, sy = sx[slot], sy[slot]
+    dist = np.hypot(np.asarray(px) - sx, np.asarray(py) - sy)
+    return float(dist.sum()), float(dist.max(initial=0.0))
@@ -0,0 +1,167 @@
+"""Single-producer fan-out of pre-encoded SSE frames.
+
+Each `/stream` client used to run its own loop that copied `PODS` and
+JSON-encoded every pod, so CPU grew with clients x pods. Now one producer
+encodes each frame once, and `BroadcastHub.publish` hands the same bytes to
+every subscriber through a bounded per-client queue.
+
+A slow client never holds back the producer. Once its queue is full, its
+oldest frames are skipped so it catches up to the latest state. For delta
+streams, where skipping a frame would lose changes, pass `resync`: the
+backlog is dropped and the client gets a fresh full snapshot instead. If a
+client keeps falling behind, it is disconnected.
+"""
+
+import asyncio
+import logging
+from typing import AsyncIterator, Callable, Optional
+
+logger = logging.getLogger("satellite_dashboard")
+
+_CLOSE = None  # queue sentinel ending a subscription
+
+
+def encode_sse(event: str, data: str, event_id: Optional[str] = None) -> bytes:
+    """Encodes one SSE message exactly as sse-starlette would send it."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    for line in data.splitlines() or [""]:
+        lines.append(f"data: {line}")
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8")
+
+
+class _Subscriber:
+    __slots__ = ("queue", "skipped", "skipped_in_row", "needs_resync")
+
+    def __init__(self, max_queue: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.skipped = 0
+        self.skipped_in_row = 0
+        self.needs_resync = False
+
+
+class BroadcastHub:
+    """Fans pre-encoded frames out to any number of stream subscribers."""
+
+    def __init__(
+        self,
+        max_queue: int = 64,
+        max_skipped: Optional[int] = 1024,
+        resync: Optional[Callable[[], bytes]] = None,
+    ):
+        """
+        Args:
+            max_queue: Frames buffered per subscriber before the oldest ones
+                are skipped.
+            max_skipped: Frames a subscriber may skip in a row (without reading
+                anything) before it is disconnected; None never disconnects.
+            resync: Returns a full snapshot frame. When set, an overflowing
+                subscriber drops its whole backlog and is sent a snapshot.
+        """
+        self._max_queue = max_queue
+        self._max_skipped = max_skipped
+        self._resync = resync
+        self._subscribers: set[_Subscriber] = set()
+        self.frames_published = 0
+        self.frames_skipped = 0
+        self.resyncs = 0
+        self.slow_disconnects = 0
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, frame: bytes) -> None:
+        """Queues `frame` for every subscriber without ever blocking."""
+        self.frames_published += 1
+        for sub in list(self._subscribers):
+            queue = sub.queue
+            if sub.needs_resync:
+                # The snapshot taken when the client next reads supersedes it.
+                skipped = 1
+            elif queue.full():
+                if self._resync is None:
+                    skipped = 1
+                    queue.get_nowait()
+                else:
+                    skipped = queue.qsize() + 1
+                    while not queue.empty():
+                        queue.get_nowait()
+                    sub.needs_resync = True
+                    self.resyncs += 1
+            else:
+                queue.put_nowait(frame)
+                continue
+
+            sub.skipped += skipped
+            sub.skipped_in_row += skipped
+            self.frames_skipped += skipped
+            if self._max_skipped is not None and sub.skipped_in_row > self._max_skipped:
+                self._disconnect(sub)
+                self.slow_disconnects += 1
+                logger.warning("Disconnecting slow SSE subscriber")
+            elif not sub.needs_resync:
+                queue.put_nowait(frame)
+
+    def _disconnect(self, sub: _Subscriber) -> None:
+        self._subscribers.discard(sub)
+        while not sub.queue.empty():
+            sub.queue.get_nowait()
+        sub.queue.put_nowait(_CLOSE)
+
+    async def subscribe(
+        self, initial: Optional[Callable[[], bytes]] = None
+    ) -> AsyncIterator[bytes]:
+        """Yields frames until the client goes away or the hub closes.
+
+        Args:
+            initial: Builds the first frame for this client (e.g. a snapshot or
+                a resume delta). It is called after the subscriber is
+                registered, so no frame published in between is lost.
+
+        Frames that piled up while the client was busy are sent together, so a
+        client that is behind wakes up once per batch, not once per frame.
+        """
+        sub = _Subscriber(self._max_queue)
+        self._subscribers.add(sub)
+        try:
+            if initial:
+                frame = initial()
+                if frame:
+                    yield frame
+            while True:
+                if sub.needs_resync:
+                    sub.needs_resync = False
+                    sub.skipped_in_row = 0
+                    yield self._resync()
+                    continue
+                frame = await sub.queue.get()
+                if frame is _CLOSE:
+                    return
+                batch = [frame]
+                while not sub.queue.empty():
+                    frame = sub.queue.get_nowait()
+                    if frame is _CLOSE:
+                        yield b"".join(batch)
+                        return
+                    batch.append(frame)
+                sub.skipped_in_row = 0
+                yield b"".join(batch) if len(batch) > 1 else batch[0]
+        finally:
+            self._subscribers.discard(sub)
+
+    def close(self) -> None:
+        """Ends every subscription (call on shutdown)."""
+        for sub in list(self._subscribers):
+            self._disconnect(sub)
+
+    def metrics(self) -> dict:
+        return {
+            "subscribers": len(self._subscribers),
+            "frames_published": self.frames_published,
+            "frames_skipped": self.frames_skipped,
+            "resyncs": self.resyncs,
+            "slow_disconnects": self.slow_disconnects,
+        }
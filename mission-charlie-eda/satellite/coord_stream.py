@@ -0,0 +1,102 @@
+"""Incremental parser for the formation agent's coordinate array.
+
+The agent answers with a JSON array of `[x, y]` pairs (older agents:
+`{"x": .., "y": ..}` objects, sometimes wrapped in ```json fences). It
+streams that text, and `CoordinateStream` returns each coordinate as soon
+as its element is complete, so pods can start moving after the first
+element instead of the last one.
+
+`feed` takes the next chunk only. A2A streams send chunks as partial
+"working" status updates and then repeat the whole answer in the final
+artifact or task; that text goes to `parse_coordinates` on its own instead
+(the caller knows which is which from the event type, the text does not).
+
+Only the text of the array element being read is buffered. Anything before
+the opening `[` (fences, preamble) and after the closing `]` is ignored.
+Elements that are neither pairs nor objects with numeric x and y are
+skipped.
+"""
+
+import json
+import logging
+
+logger = logging.getLogger("satellite_dashboard")
+
+
+class CoordinateStream:
+    def __init__(self):
+        self.points: list[tuple[float, float]] = []
+        self.done = False
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._element: list[str] = []
+
+    def feed(self, chunk: str) -> list[tuple[float, float]]:
+        """Parses the next chunk; returns the coordinates it completed."""
+        completed = []
+        for char in chunk:
+            if self.done:
+                break
+            if not self._started:
+                if char == "[":
+                    self._started = True
+                    self._depth = 1
+                continue
+
+            if self._depth > 1:
+                self._element.append(char)
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                    continue
+                if char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+                    if self._depth == 1:
+                        point = self._parse_element("".join(self._element))
+                        self._element = []
+                        if point is not None:
+                            self.points.append(point)
+                            completed.append(point)
+                continue
+
+            # Between elements of the top-level array.
+            if char in "{[":
+                self._depth = 2
+                self._element = [char]
+            elif char == "]":
+                self.done = True
+        return completed
+
+    @staticmethod
+    def _parse_element(text: str):
+        try:
+            element = json.loads(text)
+            if isinstance(element, list):
+                x, y = element
+                return float(x), float(y)
+            return float(element["x"]), float(element["y"])
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning(f"Skipping malformed formation coordinate {text[:50]!r}: {e}")
+            return None
+
+
+def parse_coordinates(text: str) -> tuple[list[tuple[float, float]], bool]:
+    """Parses a whole answer.
+
+    Returns:
+        The coordinates, and whether the array was closed (False for a
+        truncated answer).
+    """
+    stream = CoordinateStream()
+    stream.feed(text)
+    return stream.points, stream.done
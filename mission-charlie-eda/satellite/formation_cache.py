@@ -0,0 +1,143 @@
+"""Cache of agent-generated formations, persisted to a local JSON file.
+
+Custom shapes ("SMILEY", "TRIANGLE", ...) go to the formation agent, which
+runs the model again on every request even though the answer for a given
+name hardly changes. Answers are cached by normalized formation name, pod
+count and canvas bounds. Only answers that pass `validate` are stored:
+exactly one finite [x, y] pair per pod, inside the bounds. Callers pass the
+agent's answer as sent, before clamping it to the safe area, and only
+answers of tasks that completed.
+
+The library is written to disk on every store (atomically, via a temp
+file and rename), loaded at startup and can be pre-warmed with a list of
+names (FORMATION_CACHE_WARM). Requests can bypass the lookup to force a
+fresh answer, which then replaces the cached one.
+"""
+
+import json
+import logging
+import math
+import os
+from typing import Optional
+
+from formations import X_MAX, X_MIN, Y_MAX, Y_MIN, normalize_name
+
+logger = logging.getLogger("satellite_dashboard")
+
+FORMAT_VERSION = 1
+
+Points = list[tuple[float, float]]
+
+
+class FormationCache:
+    """Formation answers by (name, pod count, canvas).
+
+    Args:
+        path: JSON file backing the cache; None keeps it in memory only.
+        bounds: Canvas area (x_min, y_min, x_max, y_max) answers must fit.
+    """
+
+    def __init__(
+        self,
+        path: Optional[str],
+        bounds: tuple[float, float, float, float] = (X_MIN, Y_MIN, X_MAX, Y_MAX),
+    ):
+        self.path = path
+        self.bounds = bounds
+        self._entries: dict[str, Points] = {}
+        self.hits = 0
+        self.misses = 0
+        self.bypasses = 0
+        self.rejected = 0
+        self._load()
+
+    @property
+    def canvas(self) -> str:
+        return ",".join(f"{b:g}" for b in self.bounds)
+
+    def key(self, name: str, count: int) -> str:
+        return f"{normalize_name(name)}|{count}|{self.canvas}"
+
+    def validate(self, points, count: int) -> bool:
+        x_min, y_min, x_max, y_max = self.bounds
+        if len(points) != count:
+            return False
+        for x, y in points:
+            if not (math.isfinite(x) and math.isfinite(y)):
+                return False
+            if not (x_min <= x <= x_max and y_min <= y <= y_max):
+                return False
+        return True
+
+    def get(self, name: str, count: int, bypass: bool = False) -> Optional[Points]:
+        """Cached points for the formation, or None on a miss or bypass."""
+        if bypass:
+            self.bypasses += 1
+            return None
+        points = self._entries.get(self.key(name, count))
+        if points is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return points
+
+    def has(self, name: str, count: int) -> bool:
+        """Like `get`, but without counting a hit or miss."""
+        return self.key(name, count) in self._entries
+
+    def put(self, name: str, count: int, points) -> bool:
+        """Stores validated points and saves the library; False if rejected."""
+        points = [(float(x), float(y)) for x, y in points]
+        if not self.validate(points, count):
+            self.rejected += 1
+            logger.warning(f"Not caching formation {name!r}: {len(points)} points failed validation")
+            return False
+        self._entries[self.key(name, count)] = points
+        self._save()
+        return True
+
+    def _load(self) -> None:
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != FORMAT_VERSION:
+                raise ValueError(f"unsupported version {data.get('version')}")
+            for key, points in data["entries"].items():
+                _, count, canvas = key.rsplit("|", 2)
+                points = [(float(x), float(y)) for x, y in points]
+                # Entries for other canvas configs never match a lookup, but
+                # are kept so switching back does not lose them.
+                if canvas == self.canvas and not self.validate(points, int(count)):
+                    continue
+                self._entries[key] = points
+            logger.info(f"Loaded {len(self._entries)} cached formations from {self.path}")
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Ignoring unreadable formation cache {self.path}: {e}")
+
+    def _save(self) -> None:
+        if not self.path:
+            return
+        data = {
+            "version": FORMAT_VERSION,
+            "entries": {key: [[x, y] for x, y in points] for key, points in self._entries.items()},
+        }
+        tmp = f"{self.path}.tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.error(f"Failed to save formation cache {self.path}: {e}")
+
+    def metrics(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "bypasses": self.bypasses,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,133 @@
+"""Deterministic formation geometry for the built-in shapes.
+
+CIRCLE, LINE, X, STAR, PARABOLA and RANDOM are closed-form, so they are
+computed here instead of asking the formation agent (which takes seconds
+per request and sometimes returns malformed JSON). Only custom shapes still
+go to the LLM.
+
+Shapes follow the agent prompt: an 800x600 canvas centered on (400, 300),
+with every pod kept within x 50-750 and y 100-550. Each shape is a set of
+strokes (polylines), and pods are spread evenly along them by arc length.
+When there are too many pods to keep `MIN_SPACING` between neighbours on a
+single stroke, parallel lanes are added. The shapes then thicken instead of
+stacking pods on top of each other, so any pod count works.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+X_MIN, X_MAX = 50.0, 750.0
+Y_MIN, Y_MAX = 100.0, 550.0
+CENTER_X, CENTER_Y = 400.0, 300.0
+MIN_SPACING = 6.0
+
+
+def _circle():
+    angles = np.linspace(0.0, 2.0 * math.pi, 721)
+    return [np.column_stack((CENTER_X + 200.0 * np.cos(angles), CENTER_Y + 200.0 * np.sin(angles)))]
+
+
+def _line():
+    return [np.array([[X_MIN + 50.0, CENTER_Y], [X_MAX - 50.0, CENTER_Y]])]
+
+
+def _x():
+    return [
+        np.array([[150.0, 110.0], [650.0, 540.0]]),
+        np.array([[150.0, 540.0], [650.0, 110.0]]),
+    ]
+
+
+def _star():
+    # Five outer points (first one straight up), alternating with inner ones.
+    k = np.arange(11)
+    radius = np.where(k % 2 == 0, 210.0, 85.0)
+    angles = -math.pi / 2 + k * math.pi / 5
+    return [np.column_stack((CENTER_X + radius * np.cos(angles), 320.0 + radius * np.sin(angles)))]
+
+
+def _parabola():
+    # A U opening upwards on screen: vertex at the bottom (y=500), arms up to
+    # y=200 (screen y grows downwards).
+    xs = np.linspace(150.0, 650.0, 201)
+    ys = 500.0 - 300.0 * ((xs - CENTER_X) / 250.0) ** 2
+    return [np.column_stack((xs, ys))]
+
+
+SHAPES = {
+    "CIRCLE": _circle,
+    "LINE": _line,
+    "X": _x,
+    "STAR": _star,
+    "PARABOLA": _parabola,
+}
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.strip().upper().split())
+
+
+def is_builtin(name: str) -> bool:
+    name = normalize_name(name)
+    return name in SHAPES or name == "RANDOM"
+
+
+def clamp(xs, ys):
+    """Rounds coordinates and keeps them within the safe area."""
+    return (
+        np.clip(np.rint(xs), X_MIN, X_MAX),
+        np.clip(np.rint(ys), Y_MIN, Y_MAX),
+    )
+
+
+def _along(strokes, count: int):
+    """Spreads `count` points evenly along the strokes, in lanes if needed."""
+    starts, ends = [], []
+    for stroke in strokes:
+        starts.append(stroke[:-1])
+        ends.append(stroke[1:])
+    a = np.concatenate(starts)
+    b = np.concatenate(ends)
+    seg = b - a
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+    keep = seg_len > 0
+    a, seg, seg_len = a[keep], seg[keep], seg_len[keep]
+    cum = np.concatenate(([0.0], np.cumsum(seg_len)))
+    total = cum[-1]
+    normals = np.column_stack((-seg[:, 1], seg[:, 0])) / seg_len[:, None]
+
+    lanes = max(1, math.ceil(count * MIN_SPACING / total))
+    per_lane = np.full(lanes, count // lanes)
+    per_lane[: count % lanes] += 1
+    lane_of = np.repeat(np.arange(lanes), per_lane)
+    index_in_lane = np.arange(count) - np.repeat(np.cumsum(per_lane) - per_lane, per_lane)
+
+    s = (index_in_lane + 0.5) * total / per_lane[lane_of]
+    which = np.clip(np.searchsorted(cum, s, side="right") - 1, 0, len(seg_len) - 1)
+    t = (s - cum[which]) / seg_len[which]
+    points = a[which] + seg[which] * t[:, None]
+    offsets = (lane_of - (lanes - 1) / 2.0) * MIN_SPACING
+    return points + normals[which] * offsets[:, None]
+
+
+def generate(name: str, count: int, seed: Optional[int] = None):
+    """Returns `(xs, ys)` for a built-in formation, or None for custom shapes.
+
+    Args:
+        name: Formation name, case-insensitive.
+        count: Number of pods.
+        seed: Seed for RANDOM; None draws a fresh scatter.
+    """
+    name = normalize_name(name)
+    if count <= 0:
+        return np.empty(0), np.empty(0)
+    if name == "RANDOM":
+        rng = np.random.default_rng(seed)
+        return rng.uniform(X_MIN, X_MAX, count), rng.uniform(Y_MIN, Y_MAX, count)
+    shape = SHAPES.get(name)
+    if shape is None:
+        return None
+    points = _along(shape(), count)
+    return clamp(points[:, 0], points[:, 1])
@@ -0,0 +1,226 @@
+"""Wire encodings for pod stream frames.
+
+A frame is the set of pods that changed in one version, plus the version
+metadata (`formation`, `version`, `snapshot`). Clients choose an encoding with
+`/stream?encoding=...`:
+
+  events    one `pod_update` event per pod followed by a `formation_update`
+            event (the original format, and the default).
+  json      one `pods` event: {..meta, "pods": [{"id", "x", "y"}, ...]}
+  columnar  one `pods` event: {..meta, "ids": [...], "x": [...], "y": [...]}
+  int16     one `pods` event: {..meta, "count": n, "ids": <base64 uint32 LE>,
+            "xy": <base64 int16 LE, interleaved x0, y0, x1, y1, ...>}
+            A frame with a coordinate outside the int16 range is sent in the
+            json encoding instead.
+
+The SSE id ("<epoch>-<version>") is set on the last event of the frame, so a
+client that reconnects mid-frame resumes from the previous complete version.
+
+Formation job updates (see jobs.py) are sent in every encoding as a
+`formation_job` event whose data is the job as JSON.
+
+The `/ws` WebSocket uses binary messages instead (all little endian). A
+server message holds one or more pod frames back to back:
+
+  u8 kind=1, u8 flags (bit 0: snapshot), u16 formation length, u32 version,
+  u32 count, formation (UTF-8, zero-padded to a multiple of 4 bytes),
+  u32 ids[count], i16 xy[2 * count] (interleaved x0, y0, x1, y1, ...)
+
+A frame that does not fit those fields (a formation name over 65535 bytes,
+a version past u32, a coordinate outside int16) is sent as JSON instead,
+with the json encoding's payload:
+
+  pods: u8 kind=5, 3 padding bytes, u32 length, pods JSON (UTF-8)
+
+Clients send pod edits, applied in order, and get an ack per message:
+
+  edit: u8 kind=2, 3 padding bytes, u32 seq, u32 count, u32 ids[count],
+        i16 xy[2 * count]
+  ack:  u8 kind=3, 3 padding bytes, u32 seq
+
+Edits may also be sent as JSON text, `{"seq": n, "pods": [[id, x, y], ...]}`,
+with every value in the range of the binary field it stands for.
+
+Formation job updates are server messages of their own:
+
+  job:  u8 kind=4, 3 padding bytes, u32 length, job JSON (UTF-8)
+"""
+
+import base64
+import json
+import struct
+
+import numpy as np
+
+from broadcast import encode_sse
+
+ENCODINGS = ("events", "json", "columnar", "int16")
+
+KIND_PODS = 1
+KIND_EDIT = 2
+KIND_ACK = 3
+KIND_JOB = 4
+KIND_PODS_JSON = 5
+
+COORD_MIN, COORD_MAX = -(2 ** 15), 2 ** 15 - 1
+U16_MAX = 2 ** 16 - 1
+U32_MAX = 2 ** 32 - 1
+
+_PODS_HEADER = struct.Struct("<BBHII")
+_EDIT_HEADER = struct.Struct("<B3xII")
+_ACK = struct.Struct("<B3xI")
+_JOB_HEADER = struct.Struct("<B3xI")
+_JSON_HEADER = struct.Struct("<B3xI")
+
+
+def _b64(array: np.ndarray) -> str:
+    return base64.b64encode(array.tobytes()).decode("ascii")
+
+
+def _int16_xy(xs, ys):
+    """Rounded, interleaved int16 coordinates, or None if any does not fit."""
+    xy = np.empty((len(xs), 2))
+    xy[:, 0] = np.rint(xs)
+    xy[:, 1] = np.rint(ys)
+    # NaN fails both comparisons, so it does not fit either.
+    if not np.all((xy >= COORD_MIN) & (xy <= COORD_MAX)):
+        return None
+    return xy.astype("<i2")
+
+
+def _json_pods(ids, xs, ys, meta: dict) -> dict:
+    return {
+        **meta,
+        "pods": [
+            {"id": i, "x": x, "y": y}
+            for i, x, y in zip(
+                np.asarray(ids).tolist(), np.asarray(xs).tolist(), np.asarray(ys).tolist()
+            )
+        ],
+    }
+
+
+def encode_frame(encoding: str, ids, xs, ys, meta: dict, event_id: str) -> bytes:
+    """Encodes the pods given as parallel `ids`, `xs`, `ys` arrays."""
+    if encoding == "events":
+        chunks = [
+            encode_sse("pod_update", json.dumps({"pod": {"id": i, "x": x, "y": y}}))
+            for i, x, y in zip(
+                np.asarray(ids).tolist(), np.asarray(xs).tolist(), np.asarray(ys).tolist()
+            )
+        ]
+        chunks.append(encode_sse("formation_update", json.dumps(meta), event_id=event_id))
+        return b"".join(chunks)
+
+    xy = _int16_xy(xs, ys) if encoding == "int16" else None
+    if encoding == "json" or (encoding == "int16" and xy is None):
+        payload = _json_pods(ids, xs, ys, meta)
+    elif encoding == "columnar":
+        payload = {
+            **meta,
+            "ids": np.asarray(ids).tolist(),
+            "x": np.asarray(xs).tolist(),
+            "y": np.asarray(ys).tolist(),
+        }
+    elif encoding == "int16":
+        payload = {
+            **meta,
+            "count": len(ids),
+            "ids": _b64(np.asarray(ids, dtype="<u4")),
+            "xy": _b64(xy),
+        }
+    else:
+        raise ValueError(f"Unknown stream encoding: {encoding}")
+    return encode_sse("pods", json.dumps(payload, separators=(",", ":")), event_id=event_id)
+
+
+def encode_binary_frame(ids, xs, ys, meta: dict) -> bytes:
+    """Encodes pods as a binary WebSocket frame (see the module docstring).
+
+    Falls back to a JSON pods message if the frame does not fit the binary
+    header or int16 coordinates.
+    """
+    formation = (meta.get("formation") or "").encode("utf-8")
+    padding = -len(formation) % 4
+    xy = _int16_xy(xs, ys)
+    if xy is None or len(formation) > U16_MAX or not 0 <= meta["version"] <= U32_MAX:
+        payload = json.dumps(_json_pods(ids, xs, ys, meta), separators=(",", ":"))
+        payload = payload.encode("utf-8")
+        return _JSON_HEADER.pack(KIND_PODS_JSON, len(payload)) + payload
+    return b"".join((
+        _PODS_HEADER.pack(
+            KIND_PODS,
+            1 if meta.get("snapshot") else 0,
+            len(formation),
+            meta["version"],
+            len(ids),
+        ),
+        formation,
+        b"\0" * padding,
+        np.asarray(ids, dtype="<u4").tobytes(),
+        xy.tobytes(),
+    ))
+
+
+def decode_binary_edit(data: bytes):
+    """Returns `(seq, ids, xs, ys)` of a binary edit message.
+
+    Raises:
+        ValueError: If the message is not a well-formed edit.
+    """
+    if len(data) < _EDIT_HEADER.size:
+        raise ValueError("Edit message too short")
+    kind, seq, count = _EDIT_HEADER.unpack_from(data)
+    if kind != KIND_EDIT:
+        raise ValueError(f"Unexpected message kind {kind}")
+    ids_end = _EDIT_HEADER.size + 4 * count
+    if len(data) != ids_end + 4 * count:
+        raise ValueError("Edit message length does not match its count")
+    ids = np.frombuffer(data, dtype="<u4", count=count, offset=_EDIT_HEADER.size)
+    xy = np.frombuffer(data, dtype="<i2", count=2 * count, offset=ids_end)
+    return seq, ids, xy[0::2], xy[1::2]
+
+
+def _bounded_int(value, low: int, high: int, what: str, numbers=int) -> int:
+    """`value` as an int in `[low, high]`; `numbers` are the accepted types."""
+    # bool is an int, so it has to be turned away by name.
+    if isinstance(value, bool) or not isinstance(value, numbers):
+        raise ValueError(f"{what} must be a number, got {value!r}")
+    # NaN fails both comparisons, infinities the bounds.
+    if not low <= value <= high:
+        raise ValueError(f"{what} {value} is outside [{low}, {high}]")
+    return int(value)
+
+
+def decode_json_edit(text: str):
+    """Returns `(seq, edits)` of a JSON edit, edits as `(id, x, y)` tuples.
+
+    Values are held to the ranges of the binary edit's fields; coordinates
+    may be floats, which are truncated as before.
+
+    Raises:
+        ValueError: If the message is not a well-formed edit.
+    """
+    payload = json.loads(text)
+    if not isinstance(payload, dict) or not isinstance(payload.get("pods"), list):
+        raise ValueError("Edit message must be an object with a pods list")
+    seq = _bounded_int(payload.get("seq"), 0, U32_MAX, "seq")
+    edits = []
+    for pod in payload["pods"]:
+        if not isinstance(pod, list) or len(pod) != 3:
+            raise ValueError(f"Pod edit must be [id, x, y], got {pod!r}")
+        edits.append((
+            _bounded_int(pod[0], 0, U32_MAX, "id"),
+            _bounded_int(pod[1], COORD_MIN, COORD_MAX, "x", (int, float)),
+            _bounded_int(pod[2], COORD_MIN, COORD_MAX, "y", (int, float)),
+        ))
+    return seq, edits
+
+
+def encode_binary_ack(seq: int) -> bytes:
+    return _ACK.pack(KIND_ACK, seq)
+
+
+def encode_binary_job(job: dict) -> bytes:
+    payload = json.dumps(job, separators=(",", ":")).encode("utf-8")
+    return _JOB_HEADER.pack(KIND_JOB, len(payload)) + payload
@@ -0,0 +1,174 @@
+"""Asynchronous formation jobs.
+
+`POST /formation` used to hold the HTTP request open for the whole agent
+round trip (up to 120 s), so clicks piled up as hanging requests. Now each
+request becomes a `FormationJob` that runs as a background task, and the
+request returns its id at once. Every state change goes to `on_update`,
+which main.py publishes on the pod streams.
+
+Only the latest formation matters. Submitting a job supersedes the job
+still pending or running, whose agent call is cancelled. The new job only
+starts once the superseded one has finished unwinding (for up to
+`UNWIND_TIMEOUT`), so clean-up such as rolling back streamed targets
+cannot overwrite what the new job sets.
+
+Job states: pending -> running -> succeeded | failed, or cancelled /
+superseded from either of the first two.
+"""
+
+import asyncio
+import collections
+import dataclasses
+import logging
+import time
+import uuid
+from typing import Awaitable, Callable, Optional
+
+logger = logging.getLogger("satellite_dashboard")
+
+PENDING = "pending"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+SUPERSEDED = "superseded"
+FINISHED = (SUCCEEDED, FAILED, CANCELLED, SUPERSEDED)
+
+# Seconds a new job waits for the job it superseded to unwind.
+UNWIND_TIMEOUT = 5.0
+
+
+@dataclasses.dataclass
+class FormationJob:
+    id: str
+    formation: str
+    status: str = PENDING
+    created: float = dataclasses.field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    # Latest progress report from the runner, e.g. {"stage": "agent"}.
+    progress: dict = dataclasses.field(default_factory=dict)
+    result: Optional[dict] = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = dataclasses.field(default=None, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "formation": self.formation,
+            "status": self.status,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "progress": self.progress,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+Runner = Callable[[FormationJob], Awaitable[dict]]
+
+
+class FormationJobs:
+    """Runs formation jobs one at a time, newest wins.
+
+    Args:
+        on_update: Called with the job after every state or progress change.
+        history: Number of jobs kept for status lookups.
+    """
+
+    def __init__(self, on_update: Callable[[FormationJob], None], history: int = 256):
+        self._on_update = on_update
+        self._jobs: collections.OrderedDict[str, FormationJob] = collections.OrderedDict()
+        self._history = history
+        self._current: Optional[FormationJob] = None
+        self._counts = collections.Counter()
+
+    def _notify(self, job: FormationJob) -> None:
+        try:
+            self._on_update(job)
+        except Exception as e:
+            logger.error(f"Formation job update failed: {e}")
+
+    def _finish(self, job: FormationJob, status: str) -> None:
+        job.status = status
+        job.finished = time.time()
+        self._counts[status] += 1
+        if self._current is job:
+            self._current = None
+        self._notify(job)
+
+    def submit(self, formation: str, run: Runner) -> FormationJob:
+        """Starts `run(job)` in the background, superseding the current job."""
+        previous = None
+        if self._current is not None:
+            previous = self._current.task
+            self._stop(self._current, SUPERSEDED)
+        job = FormationJob(id=uuid.uuid4().hex[:12], formation=formation)
+        self._jobs[job.id] = job
+        while len(self._jobs) > self._history:
+            self._jobs.popitem(last=False)
+        self._current = job
+        self._counts["submitted"] += 1
+        job.task = asyncio.create_task(self._run(job, run, previous))
+        self._notify(job)
+        return job
+
+    async def _run(
+        self, job: FormationJob, run: Runner, previous: Optional[asyncio.Task] = None
+    ) -> None:
+        if previous is not None and not previous.done():
+            _, still_running = await asyncio.wait([previous], timeout=UNWIND_TIMEOUT)
+            if still_running:
+                logger.warning(f"Superseded formation job still unwinding after {UNWIND_TIMEOUT:g} s")
+        job.status = RUNNING
+        job.started = time.time()
+        self._notify(job)
+        try:
+            job.result = await run(job)
+        except asyncio.CancelledError:
+            # cancel() / submit() already recorded why.
+            raise
+        except Exception as e:
+            logger.error(f"Formation job {job.id} ({job.formation}) failed: {e}")
+            job.error = str(e)
+            self._finish(job, FAILED)
+        else:
+            self._finish(job, SUCCEEDED)
+
+    def report(self, job: FormationJob, **progress) -> None:
+        """Publishes a progress update for a running job."""
+        if job.done:
+            return
+        job.progress = progress
+        self._notify(job)
+
+    def _stop(self, job: FormationJob, status: str) -> None:
+        self._finish(job, status)
+        if job.task is not None:
+            job.task.cancel()
+
+    def get(self, job_id: str) -> Optional[FormationJob]:
+        return self._jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[FormationJob]:
+        """Cancels a job; returns None if unknown. Finished jobs are unchanged."""
+        job = self._jobs.get(job_id)
+        if job is not None and not job.done:
+            self._stop(job, CANCELLED)
+        return job
+
+    def close(self) -> None:
+        if self._current is not None:
+            self._stop(self._current, CANCELLED)
+
+    def metrics(self) -> dict:
+        return {
+            "current": self._current.id if self._current else None,
+            "submitted": self._counts["submitted"],
+            **{status: self._counts[status] for status in FINISHED},
+        }
@@ -1,28 +1,32 @@
 import asyncio
 import json
-import random
+import time
+import numpy as np
 import logging
 import ssl
 import os
+import re
 from dotenv import load_dotenv
 
 # Load env from project root
 load_dotenv()
 
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, HTTPException, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
 from sse_starlette.sse import EventSourceResponse
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 # A2A Imports
 from a2a.client.transports.kafka import KafkaClientTransport
-from a2a.client.middleware import ClientCallContext
 from a2a.types import (
     AgentCard,
     AgentCapabilities,
     MessageSendParams,
     Message,
     Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
 )
 
 
@@ -34,9 +38,59 @@ logger.setLevel(logging.INFO)
 
 from contextlib import asynccontextmanager
 
+from broadcast import BroadcastHub, encode_sse
+from coord_stream import CoordinateStream, parse_coordinates
+from formation_cache import FormationCache
+from frames import (
+    COORD_MAX,
+    COORD_MIN,
+    ENCODINGS,
+    decode_binary_edit,
+    decode_json_edit,
+    encode_binary_ack,
+    encode_binary_frame,
+    encode_binary_job,
+    encode_frame,
+)
+import formations
+from assignment import assign_slots, travel
+from jobs import FormationJobs
+from motion import MotionEngine
+from placement import StreamingPlacer
+from pod_store import PodStore
+from request_pipeline import RequestPipeline
+from spatial import SpatialIndex
+
+# Reply routing. Agent replies go to the reply topic named in the request,
+# and every consumer of that topic sees them. Replicas sharing one topic
+# would steal each other's replies (the transport then drops them as
+# unknown correlation ids), so each replica gets a topic of its own:
+# "<KAFKA_REPLY_TOPIC_PREFIX>.<DASHBOARD_INSTANCE_ID>". Without an instance
+# id, the dashboard runs as a single replica on the prefix topic itself.
+# The id must be stable across restarts (e.g. a StatefulSet pod name), as
+# the topic has to exist on the broker.
+REPLY_TOPIC_PREFIX = os.getenv("KAFKA_REPLY_TOPIC_PREFIX", "a2a-reply-satellite-dashboard")
+DASHBOARD_INSTANCE_ID = os.getenv("DASHBOARD_INSTANCE_ID", "").strip()
+
+def reply_topic_for(instance_id: str, prefix: str = REPLY_TOPIC_PREFIX) -> str:
+    """Reply topic of one dashboard replica ('' means the only replica)."""
+    if not instance_id:
+        return prefix
+    # Kafka topic names: at most 249 of [a-zA-Z0-9._-].
+    safe = re.sub(r"[^a-zA-Z0-9._-]", "-", instance_id)
+    topic = f"{prefix}.{safe}"
+    if len(topic) > 249:
+        raise ValueError(f"Reply topic for instance {instance_id!r} is too long")
+    return topic
+
+REPLY_TOPIC = reply_topic_for(DASHBOARD_INSTANCE_ID)
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     global kafka_transport
+    producer = asyncio.create_task(stream_producer())
+    mover = asyncio.create_task(motion.run())
+
     logger.info("Initializing Kafka Client Transport...")
     
     # Redpanda Cloud Config (Matches Server)
@@ -44,7 +98,8 @@ async def lifespan(app: FastAPI):
     username = os.getenv("KAFKA_SASL_USERNAME")
     password = os.getenv("KAFKA_SASL_PASSWORD")
     request_topic = "a2a-formation-request"
-    reply_topic = "a2a-reply-satellite-dashboard"
+    reply_topic = REPLY_TOPIC
+    logger.info(f"Dashboard instance {DASHBOARD_INSTANCE_ID or '(single)'} replies on {reply_topic}")
     
     # --- Initialize Transport ---
     
@@ -64,7 +119,7 @@ async def lifespan(app: FastAPI):
         agent_card=client_card,
         bootstrap_servers=bootstrap_server,
         request_topic=request_topic,
-        reply_topic=reply_topic, # Explicit static reply topic
+        reply_topic=reply_topic, # Per-instance reply topic, see REPLY_TOPIC
         
         # Security & Auth
         security_protocol="SASL_SSL",
@@ -74,14 +129,23 @@ async def lifespan(app: FastAPI):
         ssl_context=ssl.create_default_context(),
     )
     
+    agent_requests.transport = kafka_transport
     try:
         await kafka_transport.start()
         logger.info("Kafka Client Transport Started Successfully.")
     except Exception as e:
         logger.error(f"Failed to start Kafka Client: {e}")
+    warmer = asyncio.create_task(warm_formation_cache())
         
     yield
-    
+
+    warmer.cancel()
+    producer.cancel()
+    mover.cancel()
+    formation_jobs.close()
+    for hub in stream_hubs.values():
+        hub.close()
+
     if kafka_transport:
         logger.info("Stopping Kafka Client Transport...")
         await kafka_transport.stop()
@@ -98,192 +162,594 @@ app.add_middleware(
 )
 
 # State
-# Pods: 15 items. Default freeform random.
-PODS = []
-TARGET_PODS = []
-FORMATION = "FREEFORM"
+# Pods: POD_COUNT items (default 15). Default freeform random.
+# Positions, targets and versions live in an array-backed store indexed by id.
+POD_COUNT = int(os.getenv("POD_COUNT", "15"))
+pods = PodStore(formation="FREEFORM")
+# Moves pods toward their targets at MOTION_TICK_HZ (see motion.py)
+motion = MotionEngine(pods)
+# Neighbour and region queries (see spatial.py)
+spatial = SpatialIndex(pods)
 
 # Global Transport
 kafka_transport = None
+# Every agent request goes through this (see request_pipeline.py):
+# AGENT_MAX_IN_FLIGHT outstanding at once, AGENT_TIMEOUT seconds each
+agent_requests = RequestPipeline(
+    max_in_flight=int(os.getenv("AGENT_MAX_IN_FLIGHT", "16")),
+    timeout=float(os.getenv("AGENT_TIMEOUT", "60")),
+)
+
+# Stream tuning: how often changes are published, and how often a full
+# snapshot is sent even if nothing moved
+STREAM_INTERVAL = float(os.getenv("STREAM_INTERVAL", "0.1"))
+STREAM_SNAPSHOT_INTERVAL = float(os.getenv("STREAM_SNAPSHOT_INTERVAL", "30"))
+
+# Encoded snapshots, per encoding: (event id, frame)
+_snapshot_cache = {}
+WS_ENCODING = "binary"
+
+def encode_pods_frame(encoding, frame):
+    """Encodes a PodFrame from the store in the given wire encoding."""
+    if encoding == WS_ENCODING:
+        return encode_binary_frame(frame.ids, frame.xs, frame.ys, frame.meta())
+    return encode_frame(
+        encoding, frame.ids, frame.xs, frame.ys, frame.meta(), frame.event_id
+    )
+
+def snapshot_frame(encoding):
+    """Full state at the current version, encoded once per version."""
+    version, frame = _snapshot_cache.get(encoding, (None, b""))
+    if version != pods.event_id():
+        frame = encode_pods_frame(encoding, pods.snapshot())
+        _snapshot_cache[encoding] = (pods.event_id(), frame)
+    return frame
+
+# Shared fan-out, one hub per wire encoding (the SSE ones plus the binary
+# /ws frames): the producer encodes each frame once per encoding in use,
+# every client subscribes to its encoding's hub. A client that falls behind
+# is resynced with a snapshot, since skipping a delta would lose changes.
+STREAM_MAX_QUEUE = int(os.getenv("STREAM_MAX_QUEUE", "64"))
+stream_hubs = {
+    encoding: BroadcastHub(
+        max_queue=STREAM_MAX_QUEUE,
+        resync=lambda encoding=encoding: snapshot_frame(encoding),
+    )
+    for encoding in (*ENCODINGS, WS_ENCODING)
+}
+
+def publish_job(job):
+    """Sends a formation job update to every /stream and /ws client."""
+    payload = job.to_dict()
+    for encoding, hub in stream_hubs.items():
+        if not hub.subscriber_count:
+            continue
+        if encoding == WS_ENCODING:
+            hub.publish(encode_binary_job(payload))
+        else:
+            hub.publish(encode_sse("formation_job", json.dumps(payload)))
+
+# Formation requests run as background jobs, newest wins (see jobs.py)
+formation_jobs = FormationJobs(on_update=publish_job)
+
+# Agent answers by formation name, pod count and canvas (see
+# formation_cache.py); FORMATION_CACHE_PATH="" keeps them in memory only.
+# FORMATION_CACHE_WARM lists custom shapes to fetch at startup.
+formation_cache = FormationCache(os.getenv("FORMATION_CACHE_PATH", "formation_cache.json") or None)
+FORMATION_CACHE_WARM = [
+    name for name in os.getenv("FORMATION_CACHE_WARM", "").split(",") if name.strip()
+]
 
 class FormationRequest(BaseModel):
     formation: str
+    # Skip the formation cache and ask the agent again
+    regenerate: bool = False
 
 def init_pods():
-    global PODS, TARGET_PODS
-    PODS = [{"id": i, "x": random.randint(50, 850), "y": random.randint(100, 600)} for i in range(15)]
-    TARGET_PODS = [p.copy() for p in PODS]
+    pods.reset(
+        np.random.randint(50, 851, POD_COUNT),
+        np.random.randint(100, 601, POD_COUNT),
+    )
+
+def retarget(xs, ys):
+    """Sends pods to a new set of slots, each slot to the closest-fitting pod.
+
+    Slots are matched to pods to minimize the total travel distance instead
+    of slot i going to pod i. Extra slots or pods are left out.
+
+    Returns:
+        Matching stats: runtime and travel distance against slot i -> pod i.
+    """
+    sx = np.asarray(xs, dtype=np.float64)
+    sy = np.asarray(ys, dtype=np.float64)
+    count = min(len(sx), len(pods))
+    sx, sy = sx[:count], sy[:count]
+    px, py = (a[:count] for a in pods.positions())
+    started = time.perf_counter()
+    slot = assign_slots(px, py, sx, sy)
+    elapsed_ms = (time.perf_counter() - started) * 1e3
+    pods.set_targets(sx[slot], sy[slot])
+
+    naive, _ = travel(px, py, sx, sy)
+    matched, longest = travel(px, py, sx, sy, slot)
+    stats = {
+        "pods": count,
+        "ms": round(elapsed_ms, 2),
+        "travel": round(matched),
+        "travel_saved": round(naive - matched),
+        "longest_move": round(longest),
+    }
+    logger.info(f"Assigned {count} slots in {elapsed_ms:.1f} ms, travel {naive:.0f} -> {matched:.0f} px")
+    return stats
 
 init_pods()
 
+async def stream_producer():
+    """Publishes the pods changed on each tick, plus periodic full snapshots."""
+    loop = asyncio.get_running_loop()
+    last_snapshot = loop.time()
+    published = pods.version
+    while True:
+        try:
+            await asyncio.sleep(STREAM_INTERVAL)
+            changed = None
+            if pods.version != published:
+                changed = pods.changed_since(published)
+                published = changed.version
+            active = {e: h for e, h in stream_hubs.items() if h.subscriber_count}
+            if not active:
+                continue
+
+            now = loop.time()
+            send_snapshot = now - last_snapshot >= STREAM_SNAPSHOT_INTERVAL
+            if send_snapshot:
+                last_snapshot = now
+            for encoding, hub in active.items():
+                if send_snapshot:
+                    hub.publish(snapshot_frame(encoding))
+                elif changed is not None:
+                    hub.publish(encode_pods_frame(encoding, changed))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"SSE producer error: {e}")
+
 @app.get("/stream")
-async def message_stream(request: Request):
+async def message_stream(
+    request: Request, encoding: str = "events", last_event_id: str = None
+):
+    """Pod stream; see frames.py for the available encodings."""
+    if encoding not in ENCODINGS:
+        raise HTTPException(
+            status_code=400, detail=f"encoding must be one of {', '.join(ENCODINGS)}"
+        )
+    hub = stream_hubs[encoding]
+    # Browsers send Last-Event-ID when EventSource reconnects on its own; the
+    # query parameter covers clients that reconnect manually.
+    resume_id = request.headers.get("last-event-id") or last_event_id
+
+    def initial_frame():
+        since = pods.parse_event_id(resume_id)
+        if since is None:
+            return snapshot_frame(encoding)
+        if since == pods.version:
+            return None
+        return encode_pods_frame(encoding, pods.changed_since(since))
+
     async def event_generator():
         logger.info("New SSE stream connected")
         try:
-            while True:
-                # payload copy to avoid race conditions if PODS validation changes
-                current_pods = list(PODS) 
-                
-                # Send updates one by one to simulate low bandwidth / scanning
-                for pod in current_pods:
-                     payload = {"pod": pod}
-                     yield {
-                         "event": "pod_update",
-                         "data": json.dumps(payload)
-                     }
-                     # trickling updates
-                     await asyncio.sleep(0.02) 
-                
-                # Send formation info occasionally
-                yield {
-                    "event": "formation_update",
-                    "data": json.dumps({"formation": FORMATION})
-                }
-                
-                # Main loop delay
-                await asyncio.sleep(0.5)
-                
+            async for frame in hub.subscribe(initial_frame):
+                yield frame
         except asyncio.CancelledError:
              logger.info("SSE stream disconnected (cancelled)")
         except Exception as e:
              logger.error(f"SSE stream error: {e}")
-             # Don't re-raise, checking if this stabilizes the connection close
-             
+
     return EventSourceResponse(event_generator())
 
-@app.post("/formation")
+@app.get("/stream/viewport")
+async def viewport_stream(
+    x0: float, y0: float, x1: float, y1: float, encoding: str = "json"
+):
+    """Pod stream limited to the pods inside a viewport rectangle.
+
+    Starts with a snapshot of the pods in view. Each later frame carries the
+    pods that changed in view, plus pods that just left it (with their new,
+    out-of-view position) so clients can drop them.
+    """
+    if encoding not in ENCODINGS:
+        raise HTTPException(
+            status_code=400, detail=f"encoding must be one of {', '.join(ENCODINGS)}"
+        )
+
+    async def event_generator():
+        logger.info(f"New viewport stream connected: ({x0}, {y0}) - ({x1}, {y1})")
+        try:
+            inside = spatial.in_rect(x0, y0, x1, y1)
+            frame = pods.select(inside)
+            sent = frame.version
+            yield encode_pods_frame(encoding, frame)
+            while True:
+                await asyncio.sleep(STREAM_INTERVAL)
+                if pods.version == sent:
+                    continue
+                now_inside = spatial.in_rect(x0, y0, x1, y1)
+                frame = pods.select(np.union1d(inside, now_inside), since=sent)
+                inside, sent = now_inside, frame.version
+                if len(frame):
+                    yield encode_pods_frame(encoding, frame)
+        except asyncio.CancelledError:
+             logger.info("Viewport stream disconnected (cancelled)")
+        except Exception as e:
+             logger.error(f"Viewport stream error: {e}")
+
+    return EventSourceResponse(event_generator())
+
+@app.get("/metrics/stream")
+async def stream_metrics():
+    """Subscriber count, skipped frames and state version of the SSE stream."""
+    return {
+        "version": pods.event_id(),
+        "pods": len(pods),
+        "encodings": {e: hub.metrics() for e, hub in stream_hubs.items()},
+    }
+
+@app.get("/metrics/motion")
+async def motion_metrics():
+    """Tick rate, tick cost and number of moving pods."""
+    return motion.metrics()
+
+@app.get("/pods/near")
+async def pods_near(x: float, y: float, radius: float = 50.0, limit: int = None):
+    """Pods within `radius` of (x, y), closest first."""
+    if radius < 0 or (limit is not None and limit < 0):
+        raise HTTPException(status_code=400, detail="radius and limit must not be negative")
+    ids, distances = spatial.near(x, y, radius, limit)
+    found = pods.select(ids).to_dicts()
+    for pod, distance in zip(found, distances.tolist()):
+        pod["distance"] = round(distance, 2)
+    return {"count": len(found), "pods": found}
+
+@app.get("/pods/in_rect")
+async def pods_in_rect(x0: float, y0: float, x1: float, y1: float):
+    """Pods inside the rectangle spanned by (x0, y0) and (x1, y1)."""
+    found = pods.select(spatial.in_rect(x0, y0, x1, y1)).to_dicts()
+    return {"count": len(found), "pods": found}
+
+@app.post("/formation", status_code=202)
 async def set_formation(req: FormationRequest):
-    global FORMATION, PODS
-    FORMATION = req.formation
-    logger.info(f"Received formation request: {FORMATION}")
-    
+    """Starts a formation change and returns its job without waiting.
+
+    Progress and completion are sent as `formation_job` events on the pod
+    streams, and can be polled at /formation/jobs/{job_id}. A newer
+    formation request supersedes one that is still pending. Set
+    `regenerate` to skip the formation cache.
+    """
+    logger.info(f"Received formation request: {req.formation}")
+    job = formation_jobs.submit(
+        req.formation, lambda job: run_formation(job, regenerate=req.regenerate)
+    )
+    return job.to_dict()
+
+@app.get("/formation/jobs/{job_id}")
+async def formation_job_status(job_id: str):
+    job = formation_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown formation job {job_id}")
+    return job.to_dict()
+
+@app.post("/formation/jobs/{job_id}/cancel")
+async def cancel_formation_job(job_id: str):
+    """Cancels a pending or running job; finished jobs are returned as is."""
+    job = formation_jobs.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown formation job {job_id}")
+    return job.to_dict()
+
+@app.get("/metrics/agent")
+async def agent_metrics():
+    """In-flight agent requests, outcomes, reply latency and reply routing."""
+    return {
+        **agent_requests.metrics(),
+        "instance": DASHBOARD_INSTANCE_ID or None,
+        "reply_topic": REPLY_TOPIC,
+    }
+
+@app.get("/metrics/formation")
+async def formation_metrics():
+    """Formation job counts by outcome, and formation cache hits/misses."""
+    return {**formation_jobs.metrics(), "cache": formation_cache.metrics()}
+
+def response_text(response):
+    """Text of an A2A response or stream event, or None if it has none."""
+    content = None
+    if isinstance(response, Message):
+        content = getattr(response, "content", None)
+        if not content and response.parts:
+            content = getattr(response.parts[0].root, "text", None)
+
+    elif isinstance(response, Task):
+        # Check for artifacts (common for structured output)
+        if response.artifacts:
+            for art in response.artifacts:
+                if art.parts:
+                     # root.text because Part is a RootModel[TextPart|...]
+                     if hasattr(art.parts[0].root, 'text'):
+                         content = art.parts[0].root.text
+                         break
+        
+        # Fallback to history
+        if not content and response.history:
+            for msg in reversed(response.history):
+                 if msg.role == "agent" and msg.parts:
+                      if hasattr(msg.parts[0].root, 'text'):
+                           content = msg.parts[0].root.text
+                           break
+
+    elif isinstance(response, TaskArtifactUpdateEvent):
+        parts = response.artifact.parts
+        if parts and hasattr(parts[0].root, "text"):
+            content = parts[0].root.text
+
+    elif isinstance(response, TaskStatusUpdateEvent):
+        # Streamed text arrives as "working" status messages
+        message = response.status.message
+        if message and message.parts and hasattr(message.parts[0].root, "text"):
+            content = message.parts[0].root.text
+    return content
+
+def failure_reason(response):
+    """Why the agent's task failed, or None if the response is no failure."""
+    status = getattr(response, "status", None)
+    if status is None or status.state not in (TaskState.failed, TaskState.rejected, TaskState.canceled):
+        return None
+    message = status.message
+    if message and message.parts and hasattr(message.parts[0].root, "text"):
+        return f"{status.state.value}: {message.parts[0].root.text}"
+    return status.state.value
+
+async def ask_agent(formation, on_points=None):
+    """Asks the formation agent for a shape, streaming its answer.
+
+    Args:
+        formation: Formation name for the prompt.
+        on_points: Called with each batch of streamed coordinates (clamped
+            to the safe area) as soon as they are complete. They are not
+            checked yet; if ask_agent raises, the caller must undo them.
+
+    Returns:
+        All coordinates of the final answer as (x, y) tuples, exactly as the
+        agent sent them: validate (FormationCache.validate) before clamping.
+
+    Raises:
+        RuntimeError: The agent's task failed, or its answer is truncated or
+            holds no coordinates.
+    """
     if not kafka_transport:
         logger.error("Kafka Transport is not initialized!")
-        return {"status": "error", "message": "Backend Not Connected"}
+        raise RuntimeError("Backend Not Connected")
+
+    # Construct A2A Message
+    # The agent expects a natural language prompt
+    prompt = f"Create a {formation} formation"
+    logger.info(f"Sending A2A Message: '{prompt}'")
+    
+    # Correctly structure the message params
+    from a2a.types import TextPart, Part, Role
+    import uuid
+    
+    # Create Message ID
+    msg_id = str(uuid.uuid4())
+    
+    # Create Message Parts with Part wrapper
+    message_parts = [Part(TextPart(text=prompt))]
+    
+    # Create Message Object (Strict Schema)
+    msg_obj = Message(
+        message_id=msg_id,
+        role=Role.user,
+        parts=message_parts
+    )
     
+    message_params = MessageSendParams(
+        message=msg_obj
+    )
+    
+    # Stream the answer and hand out each coordinate as soon as it is
+    # complete. The pipeline applies the per-request deadline. Partial
+    # "working" status updates carry the next chunk of text; the final
+    # artifact, task or message repeats the whole answer, which is parsed
+    # on its own and is what the job keeps.
+    coords = CoordinateStream()
+    answer = None
+
+    def check(response):
+        reason = failure_reason(response)
+        if reason is not None:
+            raise RuntimeError(f"Formation agent failed: {reason}")
+
     try:
-        # Construct A2A Message
-        # The agent expects a natural language prompt
-        prompt = f"Create a {FORMATION} formation"
-        logger.info(f"Sending A2A Message: '{prompt}'")
-        
-        # Correctly structure the message params
-        from a2a.types import TextPart, Part, Role
-        import uuid
-        
-        # Create Message ID
-        msg_id = str(uuid.uuid4())
-        
-        # Create Message Parts with Part wrapper
-        message_parts = [Part(TextPart(text=prompt))]
-        
-        # Create Message Object (Strict Schema)
-        msg_obj = Message(
-            message_id=msg_id,
-            role=Role.user,
-            parts=message_parts
-        )
-        
-        message_params = MessageSendParams(
-            message=msg_obj
-        )
-        
-        # Send and Wait for Response
-        # Timeout increased to 120s for GenAI latency using Context State
-        ctx = ClientCallContext()
-        ctx.state["kafka_timeout"] = 120.0
-        response = await kafka_transport.send_message(message_params, context=ctx)
-        
-        logger.info("Received A2A Response.")
-        
+        async for event in agent_requests.send_message_streaming(message_params):
+            check(event)
+            text = response_text(event)
+            if not text:
+                continue
+            if isinstance(event, TaskStatusUpdateEvent) and event.status.state == TaskState.working:
+                points = coords.feed(text)
+                if points and on_points is not None:
+                    # The agent clamps its final answer; streamed chunks are raw.
+                    on_points(list(zip(*formations.clamp(*zip(*points)))))
+            else:
+                answer = text
+    except NotImplementedError:
+        # Transport without streaming: wait for the whole answer.
+        response = await agent_requests.send_message(message_params)
         logger.info(f"Received A2A Response type: {type(response)}")
+        check(response)
+        answer = response_text(response)
+        if not answer:
+            raise RuntimeError(f"Could not extract content from response type {type(response)}")
 
-        content = None
-        if isinstance(response, Message):
-            content = response.content 
-            if not content and response.parts:
-                content = response.parts[0].root.text
-                
-        elif isinstance(response, Task):
-            # Check for artifacts (common for structured output)
-            if response.artifacts:
-                for art in response.artifacts:
-                    if art.parts:
-                         # root.text because Part is a RootModel[TextPart|...]
-                         if hasattr(art.parts[0].root, 'text'):
-                             content = art.parts[0].root.text
-                             break
-            
-            # Fallback to history
-            if not content and response.history:
-                for msg in reversed(response.history):
-                     if msg.role == "agent" and msg.parts:
-                          if hasattr(msg.parts[0].root, 'text'):
-                               content = msg.parts[0].root.text
-                               break
-
-        if content:
-            logger.info(f"Response Content: {content[:100]}...")
-            
-            try:
-                # content is likely the JSON string
-                clean_content = content.replace("```json", "").replace("```", "").strip()
-                coords = json.loads(clean_content)
-                
-                if isinstance(coords, list):
-                    logger.info(f"Parsed {len(coords)} coordinates.")
-                    for i, pod_target in enumerate(coords):
-                        if i < len(PODS):
-                            PODS[i]["x"] = pod_target["x"]
-                            PODS[i]["y"] = pod_target["y"]
-                            await asyncio.sleep(0.05)
-                    return {"status": "success", "formation": FORMATION}
-                else:
-                    logger.error("Response JSON is not a list.")
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse Agent JSON response: {e}")
-        else:
-            logger.error(f"Could not extract content from response type {type(response)}")
+    if answer is not None:
+        points, complete = parse_coordinates(answer)
+    else:
+        # No final answer event: fall back to the streamed text.
+        points, complete = coords.points, coords.done
+    if not points:
+        raise RuntimeError("Agent response contained no coordinates.")
+    if not complete:
+        raise RuntimeError(f"Agent response was cut off after {len(points)} coordinates.")
+    logger.info(f"Parsed {len(points)} coordinates.")
+    return points
 
-    except Exception as e:
-        logger.error(f"Error calling agent via Kafka: {e}")
-        return {"status": "error", "message": str(e)}
+async def run_formation(job, regenerate=False):
+    """Formation job body: computes the targets and hands them to the pods."""
+    formation = job.formation
+    pods.set_formation(formation)
+
+    # Built-in shapes are closed-form: compute them locally, no LLM round trip.
+    local = formations.generate(formation, len(pods))
+    if local is not None:
+        return {"source": "local", "assignment": retarget(*local)}
+
+    cached = formation_cache.get(formation, len(pods), bypass=regenerate)
+    if cached is not None:
+        return {"source": "cache", "assignment": retarget(*zip(*cached))}
+
+    # Apply each coordinate as soon as the agent streams it; the job is
+    # cancelled if superseded.
+    formation_jobs.report(job, stage="agent")
+    started = time.perf_counter()
+    placer = StreamingPlacer(pods)
+    first_target_ms = None
+
+    def on_points(points):
+        nonlocal first_target_ms
+        placer.place(points)
+        if first_target_ms is None:
+            first_target_ms = (time.perf_counter() - started) * 1e3
+            logger.info(f"First formation target applied after {first_target_ms:.0f} ms")
+        formation_jobs.report(job, stage="streaming", applied=placer.placed)
+
+    try:
+        points = await ask_agent(formation, on_points)
+    except BaseException:
+        # Failed, timed out or cancelled: take back the streamed slots.
+        placer.rollback()
+        raise
+    # Only cache the answer if it is valid as sent. Clamped, an answer with
+    # pods off the canvas would always pass.
+    cached = formation_cache.put(formation, len(pods), points)
+    # Streaming placed each slot greedily; now that all slots are known,
+    # re-match them optimally. The motion engine glides the pods there
+    # and the stream sends their positions as deltas.
+    stats = retarget(*formations.clamp(*zip(*points)))
+    return {
+        "source": "agent",
+        "cached": cached,
+        "assignment": stats,
+        # None when the transport does not stream.
+        "first_target_ms": None if first_target_ms is None else round(first_target_ms, 1),
+        "agent_ms": round((time.perf_counter() - started) * 1e3, 1),
+    }
+
+async def warm_formation_cache():
+    """Asks the agent for every FORMATION_CACHE_WARM shape not cached yet."""
+    for name in FORMATION_CACHE_WARM:
+        if formations.is_builtin(name) or formation_cache.has(name, len(pods)):
+            continue
+        try:
+            if formation_cache.put(name, len(pods), await ask_agent(name)):
+                logger.info(f"Pre-warmed formation cache with {name}")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Failed to pre-warm formation {name}: {e}")
 
 class PodUpdate(BaseModel):
-    id: int
-    x: int
-    y: int
+    id: int = Field(ge=0)
+    x: int = Field(ge=COORD_MIN, le=COORD_MAX)
+    y: int = Field(ge=COORD_MIN, le=COORD_MAX)
+
+def apply_pod_edit(pod_id, x, y):
+    """Moves a pod by hand; returns False if there is no pod with that id."""
+    pods.set_formation("RANDOM")
+
+    # Update both current and target to stop it from drifting back
+    # effectively "teleporting" it or re-anchoring it.
+    # The stream producer picks the change up on its next tick.
+    return pods.move(pod_id, x, y)
 
 @app.post("/update_pod")
 async def update_pod_manual(update: PodUpdate):
     """Manual override for drag-and-drop."""
-    global FORMATION
-    FORMATION = "RANDOM"
-    
-    # Find the pod and update both current and target to stop it from drifting back
-    # effectively "teleporting" it or re-anchoring it.
-    found = False
-    for p in PODS:
-        if p["id"] == update.id:
-            p["x"] = update.x
-            p["y"] = update.y
-            found = True
-            break
-            
-    for t in TARGET_PODS:
-        if t["id"] == update.id:
-            t["x"] = update.x
-            t["y"] = update.y
-            break
-            
-    if found:
-        # Force immediate update push?
-        # The stream loop will pick it up, but we could trigger it.
-        pass
-        
+    apply_pod_edit(update.id, update.x, update.y)
     return {"status": "updated", "id": update.id}
 
+@app.websocket("/ws")
+async def pod_socket(websocket: WebSocket):
+    """Binary pod stream plus in-order pod edits over one connection.
+
+    Carries the same versioned frames as /stream (format in frames.py).
+    Drag edits arrive as binary edit messages (or JSON text
+    `{"seq": n, "pods": [[id, x, y], ...]}`) and are acked by seq once
+    applied. Clients should coalesce drags to the latest position per pod
+    between sends.
+    """
+    await websocket.accept()
+    logger.info("New pod WebSocket connected")
+    hub = stream_hubs[WS_ENCODING]
+    send_lock = asyncio.Lock()
+
+    async def send(data):
+        async with send_lock:
+            await websocket.send_bytes(data)
+
+    async def send_frames():
+        async for frame in hub.subscribe(lambda: snapshot_frame(WS_ENCODING)):
+            await send(frame)
+
+    async def receive_edits():
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            try:
+                if message.get("bytes") is not None:
+                    seq, ids, xs, ys = decode_binary_edit(message["bytes"])
+                    edits = zip(ids.tolist(), xs.tolist(), ys.tolist())
+                else:
+                    seq, edits = decode_json_edit(message["text"])
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Dropping malformed pod edit: {e}")
+                continue
+            for pod_id, x, y in edits:
+                apply_pod_edit(pod_id, x, y)
+            await send(encode_binary_ack(seq))
+
+    # Whichever side stops first ends the connection, so a failed sender
+    # does not leave the socket taking edits with no frames going out.
+    sender = asyncio.create_task(send_frames())
+    receiver = asyncio.create_task(receive_edits())
+    try:
+        await asyncio.wait((sender, receiver), return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in (sender, receiver):
+            task.cancel()
+        results = await asyncio.gather(sender, receiver, return_exceptions=True)
+        failed = False
+        for name, result in zip(("sender", "receiver"), results):
+            if isinstance(result, Exception) and not isinstance(result, WebSocketDisconnect):
+                logger.error(f"Pod WebSocket {name} failed: {result!r}")
+                failed = True
+        if failed:
+            try:
+                await websocket.close(code=1011)
+            except Exception:
+                pass
+        logger.info("Pod WebSocket disconnected")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
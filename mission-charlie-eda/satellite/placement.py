@@ -0,0 +1,48 @@
+"""Provisional placement of streamed formation slots.
+
+While the agent streams a formation, each coordinate is sent to the
+nearest pod that has no slot yet, so pods start moving before the answer
+is complete. Those targets are provisional: if the answer fails or the job
+is abandoned, `rollback` restores what the placed pods were heading to
+before. Once the whole answer is known, main.py re-matches every slot with
+`assign_slots`.
+"""
+
+import logging
+
+import numpy as np
+
+from pod_store import PodStore
+
+logger = logging.getLogger("satellite_dashboard")
+
+
+class StreamingPlacer:
+    """Sends each streamed slot to the nearest pod that has no slot yet."""
+
+    def __init__(self, store: PodStore):
+        self.store = store
+        self.free = np.ones(len(store), dtype=bool)
+        self.placed = 0
+        self._saved = tuple(a.copy() for a in store.targets())
+
+    def place(self, points) -> None:
+        px, py = self.store.positions()
+        for x, y in points:
+            candidates = np.flatnonzero(self.free)
+            if not candidates.size:
+                return
+            dist2 = (px[candidates] - x) ** 2 + (py[candidates] - y) ** 2
+            pod_id = candidates[np.argmin(dist2)]
+            self.free[pod_id] = False
+            self.placed += 1
+            self.store.set_targets([x], [y], ids=[pod_id])
+
+    def rollback(self) -> None:
+        """Restores the targets the placed pods had before this placer."""
+        ids = np.flatnonzero(~self.free)
+        if ids.size:
+            self.store.set_targets(self._saved[0][ids], self._saved[1][ids], ids=ids)
+            logger.info(f"Rolled back {ids.size} streamed formation targets")
+        self.free[:] = True
+        self.placed = 0
@@ -0,0 +1,230 @@
+"""Array-backed pod state with O(1) id lookup and versioned snapshots.
+
+Pods live in one NumPy structured array indexed by pod id (ids are dense,
+0..count-1): current position, target position and the version at which the
+pod last changed. Bulk updates are single vectorized assignments, and the
+store scales to 100k+ pods. Targets are reached by the motion engine
+(motion.py); `assign` and `move` place pods directly.
+
+Every mutation bumps a global version and stamps it on the pods it changed,
+so `changed_since(version)` returns exactly what a client at that version is
+missing. Stream event ids are "<epoch>-<version>"; the epoch changes on every
+process start, so an id from an earlier run resumes from a full snapshot.
+
+All methods are synchronous and the satellite runs on one event loop, so a
+snapshot is never torn by a concurrent update.
+"""
+
+import dataclasses
+import uuid
+from typing import Optional
+
+import numpy as np
+
+POD_DTYPE = np.dtype([
+    ("x", "f4"),
+    ("y", "f4"),
+    ("tx", "f4"),
+    ("ty", "f4"),
+    ("version", "i8"),
+])
+
+
+@dataclasses.dataclass(frozen=True)
+class PodFrame:
+    """Pods at one version, as wire-ready integer arrays."""
+
+    version: int
+    event_id: str
+    formation: str
+    snapshot: bool
+    ids: np.ndarray
+    xs: np.ndarray
+    ys: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def meta(self) -> dict:
+        return {
+            "formation": self.formation,
+            "version": self.version,
+            "snapshot": self.snapshot,
+        }
+
+    def to_dicts(self) -> list[dict]:
+        return [
+            {"id": i, "x": x, "y": y}
+            for i, x, y in zip(self.ids.tolist(), self.xs.tolist(), self.ys.tolist())
+        ]
+
+
+class PodStore:
+    def __init__(self, count: int = 0, formation: str = "FREEFORM"):
+        self.epoch = uuid.uuid4().hex[:8]
+        self.version = 0
+        self._formation = formation
+        self._pods = np.zeros(count, dtype=POD_DTYPE)
+
+    def __len__(self) -> int:
+        return len(self._pods)
+
+    @property
+    def formation(self) -> str:
+        return self._formation
+
+    def _bump(self) -> int:
+        self.version += 1
+        return self.version
+
+    def reset(self, xs, ys, formation: Optional[str] = None) -> None:
+        """Replaces the fleet with pods at `xs`, `ys` (ids 0..len-1)."""
+        pods = np.zeros(len(xs), dtype=POD_DTYPE)
+        pods["x"] = pods["tx"] = xs
+        pods["y"] = pods["ty"] = ys
+        pods["version"] = self._bump()
+        self._pods = pods
+        if formation is not None:
+            self._formation = formation
+
+    def set_formation(self, formation: str) -> None:
+        if formation != self._formation:
+            self._formation = formation
+            self._bump()
+
+    def get(self, pod_id: int) -> Optional[dict]:
+        if not 0 <= pod_id < len(self._pods):
+            return None
+        pod = self._pods[pod_id]
+        return {"id": pod_id, "x": int(round(pod["x"])), "y": int(round(pod["y"]))}
+
+    def move(self, pod_id: int, x: float, y: float) -> bool:
+        """Places one pod (position and target); False if the id is unknown."""
+        if not 0 <= pod_id < len(self._pods):
+            return False
+        pod = self._pods[pod_id]
+        pod["x"] = pod["tx"] = x
+        pod["y"] = pod["ty"] = y
+        pod["version"] = self._bump()
+        return True
+
+    def _select(self, xs, ys, ids):
+        """Normalizes bulk-update arguments, dropping unknown ids."""
+        xs = np.asarray(xs, dtype="f4")
+        ys = np.asarray(ys, dtype="f4")
+        if ids is None:
+            ids = np.arange(min(len(xs), len(self._pods)))
+            return ids, xs[: len(ids)], ys[: len(ids)]
+        ids = np.asarray(ids, dtype=np.int64)
+        valid = (ids >= 0) & (ids < len(self._pods))
+        return ids[valid], xs[valid], ys[valid]
+
+    def assign(self, xs, ys, ids=None) -> int:
+        """Places many pods at once (positions and targets).
+
+        Args:
+            xs, ys: New coordinates.
+            ids: Pod ids to place; defaults to the first len(xs) pods.
+
+        Returns:
+            The number of pods that actually moved.
+        """
+        ids, xs, ys = self._select(xs, ys, ids)
+        pods = self._pods
+        moved = (pods["x"][ids] != xs) | (pods["y"][ids] != ys)
+        pods["x"][ids] = pods["tx"][ids] = xs
+        pods["y"][ids] = pods["ty"][ids] = ys
+        count = int(np.count_nonzero(moved))
+        if count:
+            pods["version"][ids[moved]] = self._bump()
+        return count
+
+    def set_targets(self, xs, ys, ids=None) -> None:
+        """Sets where pods should travel to; the motion engine moves them."""
+        ids, xs, ys = self._select(xs, ys, ids)
+        self._pods["tx"][ids] = xs
+        self._pods["ty"][ids] = ys
+
+    def positions(self) -> tuple[np.ndarray, np.ndarray]:
+        """Current (x, y) arrays; views, do not modify."""
+        return self._pods["x"], self._pods["y"]
+
+    def targets(self) -> tuple[np.ndarray, np.ndarray]:
+        """Target (x, y) arrays; views, do not modify."""
+        return self._pods["tx"], self._pods["ty"]
+
+    def update_positions(self, ids, xs, ys) -> int:
+        """Moves pods without touching their targets (motion engine output).
+
+        Only pods whose rounded, on-the-wire position changed get the new
+        version, so sub-pixel motion does not generate stream traffic.
+
+        Returns:
+            The number of pods stamped.
+        """
+        pods = self._pods
+        old_x = np.rint(pods["x"][ids])
+        old_y = np.rint(pods["y"][ids])
+        pods["x"][ids] = xs
+        pods["y"][ids] = ys
+        visible = (np.rint(pods["x"][ids]) != old_x) | (np.rint(pods["y"][ids]) != old_y)
+        count = int(np.count_nonzero(visible))
+        if count:
+            pods["version"][ids[visible]] = self._bump()
+        return count
+
+    def _frame(self, index, snapshot: bool) -> PodFrame:
+        pods = self._pods[index]
+        if isinstance(index, slice):
+            ids = np.arange(len(self._pods))[index]
+        elif index.dtype == bool:
+            ids = np.flatnonzero(index)
+        else:
+            ids = index
+        return PodFrame(
+            version=self.version,
+            event_id=self.event_id(),
+            formation=self._formation,
+            snapshot=snapshot,
+            ids=ids,
+            xs=np.rint(pods["x"]).astype(np.int32),
+            ys=np.rint(pods["y"]).astype(np.int32),
+        )
+
+    def snapshot(self) -> PodFrame:
+        """Every pod at the current version."""
+        return self._frame(slice(None), snapshot=True)
+
+    def changed_since(self, version: int) -> PodFrame:
+        """Pods changed after `version`, stamped with the current version."""
+        return self._frame(self._pods["version"] > version, snapshot=False)
+
+    def changed_ids(self, version: int) -> np.ndarray:
+        """Ids of pods changed after `version`."""
+        return np.flatnonzero(self._pods["version"] > version)
+
+    def select(self, ids, since: Optional[int] = None) -> PodFrame:
+        """The given pods, or only those changed after `since` if set.
+
+        Without `since` the frame is a snapshot of just these pods.
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        if since is not None:
+            ids = ids[self._pods["version"][ids] > since]
+        return self._frame(ids, snapshot=since is None)
+
+    def to_dicts(self) -> list[dict]:
+        return self.snapshot().to_dicts()
+
+    def event_id(self) -> str:
+        return f"{self.epoch}-{self.version}"
+
+    def parse_event_id(self, event_id: Optional[str]) -> Optional[int]:
+        """Returns the version a client resumes from, or None if unusable."""
+        if not event_id:
+            return None
+        epoch, _, version = event_id.strip().partition("-")
+        if epoch != self.epoch or not version.isdigit():
+            return None
+        version = int(version)
+        return version if version <= self.version else None
@@ -0,0 +1,215 @@
+"""Pipelined agent requests over the A2A Kafka client transport.
+
+All formation requests share one `KafkaClientTransport` and its reply
+topic. The transport matches each reply to its request by correlation id.
+`RequestPipeline` sits on top of it and makes the concurrency explicit:
+
+  - up to `max_in_flight` requests are outstanding at once; further
+    callers queue (in order) instead of piling onto the broker;
+  - every request carries its own deadline (`timeout`, overridable per
+    call) for the whole exchange, including a streamed answer, instead of
+    a fixed 120 s block. The deadline is also passed to the transport as
+    `kafka_timeout`, so its pending reply is dropped at the same time;
+  - each request is tagged with a correlation id (the A2A message id),
+    which is also used in logs and errors;
+  - metrics: in-flight and queued counts, the peak in-flight, outcomes,
+    and latency percentiles for time to first reply and full reply.
+
+"First reply" is the first event that carries output or ends the task. A
+streaming agent acknowledges at once (a submitted task, a working status
+with no message), before it has generated anything; acknowledgments do not
+count.
+"""
+
+import asyncio
+import collections
+import contextlib
+import logging
+import time
+from typing import Any, AsyncIterator, Optional
+
+from a2a.client.middleware import ClientCallContext
+from a2a.types import (
+    MessageSendParams,
+    Role,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+
+logger = logging.getLogger("satellite_dashboard")
+
+LATENCY_SAMPLES = 1000
+
+PENDING_STATES = (TaskState.submitted, TaskState.working)
+
+
+def _percentiles(samples) -> dict:
+    if not samples:
+        return {"p50": None, "p95": None, "p99": None}
+    ordered = sorted(samples)
+
+    def pick(q):
+        return round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 1)
+
+    return {"p50": pick(0.50), "p95": pick(0.95), "p99": pick(0.99)}
+
+
+def has_content(event) -> bool:
+    """Whether a reply event carries output or ends the task."""
+    if isinstance(event, TaskArtifactUpdateEvent):
+        return True
+    if isinstance(event, TaskStatusUpdateEvent):
+        status = event.status
+    elif isinstance(event, Task):
+        if event.artifacts:
+            return True
+        status = event.status
+    else:
+        # A Message is a complete answer.
+        return True
+    if status.state not in PENDING_STATES:
+        return True
+    message = status.message
+    return bool(message and message.role == Role.agent and message.parts)
+
+
+class RequestPipeline:
+    """Bounded, deadline-aware request multiplexing over one transport.
+
+    Args:
+        transport: The A2A client transport; may be attached later.
+        max_in_flight: Requests outstanding on the transport at once.
+        timeout: Default deadline per request, in seconds.
+    """
+
+    def __init__(self, transport=None, max_in_flight: int = 16, timeout: float = 60.0):
+        self.transport = transport
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.queued = 0
+        self._counts = collections.Counter()
+        self._first_reply_ms = collections.deque(maxlen=LATENCY_SAMPLES)
+        self._reply_ms = collections.deque(maxlen=LATENCY_SAMPLES)
+
+    @contextlib.asynccontextmanager
+    async def _slot(self):
+        self.queued += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            yield
+        finally:
+            self.in_flight -= 1
+            self._slots.release()
+
+    def _context(self, correlation_id: str, timeout: float) -> ClientCallContext:
+        ctx = ClientCallContext()
+        ctx.state["kafka_timeout"] = timeout
+        ctx.state["correlation_id"] = correlation_id
+        return ctx
+
+    def _finish(self, outcome: str, correlation_id: str, started: float, error=None) -> None:
+        self._counts[outcome] += 1
+        if outcome == "completed":
+            self._reply_ms.append((time.perf_counter() - started) * 1e3)
+        elif outcome == "timeout":
+            logger.error(f"Agent request {correlation_id} timed out")
+        elif outcome == "failed":
+            logger.error(f"Agent request {correlation_id} failed: {error}")
+
+    async def send_message(
+        self, params: MessageSendParams, timeout: Optional[float] = None
+    ) -> Any:
+        """Sends one request and waits for its reply (or the deadline)."""
+        correlation_id = params.message.message_id
+        timeout = timeout or self.timeout
+        async with self._slot():
+            started = time.perf_counter()
+            try:
+                response = await asyncio.wait_for(
+                    self.transport.send_message(
+                        params, context=self._context(correlation_id, timeout)
+                    ),
+                    timeout,
+                )
+            except asyncio.TimeoutError:
+                self._finish("timeout", correlation_id, started)
+                raise TimeoutError(f"Agent request {correlation_id} timed out after {timeout:g} s")
+            except asyncio.CancelledError:
+                self._finish("cancelled", correlation_id, started)
+                raise
+            except Exception as e:
+                self._finish("failed", correlation_id, started, e)
+                raise
+            self._first_reply_ms.append((time.perf_counter() - started) * 1e3)
+            self._finish("completed", correlation_id, started)
+            return response
+
+    async def send_message_streaming(
+        self, params: MessageSendParams, timeout: Optional[float] = None
+    ) -> AsyncIterator[Any]:
+        """Sends one request and yields its streamed reply events.
+
+        The deadline covers the whole stream, not each event.
+        """
+        correlation_id = params.message.message_id
+        timeout = timeout or self.timeout
+        async with self._slot():
+            started = time.perf_counter()
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout
+            stream = self.transport.send_message_streaming(
+                params, context=self._context(correlation_id, timeout)
+            ).__aiter__()
+            first = True
+            try:
+                while True:
+                    try:
+                        event = await asyncio.wait_for(
+                            stream.__anext__(), max(deadline - loop.time(), 0)
+                        )
+                    except StopAsyncIteration:
+                        break
+                    if first and has_content(event):
+                        self._first_reply_ms.append((time.perf_counter() - started) * 1e3)
+                        first = False
+                    yield event
+            except asyncio.TimeoutError:
+                self._finish("timeout", correlation_id, started)
+                raise TimeoutError(f"Agent request {correlation_id} timed out after {timeout:g} s")
+            except (asyncio.CancelledError, GeneratorExit):
+                self._finish("cancelled", correlation_id, started)
+                raise
+            except NotImplementedError:
+                # No streaming in this transport: not an outcome, the caller
+                # falls back to send_message, which records one.
+                raise
+            except Exception as e:
+                self._finish("failed", correlation_id, started, e)
+                raise
+            finally:
+                # Drop the transport's pending reply if we stopped early.
+                if hasattr(stream, "aclose"):
+                    await stream.aclose()
+            self._finish("completed", correlation_id, started)
+
+    def metrics(self) -> dict:
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "peak_in_flight": self.peak_in_flight,
+            "queued": self.queued,
+            "timeout_s": self.timeout,
+            **{outcome: self._counts[outcome] for outcome in ("completed", "failed", "timeout", "cancelled")},
+            "first_reply_ms": _percentiles(self._first_reply_ms),
+            "reply_ms": _percentiles(self._reply_ms),
+        }
@@ -0,0 +1,141 @@
+"""Uniform-grid spatial index over pod positions.
+
+Answers "which pods are near this point" and "which pods are in this
+rectangle" without scanning the fleet. The index is built on the
+on-the-wire (rounded) positions, so answers match what clients see.
+
+Pods are bucketed into square cells of `cell_size` pixels, and pod ids are
+kept sorted by cell key (column-major, so one grid column is one contiguous
+run). A query covering k columns is k binary-search ranges plus an exact
+filter over the candidates in them. Pods outside `bounds` land in the edge
+cells, so every position is indexed.
+
+The index follows the store lazily. Before a query it re-buckets only the
+pods stamped since its last sync (see `PodStore.changed_ids`). A few moved
+pods (drags) are spliced into place. A fleet in motion re-sorts the
+already nearly sorted order, which is close to linear time. An idle fleet
+costs nothing.
+"""
+
+import math
+from typing import Optional
+
+import numpy as np
+
+from pod_store import PodStore
+
+
+class SpatialIndex:
+    def __init__(
+        self,
+        store: PodStore,
+        cell_size: float = 16.0,
+        bounds: tuple[float, float, float, float] = (0.0, 0.0, 1024.0, 768.0),
+    ):
+        self.store = store
+        self.cell_size = float(cell_size)
+        self.x_min, self.y_min, x_max, y_max = (float(b) for b in bounds)
+        self.columns = max(1, math.ceil((x_max - self.x_min) / self.cell_size))
+        self.rows = max(1, math.ceil((y_max - self.y_min) / self.cell_size))
+        self._version = None
+        self._xs = self._ys = np.empty(0, dtype=np.float32)
+        self._keys = np.empty(0, dtype=np.int32)
+        self._order = np.empty(0, dtype=np.int64)
+        self._sorted_keys = self._keys
+
+    def _column(self, x):
+        return np.clip(np.floor((x - self.x_min) / self.cell_size), 0, self.columns - 1).astype(np.int32)
+
+    def _row(self, y):
+        return np.clip(np.floor((y - self.y_min) / self.cell_size), 0, self.rows - 1).astype(np.int32)
+
+    def _sync(self) -> None:
+        store = self.store
+        if self._version == store.version:
+            return
+        x, y = store.positions()
+        if self._version is None or len(x) != len(self._keys):
+            # First use or a new fleet: bucket everything.
+            self._xs = np.rint(x)
+            self._ys = np.rint(y)
+            self._keys = self._column(self._xs) * self.rows + self._row(self._ys)
+            self._order = np.argsort(self._keys, kind="stable")
+            self._sorted_keys = self._keys[self._order]
+        else:
+            ids = store.changed_ids(self._version)
+            self._xs[ids] = np.rint(x[ids])
+            self._ys[ids] = np.rint(y[ids])
+            keys = self._column(self._xs[ids]) * self.rows + self._row(self._ys[ids])
+            moved = keys != self._keys[ids]
+            if moved.any():
+                self._rebucket(ids[moved], keys[moved])
+        self._version = store.version
+
+    def _ranges(self, first: np.ndarray, last: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+        """Positions in the sorted order of the keys in each [first, last].
+
+        Returns:
+            `(positions, counts)`: the ranges concatenated, and their sizes.
+        """
+        starts = np.searchsorted(self._sorted_keys, first, side="left")
+        counts = np.searchsorted(self._sorted_keys, last, side="right") - starts
+        offsets = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        return offsets + np.arange(int(counts.sum())), counts
+
+    def _rebucket(self, ids: np.ndarray, keys: np.ndarray) -> None:
+        if len(ids) * 64 >= len(self._keys):
+            # Many pods changed cells: re-sort the nearly sorted order.
+            self._keys[ids] = keys
+            order = self._order
+            self._order = order[np.argsort(self._keys[order], kind="stable")]
+            self._sorted_keys = self._keys[self._order]
+            return
+        # A few pods (e.g. drags): find them in their old cells, take them
+        # out and insert them back at their new cells.
+        old_keys = self._keys[ids]
+        positions, counts = self._ranges(old_keys, old_keys)
+        owner = np.repeat(ids, counts)
+        found = positions[self._order[positions] == owner]
+        order = np.delete(self._order, found)
+        sorted_keys = np.delete(self._sorted_keys, found)
+        self._keys[ids] = keys
+        by_key = np.argsort(keys, kind="stable")
+        at = np.searchsorted(sorted_keys, keys[by_key], side="right")
+        self._order = np.insert(order, at, ids[by_key])
+        self._sorted_keys = np.insert(sorted_keys, at, keys[by_key])
+
+    def _candidates(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Ids of pods in the cells overlapping the rectangle (a superset)."""
+        columns = np.arange(self._column(x0), self._column(x1) + 1, dtype=np.int32)
+        positions, _ = self._ranges(
+            columns * self.rows + self._row(y0), columns * self.rows + self._row(y1)
+        )
+        return self._order[positions]
+
+    def in_rect(self, x0: float, y0: float, x1: float, y1: float) -> np.ndarray:
+        """Sorted ids of pods with x0 <= x <= x1 and y0 <= y <= y1."""
+        x0, x1 = min(x0, x1), max(x0, x1)
+        y0, y1 = min(y0, y1), max(y0, y1)
+        self._sync()
+        ids = self._candidates(x0, y0, x1, y1)
+        xs = self._xs[ids]
+        ys = self._ys[ids]
+        inside = (xs >= x0) & (xs <= x1) & (ys >= y0) & (ys <= y1)
+        return np.sort(ids[inside])
+
+    def near(self, x: float, y: float, radius: float, limit: Optional[int] = None):
+        """Pods within `radius` of (x, y), closest first.
+
+        Returns:
+            `(ids, distances)` arrays, at most `limit` long if given.
+        """
+        self._sync()
+        ids = self._candidates(x - radius, y - radius, x + radius, y + radius)
+        dist = np.hypot(self._xs[ids] - x, self._ys[ids] - y)
+        close = dist <= radius
+        ids, dist = ids[close], dist[close]
+        if limit is not None and limit < len(ids):
+            nearest = np.argpartition(dist, limit)[:limit]
+            ids, dist = ids[nearest], dist[nearest]
+        order = np.lexsort((ids, dist))
+        return ids[order], dist[order]
@@ -0,0 +1,34 @@
+"""Tests for the streaming coordinate parser. Run pytest from satellite/."""
+
+from coord_stream import CoordinateStream, parse_coordinates
+
+ANSWER = '```json\n[[100,200],{"x": 300, "y": 400},[5,6]]\n```'
+
+
+def test_chunks_are_parsed_as_they_complete():
+    stream = CoordinateStream()
+    completed = [stream.feed(ANSWER[i:i + 7]) for i in range(0, len(ANSWER), 7)]
+    assert [p for batch in completed for p in batch] == [(100, 200), (300, 400), (5, 6)]
+    assert stream.done
+    # The first pair is out before the rest of the answer has arrived.
+    assert completed[2] == [(100, 200)]
+
+
+def test_chunk_starting_with_bracket_is_a_delta():
+    stream = CoordinateStream()
+    assert stream.feed("[") == []
+    assert stream.feed("[1,2],") == [(1, 2)]
+    assert stream.feed("[3,4]]") == [(3, 4)]
+    assert stream.points == [(1, 2), (3, 4)]
+
+
+def test_malformed_elements_are_skipped():
+    points, complete = parse_coordinates('[[1,2],["a"],{"x":3},[3,4]]')
+    assert points == [(1, 2), (3, 4)]
+    assert complete
+
+
+def test_truncated_answer_is_incomplete():
+    points, complete = parse_coordinates("[[1,2],[3,")
+    assert points == [(1, 2)]
+    assert not complete
@@ -0,0 +1,29 @@
+"""Tests for the formation cache. Run pytest from satellite/."""
+
+import formations
+from formation_cache import FormationCache
+
+POINTS = [(100.0, 200.0), (300.0, 400.0), (700.0, 500.0)]
+
+
+def test_valid_answer_is_cached_and_persisted(tmp_path):
+    path = str(tmp_path / "cache.json")
+    cache = FormationCache(path)
+    assert cache.put("Smiley", 3, POINTS)
+    assert FormationCache(path).get(" smiley ", 3) == POINTS
+
+
+def test_raw_answer_off_canvas_is_rejected():
+    cache = FormationCache(None)
+    raw = POINTS[:2] + [(900.0, 500.0)]
+    assert not cache.put("SMILEY", 3, raw)
+    assert cache.get("SMILEY", 3) is None
+    assert cache.metrics()["rejected"] == 1
+    # Clamping would have hidden the bad pod.
+    assert cache.validate(list(zip(*formations.clamp(*zip(*raw)))), 3)
+
+
+def test_answer_with_wrong_pod_count_is_rejected():
+    cache = FormationCache(None)
+    assert not cache.put("SMILEY", 4, POINTS)
+    assert not cache.has("SMILEY", 4)
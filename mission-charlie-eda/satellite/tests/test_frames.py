@@ -0,0 +1,84 @@
+"""Tests for the pod frame encodings. Run pytest from satellite/."""
+
+import base64
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from frames import (
+    KIND_PODS,
+    KIND_PODS_JSON,
+    U32_MAX,
+    decode_json_edit,
+    encode_binary_frame,
+    encode_frame,
+)
+
+IDS = [0, 1]
+META = {"formation": "LINE", "version": 7, "snapshot": False}
+
+
+def _sse_data(frame: bytes) -> dict:
+    line = next(l for l in frame.decode().splitlines() if l.startswith("data:"))
+    return json.loads(line[len("data:"):])
+
+
+def _json_message(message: bytes) -> dict:
+    kind, length = struct.unpack_from("<B3xI", message)
+    assert kind == KIND_PODS_JSON
+    return json.loads(message[8:8 + length])
+
+
+def test_int16_frame_in_range():
+    data = _sse_data(encode_frame("int16", IDS, [1.4, -32768], [2.6, 32767], META, "e-7"))
+    xy = np.frombuffer(base64.b64decode(data["xy"]), dtype="<i2")
+    assert xy.tolist() == [1, 3, -32768, 32767]
+
+
+def test_int16_frame_out_of_range_falls_back_to_json():
+    data = _sse_data(encode_frame("int16", IDS, [1, 40000], [2, 3], META, "e-7"))
+    assert data["pods"][1] == {"id": 1, "x": 40000, "y": 3}
+    assert data["version"] == 7
+
+
+def test_binary_frame_in_range():
+    message = encode_binary_frame(IDS, [1, -5], [2, 6], META)
+    assert message[0] == KIND_PODS
+    xy = np.frombuffer(message, dtype="<i2", offset=len(message) - 8)
+    assert xy.tolist() == [1, 2, -5, 6]
+
+
+@pytest.mark.parametrize("xs, meta", [
+    ([1, 1e6], META),
+    ([1, float("nan")], META),
+    ([1, 2], {**META, "formation": "X" * 70000}),
+    ([1, 2], {**META, "version": U32_MAX + 1}),
+])
+def test_binary_frame_that_does_not_fit_falls_back_to_json(xs, meta):
+    payload = _json_message(encode_binary_frame(IDS, xs, [2, 3], meta))
+    assert [pod["id"] for pod in payload["pods"]] == IDS
+    assert payload["version"] == meta["version"]
+
+
+def test_json_edit_is_decoded():
+    seq, edits = decode_json_edit('{"seq": 3, "pods": [[1, 10, -20], [2, 5.7, 0]]}')
+    assert seq == 3
+    assert edits == [(1, 10, -20), (2, 5, 0)]
+
+
+@pytest.mark.parametrize("text", [
+    '{"seq": 4294967296, "pods": []}',
+    '{"seq": -1, "pods": []}',
+    '{"seq": 1, "pods": [[1, 40000, 0]]}',
+    '{"seq": 1, "pods": [[1, 0, -1e300]]}',
+    '{"seq": 1, "pods": [[1, NaN, 0]]}',
+    '{"seq": 1, "pods": [[-1, 0, 0]]}',
+    '{"seq": true, "pods": []}',
+    '{"seq": 1, "pods": [[1, 2]]}',
+    '[1, 2, 3]',
+])
+def test_json_edit_out_of_range_is_rejected(text):
+    with pytest.raises(ValueError):
+        decode_json_edit(text)
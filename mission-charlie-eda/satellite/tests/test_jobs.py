@@ -0,0 +1,69 @@
+"""Tests for formation jobs superseding a streaming job. Run pytest from satellite/."""
+
+import asyncio
+
+import numpy as np
+
+from jobs import SUCCEEDED, SUPERSEDED, FormationJobs
+from placement import StreamingPlacer
+from pod_store import PodStore
+
+
+def _store():
+    store = PodStore(3)
+    store.reset([100, 200, 300], [122, 200, 380])
+    return store
+
+
+async def _stream(points):
+    """Stands in for the agent stream: closing it takes a few awaits."""
+    try:
+        for point in points:
+            await asyncio.sleep(0.02)
+            yield point
+        await asyncio.sleep(10)
+    finally:
+        await asyncio.sleep(0.02)
+
+
+def test_superseded_streaming_job_does_not_undo_the_next_job():
+    store = _store()
+
+    async def streaming(job):
+        placer = StreamingPlacer(store)
+        try:
+            async for point in _stream([(400, 500), (500, 500)]):
+                placer.place([point])
+        except BaseException:
+            placer.rollback()
+            raise
+
+    async def line(job):
+        store.set_targets([100, 400, 700], [300, 300, 300])
+        return {}
+
+    async def run():
+        jobs = FormationJobs(on_update=lambda job: None)
+        first = jobs.submit("SMILEY", streaming)
+        await asyncio.sleep(0.05)
+        # The first slot has been placed, the answer is still streaming.
+        assert 500 in store.targets()[1]
+        second = jobs.submit("LINE", line)
+        await second.task
+        await asyncio.sleep(0.1)
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first.status == SUPERSEDED
+    assert second.status == SUCCEEDED
+    np.testing.assert_array_equal(store.targets()[1], [300, 300, 300])
+
+
+def test_rollback_restores_previous_targets():
+    store = _store()
+    placer = StreamingPlacer(store)
+    placer.place([(110, 130), (290, 370)])
+    assert placer.placed == 2
+    placer.rollback()
+    np.testing.assert_array_equal(store.targets()[0], [100, 200, 300])
+    np.testing.assert_array_equal(store.targets()[1], [122, 200, 380])
@@ -0,0 +1,195 @@
+"""Tests for RequestPipeline against a stand-in for the Kafka transport.
+
+The stand-in shares one reply topic between all requests, like the Kafka
+client transport: the agent publishes every reply to it, and a consumer
+routes each reply to its request by correlation id. The agent acknowledges
+at once and answers after `latency` seconds, echoing the prompt.
+"""
+
+import asyncio
+import random
+
+import pytest
+
+from a2a.types import (
+    Message,
+    MessageSendParams,
+    Part,
+    Role,
+    Task,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+from request_pipeline import RequestPipeline, has_content
+
+
+def _params(text):
+    return MessageSendParams(
+        message=Message(
+            message_id=f"m-{text}",
+            role=Role.user,
+            parts=[Part(TextPart(text=text))],
+        )
+    )
+
+
+def _status(cid, state, text=None, final=False):
+    message = None
+    if text is not None:
+        message = Message(message_id=f"r-{cid}", role=Role.agent, parts=[Part(TextPart(text=text))])
+    return TaskStatusUpdateEvent(
+        task_id=cid,
+        context_id=cid,
+        final=final,
+        status=TaskStatus(state=state, message=message),
+    )
+
+
+class StandInTransport:
+    """Streams agent replies over one shared topic.
+
+    Prompts starting with "silent" are acknowledged but never answered.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.topic: asyncio.Queue = asyncio.Queue()
+        self.pending: dict[str, asyncio.Queue] = {}
+        self.misrouted = 0
+        self._consumer = None
+
+    async def _consume(self):
+        while True:
+            cid, event = await self.topic.get()
+            queue = self.pending.get(cid)
+            if queue is not None:
+                queue.put_nowait(event)
+
+    async def _agent(self, cid, prompt):
+        await self.topic.put((cid, Task(id=cid, context_id=cid, status=TaskStatus(state=TaskState.submitted))))
+        if prompt.startswith("silent"):
+            return
+        await asyncio.sleep(random.uniform(*self.latency))
+        await self.topic.put((cid, _status(cid, TaskState.working, prompt)))
+        await self.topic.put((cid, _status(cid, TaskState.completed, final=True)))
+
+    async def send_message_streaming(self, params, *, context):
+        if self._consumer is None:
+            self._consumer = asyncio.create_task(self._consume())
+        cid = context.state["correlation_id"]
+        assert cid == params.message.message_id
+        queue: asyncio.Queue = asyncio.Queue()
+        self.pending[cid] = queue
+        asyncio.create_task(self._agent(cid, params.message.parts[0].root.text))
+        try:
+            while True:
+                event = await queue.get()
+                if event.context_id != cid:
+                    self.misrouted += 1
+                yield event
+                if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                    return
+        finally:
+            # The client transport drops the pending reply on close.
+            self.pending.pop(cid, None)
+
+
+async def _ask(pipeline, prompt, timeout=None):
+    texts = []
+    async for event in pipeline.send_message_streaming(_params(prompt), timeout=timeout):
+        message = getattr(event, "status", None) and event.status.message
+        if message:
+            texts.append(message.parts[0].root.text)
+    return texts
+
+
+def test_acknowledgments_are_not_content():
+    assert not has_content(Task(id="t", context_id="c", status=TaskStatus(state=TaskState.submitted)))
+    assert not has_content(_status("c", TaskState.working))
+    assert has_content(_status("c", TaskState.working, "x"))
+    assert has_content(_status("c", TaskState.completed, final=True))
+
+
+def test_hundred_concurrent_requests_get_their_own_replies():
+    async def run():
+        transport = StandInTransport(latency=(0.05, 0.15))
+        pipeline = RequestPipeline(transport, max_in_flight=32, timeout=5.0)
+        prompts = [f"formation {i}" for i in range(100)]
+        started = asyncio.get_running_loop().time()
+        replies = await asyncio.gather(*(_ask(pipeline, p) for p in prompts))
+        elapsed = asyncio.get_running_loop().time() - started
+        return transport, pipeline, prompts, replies, elapsed
+
+    transport, pipeline, prompts, replies, elapsed = asyncio.run(run())
+    assert replies == [[p] for p in prompts]
+    assert transport.misrouted == 0
+    assert not transport.pending
+    metrics = pipeline.metrics()
+    assert metrics["completed"] == 100
+    assert metrics["peak_in_flight"] == 32
+    assert metrics["in_flight"] == metrics["queued"] == 0
+    # 100 requests of at most 150 ms, 32 at a time: 4 waves, not 100.
+    assert elapsed < 1.0
+    # Time to first reply counts the answer, not the immediate acknowledgment.
+    assert metrics["first_reply_ms"]["p50"] >= 50
+
+
+def test_unanswered_requests_time_out_without_blocking_the_rest():
+    async def run():
+        transport = StandInTransport(latency=(0.01, 0.05))
+        pipeline = RequestPipeline(transport, max_in_flight=8, timeout=5.0)
+        prompts = [f"{'silent' if i % 10 == 0 else 'formation'} {i}" for i in range(100)]
+        results = await asyncio.gather(
+            *(_ask(pipeline, p, timeout=0.2) for p in prompts), return_exceptions=True
+        )
+        return transport, pipeline, prompts, results
+
+    transport, pipeline, prompts, results = asyncio.run(run())
+    for prompt, result in zip(prompts, results):
+        if prompt.startswith("silent"):
+            assert isinstance(result, TimeoutError)
+            assert f"m-{prompt}" in str(result)
+        else:
+            assert result == [prompt]
+    assert not transport.pending
+    metrics = pipeline.metrics()
+    assert metrics["timeout"] == 10
+    assert metrics["completed"] == 90
+    assert metrics["in_flight"] == 0
+
+
+def test_cancelled_request_frees_its_slot():
+    async def run():
+        transport = StandInTransport(latency=(0.01, 0.01))
+        pipeline = RequestPipeline(transport, max_in_flight=1, timeout=5.0)
+        stuck = asyncio.create_task(_ask(pipeline, "silent"))
+        await asyncio.sleep(0.05)
+        stuck.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await stuck
+        return transport, pipeline, await _ask(pipeline, "next")
+
+    transport, pipeline, reply = asyncio.run(run())
+    assert reply == ["next"]
+    assert not transport.pending
+    assert pipeline.metrics()["cancelled"] == 1
+
+
+class _NoTransport:
+    async def send_message(self, params, *, context):
+        raise NotImplementedError("no request/reply support")
+
+
+def test_unsupported_request_is_recorded_as_failed():
+    async def run():
+        pipeline = RequestPipeline(_NoTransport(), max_in_flight=2, timeout=1.0)
+        with pytest.raises(NotImplementedError):
+            await pipeline.send_message(_params("formation"))
+        return pipeline.metrics()
+
+    metrics = asyncio.run(run())
+    assert metrics["failed"] == 1
+    assert metrics["in_flight"] == 0